@@ -11,6 +11,8 @@ DROP TABLE IF EXISTS NEWS_SENTIMENT;
 DROP TABLE IF EXISTS NEWS_MAIN;
 DROP TABLE IF EXISTS CUSTOMER;
 DROP TABLE IF EXISTS RISK;
+DROP TABLE IF EXISTS RISK_REGIME;
+DROP TABLE IF EXISTS SYNC_STATE;
 
 
 -- COMPANY_META
@@ -75,7 +77,8 @@ CREATE TABLE NEWS_MAIN
     CONTENT  TEXT         NOT NULL,
     PUB_DATE TIMESTAMP    NOT NULL,
     SOURCE   VARCHAR(100) NOT NULL,
-    NEWS_API VARCHAR(255) NOT NULL
+    NEWS_API VARCHAR(255) NOT NULL,
+    UNIQUE KEY UQ_NEWS_API (NEWS_API)
 );
 
 -- NEWS_COMPANY 테이블
@@ -118,10 +121,40 @@ CREATE TABLE RISK
     ANALYSIS_RESULT VARCHAR(255)  NOT NULL,
     TEST_DATE       DATE          NOT NULL,
     PREDICT_DATE    DATE          NOT NULL,
-    RISK_SCORE      DECIMAL(7, 4) NOT NULL
+    RISK_SCORE      DECIMAL(7, 4) NOT NULL,
+    UNIQUE KEY UQ_RISK (COMPANY_CODE, MODEL_NAME, PREDICT_DATE, TEST_DATE)
 );
 
 
+-- RISK_REGIME 테이블 (종목별 change point 구간 요약, 일별 RISK 행 없이 구간 단위로 조회)
+CREATE TABLE RISK_REGIME
+(
+    COMPANY_CODE VARCHAR(12)    NOT NULL,
+    MODEL_NAME   VARCHAR(50)    NOT NULL,
+    SEGMENT_NO   INT            NOT NULL,
+    START_DATE   DATE           NOT NULL,
+    END_DATE     DATE           NOT NULL,
+    DAYS         INT            NOT NULL,
+    MEAN_RETURN  DECIMAL(12, 8) NOT NULL,
+    VOLATILITY   DECIMAL(12, 8) NOT NULL,
+    RISK_LEVEL   DECIMAL(7, 4)  NOT NULL,
+    IS_OPEN      BOOLEAN        NOT NULL,
+    PRIMARY KEY (COMPANY_CODE, MODEL_NAME, SEGMENT_NO)
+);
+
+
+-- SYNC_STATE 테이블 (loader 별 증분 적재 watermark, module.data.database.sync_state)
+CREATE TABLE SYNC_STATE
+(
+    SOURCE             VARCHAR(50) NOT NULL,
+    SYMBOL             VARCHAR(12) NOT NULL,
+    TABLE_NAME         VARCHAR(50) NOT NULL,
+    LAST_SYNCED_TS     DATETIME,
+    LAST_FILE_CHECKSUM CHAR(40),
+    UPDATED_AT         TIMESTAMP   NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (SOURCE, SYMBOL, TABLE_NAME)
+);
+
 -- STOCK_PRICE 테이블
 CREATE TABLE STOCK_PRICE
 (
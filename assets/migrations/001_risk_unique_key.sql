@@ -0,0 +1,15 @@
+-- RISK (COMPANY_CODE, MODEL_NAME, PREDICT_DATE, TEST_DATE) 유니크 키 추가
+-- RiskDataInserter.upsert_risk 의 INSERT ... ON DUPLICATE KEY UPDATE 가 이 키를 사용한다.
+-- 기존 SELECT 후 INSERT 방식으로 생긴 중복 행은 가장 최근(RISK_IDX 가 큰) 행만 남긴다.
+
+DELETE older
+  FROM RISK older
+  JOIN RISK newer
+    ON newer.COMPANY_CODE = older.COMPANY_CODE
+   AND newer.MODEL_NAME = older.MODEL_NAME
+   AND newer.PREDICT_DATE = older.PREDICT_DATE
+   AND newer.TEST_DATE = older.TEST_DATE
+   AND newer.RISK_IDX > older.RISK_IDX;
+
+ALTER TABLE RISK
+    ADD UNIQUE KEY UQ_RISK (COMPANY_CODE, MODEL_NAME, PREDICT_DATE, TEST_DATE);
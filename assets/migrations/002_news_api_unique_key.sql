@@ -0,0 +1,12 @@
+-- NEWS_MAIN.NEWS_API 유니크 키 추가
+-- NewsDataInserter.insert_news_batch 가 기사 중복을 이 키로 막고 생성된 NEWS_ID 를 NEWS_API 로 다시 찾는다.
+-- 중복 기사는 먼저 들어온(NEWS_ID 가 작은) 행만 남긴다 (NEWS_COMPANY / NEWS_SENTIMENT 는 CASCADE 로 함께 삭제).
+
+DELETE newer
+  FROM NEWS_MAIN newer
+  JOIN NEWS_MAIN older
+    ON older.NEWS_API = newer.NEWS_API
+   AND older.NEWS_ID < newer.NEWS_ID;
+
+ALTER TABLE NEWS_MAIN
+    ADD UNIQUE KEY UQ_NEWS_API (NEWS_API);
@@ -0,0 +1,15 @@
+-- SYNC_STATE 테이블 (loader 별 증분 적재 watermark)
+-- SOURCE: 로컬 데이터 출처 (예: stocks/KOR, stocks/KOR/update, news, risk/KOR), TABLE_NAME: 적재 대상 테이블
+-- LAST_SYNCED_TS: 마지막으로 적재한 행의 시각 (tz 없는 벽시계 시각)
+-- LAST_FILE_CHECKSUM: 마지막 적재 때 읽은 로컬 파일 / 데이터의 fingerprint (같으면 다음 실행에서 건너뜀)
+
+CREATE TABLE IF NOT EXISTS SYNC_STATE
+(
+    SOURCE             VARCHAR(50) NOT NULL,
+    SYMBOL             VARCHAR(12) NOT NULL,
+    TABLE_NAME         VARCHAR(50) NOT NULL,
+    LAST_SYNCED_TS     DATETIME,
+    LAST_FILE_CHECKSUM CHAR(40),
+    UPDATED_AT         TIMESTAMP   NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (SOURCE, SYMBOL, TABLE_NAME)
+);
@@ -0,0 +1,296 @@
+"""
+scripts/ 의 작업들을 하나로 묶은 CLI
+
+    python -m module fetch kor --once
+    python -m module risk kor
+    python -m module sweep kor --detectors binseg_rbf binseg_normal
+    python -m module backtest kor --step 5 --horizon 20
+    python -m module insert stock --market usa
+    python -m module news pipeline
+    python -m module importtime            # 서브커맨드별 import 시간 요약
+
+각 서브커맨드는 (1) 필요한 모듈만 import 하는 loader 와 (2) 실제 실행으로 나뉜다.
+--imports-only 는 (1)만 수행하고 종료하며, importtime 벤치마크가 이를 사용한다.
+"""
+import os
+import re
+import sys
+import logging
+import argparse
+import importlib
+import subprocess
+from typing import Callable, List, Tuple
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASOURCES_DIR = os.path.join(PROJECT_ROOT, "configs", "datasources")
+
+MARKET_CONFIGS = {
+    "kor": "kor_scm_stock_price.yaml",
+    "usa": "usa_stock_price.yaml",
+}
+NEWS_CONFIG = "naver_news.yaml"
+DB_CONFIG = "db_config.yaml"
+
+# importtime 벤치마크 대상 (서브커맨드 인자 목록)
+BENCHMARK_COMMANDS = [
+    ["fetch", "kor"],
+    ["fetch", "usa"],
+    ["risk", "kor"],
+    ["insert", "stock", "--market", "kor"],
+    ["insert", "risk", "--market", "kor"],
+    ["insert", "news"],
+    ["news", "pipeline"],
+]
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def _config_path(args, default_file: str) -> str:
+    return args.config or os.path.join(DATASOURCES_DIR, default_file)
+
+
+def _import_script(name: str):
+    """scripts/ 디렉토리의 스크립트 모듈을 import 한다 (namespace package)."""
+    if PROJECT_ROOT not in sys.path:
+        sys.path.insert(0, PROJECT_ROOT)
+    return importlib.import_module(f"scripts.{name}")
+
+
+def _load_db_params(args) -> dict:
+    from module.utils import load_db_config_yaml
+
+    return load_db_config_yaml(args.db_config or os.path.join(DATASOURCES_DIR, DB_CONFIG))
+
+
+# --------------------------- loaders ---------------------------
+def _load_fetch(args) -> Callable[[], None]:
+    from module.utils import (
+        read_config, load_module, run_data_pipeline, CONFIG_KEY_DATA_PIPELINES, CONFIG_KEY_BASE_PATH
+    )
+
+    config = read_config(_config_path(args, MARKET_CONFIGS[args.market]))
+    # provider 클래스(및 yfinance / FinanceDataReader)는 여기서 처음 로드된다
+    load_module(config, CONFIG_KEY_DATA_PIPELINES)
+    online_risk_dir = None
+    if args.online_risk:
+        country = os.path.basename(config[CONFIG_KEY_DATA_PIPELINES][CONFIG_KEY_BASE_PATH])
+        online_risk_dir = os.path.join(PROJECT_ROOT, "data", "risk", country)
+    return lambda: run_data_pipeline(config, continuous=not args.once, online_risk_dir=online_risk_dir)
+
+
+def _load_risk(args) -> Callable[[], None]:
+    script = _import_script("run_calculate_risk_values")
+    config_path = _config_path(args, MARKET_CONFIGS[args.market])
+    return lambda: script.main(
+        config_path, force=args.force, rolling_window=args.rolling, step=args.step, detector=args.detector,
+        incremental=args.incremental,
+    )
+
+
+def _load_sweep(args) -> Callable[[], None]:
+    script = _import_script("run_risk_sweep")
+    config_path = _config_path(args, MARKET_CONFIGS[args.market])
+    return lambda: script.main(
+        config_path,
+        detectors=args.detectors,
+        n_bkps=args.n_bkps,
+        smoothing_alphas=args.alphas,
+        scalings=args.scalings,
+        max_symbols=args.max_symbols,
+    )
+
+
+def _load_backtest(args) -> Callable[[], None]:
+    script = _import_script("run_risk_backtest")
+    config_path = _config_path(args, MARKET_CONFIGS[args.market])
+    return lambda: script.main(
+        config_path,
+        warmup=args.warmup,
+        step=args.step,
+        horizon=args.horizon,
+        detector=args.detector,
+        max_symbols=args.max_symbols,
+    )
+
+
+def _load_insert(args) -> Callable[[], None]:
+    target = args.target
+    if target == "news":
+        script = _import_script("insert_news_data")
+        config_path = _config_path(args, NEWS_CONFIG)
+        return lambda: script.insert_news_main_core(
+            config_path, _load_db_params(args), full=args.full, workers=args.workers
+        )
+
+    config_path = _config_path(args, MARKET_CONFIGS[args.market])
+    if target == "stock":
+        if args.market == "kor":
+            script = _import_script("insert_kor_stock")
+            return lambda: script.insert_stock_kor_main(
+                config_path, _load_db_params(args), backfill=args.backfill, full=args.full, workers=args.workers
+            )
+        script = _import_script("insert_usa_stock")
+        return lambda: script.insert_stock_usa_main(
+            config_path, _load_db_params(args), backfill=args.backfill, full=args.full, workers=args.workers
+        )
+    if target == "update-stock":
+        script = _import_script("update_stock_price")
+        return lambda: script.update_stock_price_main(
+            config_path, _load_db_params(args), full=args.full, workers=args.workers
+        )
+    if target == "reconcile":
+        script = _import_script("reconcile_stock_price")
+        return lambda: script.reconcile_stock_price_main(
+            config_path, _load_db_params(args), apply=not args.check_only, since=args.since
+        )
+    if target == "risk":
+        script = _import_script("insert_risk_values")
+        return lambda: script.insert_risk_values_main(
+            config_path, _load_db_params(args), full=args.full, workers=args.workers
+        )
+    if target == "regime":
+        script = _import_script("insert_risk_values")
+        return lambda: script.insert_risk_regimes_main(config_path, _load_db_params(args))
+    if target == "meta":
+        script = _import_script("insert_company_meta")
+        return lambda: script.insert_company_meta_from_config(
+            config_path, _load_db_params(args), args.market.upper()
+        )
+    raise ValueError(f"Unknown insert target: {target}")
+
+
+def _load_news(args) -> Callable[[], None]:
+    config_path = _config_path(args, NEWS_CONFIG)
+    if args.step == "analyze":
+        script = _import_script("run_naver_news_analysis_only")
+        return lambda: script.run_naver_news_analysis_only(config_path)
+    script = _import_script("run_naver_news_pipeline")
+    return lambda: script.run_naver_news_pipeline(config_path)
+
+
+# --------------------------- importtime ---------------------------
+def _parse_importtime(stderr: str) -> Tuple[int, List[Tuple[int, str]]]:
+    """
+    -X importtime 출력에서 (전체 self 시간 합계, 최상위 import 별 누적시간 목록)을 구한다.
+    """
+    total_us = 0
+    top_level = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        total_us += int(self_us)
+        if len(indent) <= 1:
+            top_level.append((int(cumulative_us), name))
+    return total_us, sorted(top_level, reverse=True)
+
+
+def _load_importtime(args) -> Callable[[], None]:
+    def run():
+        for command in BENCHMARK_COMMANDS:
+            proc = subprocess.run(
+                [sys.executable, "-X", "importtime", "-m", "module", "--imports-only", *command],
+                cwd=PROJECT_ROOT,
+                capture_output=True,
+                text=True,
+            )
+            total_us, top_level = _parse_importtime(proc.stderr)
+            status = "ok" if proc.returncode == 0 else f"failed({proc.returncode})"
+            heaviest = ", ".join(f"{name} {us / 1000:.0f}ms" for us, name in top_level[:args.top])
+            print(f"{' '.join(command):<32} {total_us / 1000:>8.1f} ms  [{status}]  {heaviest}")
+
+    return run
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m module", description="SCM risk detector jobs")
+    parser.add_argument("--imports-only", action="store_true", help=argparse.SUPPRESS)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    fetch = subparsers.add_parser("fetch", help="주가 데이터 수집")
+    fetch.add_argument("market", choices=sorted(MARKET_CONFIGS))
+    fetch.add_argument("--config")
+    fetch.add_argument("--once", action="store_true", help="최초 1회 수집 후 종료")
+    fetch.add_argument("--online-risk", action="store_true", help="수집 직후 online risk 갱신")
+    fetch.set_defaults(loader=_load_fetch)
+
+    risk = subparsers.add_parser("risk", help="risk value 계산")
+    risk.add_argument("market", choices=sorted(MARKET_CONFIGS))
+    risk.add_argument("--config")
+    risk.add_argument("--force", action="store_true", help="fingerprint 캐시 무시하고 전체 재계산")
+    risk.add_argument("--rolling", type=int, metavar="BARS", help="rolling window 모드 (예: 250)")
+    risk.add_argument("--step", type=int, default=1, help="rolling window 간격 (bar 수)")
+    risk.add_argument("--detector", help="config 의 risk.detector 대신 사용할 detector 이름")
+    risk.add_argument("--incremental", action="store_true",
+                      help="저장된 regime 을 재사용해 마지막 구간 + 새 데이터만 다시 탐지")
+    risk.set_defaults(loader=_load_risk)
+
+    sweep = subparsers.add_parser("sweep", help="risk 하이퍼파라미터 sweep")
+    sweep.add_argument("market", choices=sorted(MARKET_CONFIGS))
+    sweep.add_argument("--config")
+    sweep.add_argument("--detectors", nargs="+", help="기본: config 의 risk.detector")
+    sweep.add_argument("--n-bkps", nargs="+", type=int, default=[3, 5, 8, 12])
+    sweep.add_argument("--alphas", nargs="+", type=float, default=[0.1, 0.2, 0.3, 0.5, 0.8])
+    sweep.add_argument("--scalings", nargs="+", default=["minmax", "quantile", "rank"])
+    sweep.add_argument("--max-symbols", type=int)
+    sweep.set_defaults(loader=_load_sweep)
+
+    backtest = subparsers.add_parser("backtest", help="risk walk-forward 백테스트")
+    backtest.add_argument("market", choices=sorted(MARKET_CONFIGS))
+    backtest.add_argument("--config")
+    backtest.add_argument("--warmup", type=int, default=250, help="첫 평가 시점까지의 bar 수")
+    backtest.add_argument("--step", type=int, default=5, help="평가 간격 (bar 수)")
+    backtest.add_argument("--horizon", type=int, default=20, help="이후 변동성 / 낙폭 기간 (bar 수)")
+    backtest.add_argument("--detector", help="config 의 risk.detector 대신 사용할 detector 이름")
+    backtest.add_argument("--max-symbols", type=int)
+    backtest.set_defaults(loader=_load_backtest)
+
+    insert = subparsers.add_parser("insert", help="로컬 데이터를 DB에 적재")
+    insert.add_argument("target", choices=["stock", "update-stock", "reconcile", "risk", "regime", "news", "meta"])
+    insert.add_argument("--market", choices=sorted(MARKET_CONFIGS), default="kor")
+    insert.add_argument("--config")
+    insert.add_argument("--db-config")
+    insert.add_argument("--full", action="store_true",
+                        help="risk: delta 대신 전체 결과 적재 / stock, update-stock, news: SYNC_STATE watermark 무시")
+    insert.add_argument("--check-only", action="store_true", help="reconcile: 월별 checksum 비교만 (적재하지 않음)")
+    insert.add_argument("--since", help="reconcile: 이 월(YYYY-MM) 부터만 비교")
+    insert.add_argument("--backfill", action="store_true",
+                        help="stock: 초기 적재용 LOAD DATA LOCAL INFILE (서버 설정 필요, 실패 시 batch upsert)")
+    insert.add_argument("--workers", type=int, default=4,
+                        help="stock, update-stock, risk, news: 동시에 처리할 종목 수 (pool 연결 수)")
+    insert.set_defaults(loader=_load_insert)
+
+    news = subparsers.add_parser("news", help="뉴스 수집 / 감성 분석")
+    news.add_argument("step", choices=["pipeline", "analyze"])
+    news.add_argument("--config")
+    news.set_defaults(loader=_load_news)
+
+    importtime = subparsers.add_parser("importtime", help="서브커맨드별 import 시간 요약")
+    importtime.add_argument("--top", type=int, default=3, help="표시할 무거운 최상위 모듈 수")
+    importtime.set_defaults(loader=_load_importtime)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    runner = args.loader(args)
+    if args.imports_only:
+        return
+
+    from module.logger import get_logger, setup_global_logging
+
+    setup_global_logging(
+        log_dir=os.path.join(PROJECT_ROOT, "logs"),
+        log_level=logging.INFO,
+        file_level=logging.DEBUG,
+        stream_level=logging.INFO,
+    )
+    logger = get_logger("module.cli")
+    logger.info(f"Starting command: {args.command}")
+    runner()
+    logger.info(f"Command completed: {args.command}")
+
+
+if __name__ == "__main__":
+    main()
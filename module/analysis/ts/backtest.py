@@ -0,0 +1,221 @@
+"""
+risk 모델 walk-forward 백테스트
+
+종목마다 warmup 이후 step bar 간격으로 시점 t 를 앞으로 옮기며, t 까지의 데이터만으로 risk 를 계산하고
+이후 horizon 일의 실현 변동성 / 최대 낙폭과 비교한다.
+
+- 특징값 (returns, vol_changes) 은 종목마다 한 번만 계산해 실행 동안 메모리에 두고 모든 시점에서 재사용한다
+  (시점 t 에는 앞부분 view 만 넘기므로 복사 / 재계산 없음)
+- 시점마다 calculate_risk_scores 를 처음부터 다시 돌리지 않고 RegimeState 를 이어서 갱신한다
+  (닫힌 구간 재사용, 열린 구간 + 새 bar 만 재탐지 - module.analysis.ts.regimes)
+- 종목 단위로 process pool 에 나눠 실행하고 처리량(steps/sec)과 전체 재탐지를 건너뛴 시점 수를 보고한다
+
+평가 지표 (종목별)
+- vol_corr / drawdown_corr : risk 와 이후 horizon 일 실현 변동성 / 최대 낙폭의 Spearman 상관
+- top_drawdown / base_drawdown : risk 상위 top_quantile 시점 / 전체 시점의 평균 이후 최대 낙폭
+- lift : top_drawdown / base_drawdown (1 보다 크면 risk 상승이 낙폭에 선행)
+"""
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+from module.analysis.ts.regimes import RegimeState
+from module.analysis.ts.sweep import forward_volatility, spearman
+from module.logger import get_logger
+
+logger = get_logger(__name__)
+
+BACKTEST_RESULT_FILE = "backtest_results.csv"
+BACKTEST_SERIES_FILE = "backtest_series.csv"
+
+
+class BacktestConfig(NamedTuple):
+    warmup: int = 250  # 첫 평가 시점까지 필요한 bar 수
+    step: int = 5  # 평가 간격 (bar)
+    horizon: int = 20  # 이후 변동성 / 낙폭 기간 (bar)
+    top_quantile: float = 0.1  # lift 계산에 쓰는 상위 risk 비율
+
+
+def compute_features(close: np.ndarray, volume: np.ndarray) -> np.ndarray:
+    """(returns, vol_changes) - bar 수보다 1 개 적다"""
+    returns = (close[1:] - close[:-1]) / (close[:-1] + 1e-9)
+    vol_changes = (volume[1:] - volume[:-1]) / (volume[:-1] + 1e-9)
+    return np.column_stack((returns, vol_changes))
+
+
+class FeatureCache:
+    """
+    실행 동안 유지하는 종목별 특징값 (메모리). 같은 인스턴스로 run_backtest 를 여러 번 호출하면
+    (예: detector 별 비교) 특징값을 다시 계산하지 않는다. bar 수가 달라지면 다시 계산한다.
+    """
+
+    def __init__(self):
+        self._features: Dict[str, np.ndarray] = {}
+
+    def get(self, symbol: str, close: np.ndarray, volume: np.ndarray) -> Tuple[np.ndarray, bool]:
+        """:return: (특징값, 캐시 적중 여부)"""
+        features = self._features.get(symbol)
+        if features is not None and len(features) == len(close) - 1:
+            return features, True
+        features = self._features[symbol] = compute_features(close, volume)
+        return features, False
+
+
+def forward_drawdown(close: np.ndarray, horizon: int) -> np.ndarray:
+    """t 시점부터 horizon bar 동안의 최대 낙폭 (0~1, t 의 종가 포함). 뒤쪽 horizon 개는 NaN"""
+    out = np.full(len(close), np.nan)
+    if len(close) <= horizon:
+        return out
+    windows = sliding_window_view(close, horizon + 1)
+    peaks = np.maximum.accumulate(windows, axis=1)
+    out[: len(windows)] = (1.0 - windows / peaks).max(axis=1)
+    return out
+
+
+def walk_forward(
+        symbol: str,
+        dates: np.ndarray,
+        close: np.ndarray,
+        volume: np.ndarray,
+        features: np.ndarray,
+        model_name: str,
+        settings: Dict[str, Any],
+        config: BacktestConfig,
+) -> Tuple[np.ndarray, np.ndarray, Dict[str, int]]:
+    """
+    :return: (평가 시점 bar index, 시점별 risk, 갱신 방식별 횟수 {"full", "tail", "extended"})
+    """
+    regime = RegimeState(symbol, model_name, settings, track_fingerprint=False)
+    ends = np.arange(max(config.warmup, 2) - 1, len(close), config.step)
+    risk = np.empty(len(ends))
+    modes = {"full": 0, "tail": 0, "extended": 0}
+    for i, t in enumerate(ends):
+        # 특징값 [0, t) 는 bar [0, t] 로 계산된 값 - 시점 t 이후 데이터는 사용하지 않는다
+        window = slice(0, t + 1)
+        if not regime.segments:
+            regime.fit(dates[window], close[window], volume[window], features[:t])
+            mode = "full"
+        else:
+            mode = regime.update(dates[window], close[window], volume[window], features[:t])
+        modes[mode] += 1
+        risk[i] = regime.risk_values()[-1]
+    return ends, risk, modes
+
+
+def score_symbol(risk: np.ndarray, fwd_vol: np.ndarray, fwd_dd: np.ndarray, top_quantile: float) -> Dict[str, float]:
+    valid = ~(np.isnan(fwd_vol) | np.isnan(fwd_dd))
+    scores = {
+        "vol_corr": spearman(risk, fwd_vol),
+        "drawdown_corr": spearman(risk, fwd_dd),
+        "top_drawdown": np.nan,
+        "base_drawdown": np.nan,
+        "lift": np.nan,
+    }
+    if valid.sum() < 3:
+        return scores
+    threshold = np.quantile(risk[valid], 1.0 - top_quantile)
+    top = valid & (risk >= threshold)
+    scores["top_drawdown"] = float(fwd_dd[top].mean())
+    scores["base_drawdown"] = float(fwd_dd[valid].mean())
+    if scores["base_drawdown"] > 0:
+        scores["lift"] = scores["top_drawdown"] / scores["base_drawdown"]
+    return scores
+
+
+def backtest_symbol(args) -> Tuple[Optional[dict], Optional[pd.DataFrame], str]:
+    """
+    process pool 용. (symbol, dates, close, volume, features, model_name, settings, config)
+    → (요약 dict, 시점별 DataFrame, 오류 문자열)
+    """
+    symbol, dates, close, volume, features, model_name, settings, config = args
+    started = time.perf_counter()
+    try:
+        ends, risk, modes = walk_forward(symbol, dates, close, volume, features, model_name, settings, config)
+    except Exception as e:
+        return None, None, repr(e)
+
+    returns = features[:, 0]
+    # bar t 이후 수익률은 특징값 index t 부터이므로 forward_volatility 의 index t - 1 이 bar t 에 해당
+    fwd_vol = np.concatenate([[np.nan], forward_volatility(returns, config.horizon)])[ends]
+    fwd_dd = forward_drawdown(close, config.horizon)[ends]
+    summary = {
+        "symbol": symbol,
+        "steps": len(ends),
+        **score_symbol(risk, fwd_vol, fwd_dd, config.top_quantile),
+        **{f"{mode}_updates": count for mode, count in modes.items()},
+        "seconds": time.perf_counter() - started,
+    }
+    series = pd.DataFrame({
+        "symbol": symbol,
+        "date": pd.DatetimeIndex(dates[ends]).strftime("%Y-%m-%d"),
+        "risk_value": risk,
+        "fwd_volatility": fwd_vol,
+        "fwd_drawdown": fwd_dd,
+    })
+    return summary, series, ""
+
+
+def run_backtest(
+        symbols: Sequence[str],
+        dates: Sequence[np.ndarray],
+        closes: Sequence[np.ndarray],
+        volumes: Sequence[np.ndarray],
+        model_name: str,
+        settings: Dict[str, Any],
+        config: BacktestConfig = BacktestConfig(),
+        feature_cache: Optional[FeatureCache] = None,
+        processes: int = 1,
+) -> Tuple[pd.DataFrame, pd.DataFrame, Dict[str, float]]:
+    """
+    :param dates: 종목별 datetime64 배열 (tz 정보 없이 UTC 기준)
+    :param feature_cache: 호출 사이에 특징값을 공유할 FeatureCache (None 이면 이번 호출에서만 사용)
+    :return: (종목별 요약, 시점별 series, 전체 통계 {"symbols", "steps", "seconds", "steps_per_sec",
+              "full_refits", "full_refits_skipped", "state_reuse_rate"}).
+             full_refits_skipped 는 RegimeState 가 닫힌 구간을 재사용해 전체 재탐지를 하지 않은 시점 수
+    """
+    feature_cache = FeatureCache() if feature_cache is None else feature_cache
+    tasks = []
+    for s, d, c, v in zip(symbols, dates, closes, volumes):
+        if len(c) <= config.warmup:
+            continue
+        c = np.asarray(c, dtype=np.float64)
+        v = np.asarray(v, dtype=np.float64)
+        features, _ = feature_cache.get(s, c, v)
+        tasks.append((s, d, c, v, features, model_name, settings, config))
+    logger.info(f"Backtesting {len(tasks)} symbols (warmup={config.warmup}, step={config.step}, "
+                f"horizon={config.horizon}) with {processes} processes")
+
+    started = time.perf_counter()
+    if processes <= 1:
+        outputs = [backtest_symbol(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            outputs = list(executor.map(backtest_symbol, tasks))
+    elapsed = time.perf_counter() - started
+
+    summaries: List[dict] = []
+    series: List[pd.DataFrame] = []
+    for task, (summary, frame, error) in zip(tasks, outputs):
+        if summary is None:
+            logger.warning(f"[{task[0]}] Backtest failed: {error}")
+            continue
+        summaries.append(summary)
+        series.append(frame)
+
+    results = pd.DataFrame(summaries)
+    steps = int(results["steps"].sum()) if summaries else 0
+    full_refits = int(results["full_updates"].sum()) if summaries else 0
+    reused = int(results[["tail_updates", "extended_updates"]].to_numpy().sum()) if summaries else 0
+    stats = {
+        "symbols": len(summaries),
+        "steps": steps,
+        "seconds": elapsed,
+        "steps_per_sec": steps / elapsed if elapsed > 0 else float("nan"),
+        "full_refits": full_refits,
+        "full_refits_skipped": reused,
+        # 첫 fit 이후 시점 중 닫힌 구간을 재사용한 비율
+        "state_reuse_rate": reused / max(1, steps - len(summaries)),
+    }
+    return results, pd.concat(series, ignore_index=True) if series else pd.DataFrame(), stats
@@ -0,0 +1,303 @@
+"""
+전체 종목 risk 배치 엔진
+
+- 종목별 close / volume 을 하나의 연속 배열로 이어 붙여 shared memory 에 올린다.
+  종목 i 의 구간은 offsets[i]:offsets[i+1] (ragged offsets)
+- worker 에는 종목 index 만 전달하고, worker 는 shared memory 를 직접 읽어
+  미리 할당된 shared 출력 배열의 같은 구간에 risk value 를 쓴다.
+  (각 구간의 첫 행은 변동률 계산이 불가하므로 NaN)
+- DataFrame pickling / 종목별 concat 이 없고, 결과는 시장 단위 DataFrame 하나로 만들어진다.
+"""
+import os
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import Pool, cpu_count, shared_memory
+from typing import Dict, List, NamedTuple, Optional, Sequence
+from module.analysis.ts.change_point_detection import risk_values_from_arrays
+from module.analysis.ts.detectors import DEFAULT_DETECTOR
+from module.analysis.ts.rolling import rolling_risk_values
+from module.analysis.ts.risk_job import RISK_INPUT_COLUMNS, RISK_RESULT_COLUMNS, load_symbol_history
+from module.logger import get_logger
+
+logger = get_logger(__name__)
+
+SHARED_ARRAYS = ("close", "volume", "risk")
+
+
+class Universe(NamedTuple):
+    symbols: List[str]
+    offsets: np.ndarray  # (n_symbols + 1,) int64
+    dates: np.ndarray  # (total_rows,) datetime64[ns, UTC]
+    close: np.ndarray  # (total_rows,) float64
+    volume: np.ndarray  # (total_rows,) float64
+
+    def __len__(self):
+        return len(self.symbols)
+
+    @property
+    def total_rows(self) -> int:
+        return int(self.offsets[-1])
+
+    def rows(self, index: int) -> slice:
+        return slice(int(self.offsets[index]), int(self.offsets[index + 1]))
+
+    def subset(self, indices: Sequence[int]) -> "Universe":
+        """indices 종목만 담은 Universe (순서 유지)"""
+        slices = [self.rows(i) for i in indices]
+        lengths = np.array([s.stop - s.start for s in slices], dtype=np.int64)
+        take = np.concatenate([np.arange(s.start, s.stop) for s in slices]) if slices else np.empty(0, np.int64)
+        return Universe(
+            [self.symbols[i] for i in indices],
+            np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64),
+            self.dates[take],
+            self.close[take],
+            self.volume[take],
+        )
+
+
+class WorkerStats(NamedTuple):
+    pid: int
+    symbols: int
+    rows: int
+    seconds: float
+    failures: int
+
+
+def load_universe(base_path: str, symbols: Sequence[str], max_workers: int = 8) -> Universe:
+    """
+    종목 폴더들을 (I/O 위주이므로 thread 로) 읽어 하나의 ragged 배열로 합친다.
+    폴더가 없거나 close/volume 이 없거나 2행 미만인 종목은 제외한다.
+    """
+
+    def _load(symbol: str) -> Optional[pd.DataFrame]:
+        folder_path = os.path.join(base_path, symbol)
+        if not os.path.isdir(folder_path):
+            logger.warning(f"No folder for {symbol} at {folder_path}")
+            return None
+        history = load_symbol_history(folder_path)
+        if any(c not in history.columns for c in RISK_INPUT_COLUMNS) or len(history) < 2:
+            logger.info(f"[{symbol}] Not enough data for risk calculation. Skipped.")
+            return None
+        return history
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        histories = list(executor.map(_load, symbols))
+
+    kept = [(s, h) for s, h in zip(symbols, histories) if h is not None]
+    lengths = np.array([len(h) for _, h in kept], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+
+    if kept:
+        dates = pd.DatetimeIndex(
+            np.concatenate([pd.to_datetime(h["date"], utc=True).dt.tz_localize(None).to_numpy() for _, h in kept])
+        ).tz_localize("UTC")
+        close = np.concatenate([h["close"].to_numpy(dtype=np.float64) for _, h in kept])
+        volume = np.concatenate([h["volume"].to_numpy(dtype=np.float64) for _, h in kept])
+    else:
+        dates = pd.DatetimeIndex([], tz="UTC")
+        close = np.empty(0)
+        volume = np.empty(0)
+
+    return Universe([s for s, _ in kept], offsets, dates, close, volume)
+
+
+class SharedUniverse:
+    """
+    close / volume / risk 배열을 shared memory 블록으로 관리한다.
+    부모 프로세스에서 create() 후 spec 을 worker initializer 로 넘기고, 끝나면 close(unlink=True).
+    """
+
+    def __init__(self, blocks: Dict[str, shared_memory.SharedMemory], total_rows: int, owner: bool):
+        self.blocks = blocks
+        self.total_rows = total_rows
+        self.owner = owner
+        self.arrays = {
+            name: np.ndarray((total_rows,), dtype=np.float64, buffer=block.buf)
+            for name, block in blocks.items()
+        }
+
+    @classmethod
+    def create(cls, universe: Universe) -> "SharedUniverse":
+        total_rows = universe.total_rows
+        # 크기 0 블록은 만들 수 없으므로 최소 1 원소
+        nbytes = max(total_rows, 1) * np.dtype(np.float64).itemsize
+        blocks = {name: shared_memory.SharedMemory(create=True, size=nbytes) for name in SHARED_ARRAYS}
+        shared = cls(blocks, total_rows, owner=True)
+        shared.arrays["close"][:] = universe.close
+        shared.arrays["volume"][:] = universe.volume
+        shared.arrays["risk"][:] = np.nan
+        return shared
+
+    @classmethod
+    def attach(cls, spec: dict) -> "SharedUniverse":
+        blocks = {name: shared_memory.SharedMemory(name=block_name) for name, block_name in spec["blocks"].items()}
+        return cls(blocks, spec["total_rows"], owner=False)
+
+    @property
+    def spec(self) -> dict:
+        return {
+            "blocks": {name: block.name for name, block in self.blocks.items()},
+            "total_rows": self.total_rows,
+        }
+
+    def close(self):
+        self.arrays = {}
+        for block in self.blocks.values():
+            block.close()
+            if self.owner:
+                block.unlink()
+
+
+# ---------------------------- worker ----------------------------
+_worker_state: dict = {}
+
+
+def _init_worker(spec: dict, offsets: np.ndarray, params: dict):
+    _worker_state["shared"] = SharedUniverse.attach(spec)
+    _worker_state["offsets"] = offsets
+    _worker_state["params"] = params
+
+
+def _window_slices(n: int, window_rows: Optional[int]):
+    """각 window 는 직전 행을 하나 포함한다 (compute_symbol_risk 와 동일)."""
+    if window_rows is None or window_rows >= n:
+        return [(0, n)]
+    return [(start - 1, min(start + window_rows, n)) for start in range(1, n, window_rows)]
+
+
+def _compute_symbol(index: int):
+    """종목 index 하나를 계산해 shared risk 배열에 쓴다. → (index, pid, rows, seconds, error)"""
+    started = time.perf_counter()
+    shared = _worker_state["shared"]
+    params = dict(_worker_state["params"])
+    window_rows = params.pop("window_rows", None)
+    rolling_window = params.pop("rolling_window", None)
+    step = params.pop("step", 1)
+    begin, end = _worker_state["offsets"][index], _worker_state["offsets"][index + 1]
+
+    close = shared.arrays["close"][begin:end]
+    volume = shared.arrays["volume"][begin:end]
+    risk = shared.arrays["risk"]
+    try:
+        if rolling_window is not None:
+            # 각 window 끝 날짜에만 값이 채워지고 나머지는 NaN 으로 남는다
+            ends, values = rolling_risk_values(close, volume, rolling_window, step, **params)
+            risk[begin + ends] = values
+        else:
+            for w_start, w_end in _window_slices(end - begin, window_rows):
+                risk[begin + w_start + 1: begin + w_end] = risk_values_from_arrays(
+                    close[w_start:w_end], volume[w_start:w_end], **params
+                )
+        error = None
+    except Exception as e:
+        error = repr(e)
+    return index, os.getpid(), int(end - begin), time.perf_counter() - started, error
+
+
+# ---------------------------- driver ----------------------------
+def run_batch(
+        universe: Universe,
+        processes: Optional[int] = None,
+        n_bkps: int = 5,
+        smoothing_alpha: float = 0.3,
+        detector: str = DEFAULT_DETECTOR,
+        detector_params: Optional[dict] = None,
+        window_rows: Optional[int] = None,
+        rolling_window: Optional[int] = None,
+        step: int = 1,
+        progress_every: float = 0.1,
+) -> pd.DataFrame:
+    """
+    :param universe: load_universe 결과
+    :param processes: worker 수 (기본 cpu_count)
+    :param window_rows: 고정 window 단위로 나눠 계산 (rolling_window 와 함께 쓸 수 없음)
+    :param rolling_window: 지정하면 rolling 모드. 날짜마다 직전 rolling_window 개 bar 로 계산 (step 간격)
+    :param progress_every: 전체 대비 이 비율마다 진행률 로그
+    :return: (symbol, date, risk_value) DataFrame. 실패한 종목은 제외
+    """
+    if len(universe) == 0:
+        return pd.DataFrame(columns=RISK_RESULT_COLUMNS)
+    if window_rows is not None and rolling_window is not None:
+        raise ValueError("window_rows and rolling_window cannot be used together")
+
+    processes = min(processes or cpu_count(), len(universe))
+    params = {
+        "n_bkps": n_bkps,
+        "smoothing_alpha": smoothing_alpha,
+        "detector": detector,
+        "detector_params": detector_params,
+        "window_rows": window_rows,
+        "rolling_window": rolling_window,
+        "step": step,
+    }
+
+    shared = SharedUniverse.create(universe)
+    stats: Dict[int, list] = {}
+    failed = set()
+    started = time.perf_counter()
+    try:
+        # 큰 종목부터 배정해 마지막에 한 worker 만 남는 꼬리를 줄인다
+        order = np.argsort(-np.diff(universe.offsets), kind="stable").tolist()
+        progress_step = max(1, int(len(order) * progress_every))
+        with Pool(processes, initializer=_init_worker, initargs=(shared.spec, universe.offsets, params)) as pool:
+            for done, (index, pid, rows, seconds, error) in enumerate(
+                    pool.imap_unordered(_compute_symbol, order), start=1
+            ):
+                worker = stats.setdefault(pid, [0, 0, 0.0, 0])
+                worker[0] += 1
+                worker[1] += rows
+                worker[2] += seconds
+                if error is not None:
+                    worker[3] += 1
+                    failed.add(index)
+                    logger.warning(f"[{universe.symbols[index]}] Failed to compute risk: {error}")
+                if done % progress_step == 0 or done == len(order):
+                    logger.info(
+                        f"Progress {done}/{len(order)} symbols "
+                        f"({time.perf_counter() - started:.1f}s elapsed)"
+                    )
+
+        result = _collect(universe, shared.arrays["risk"], failed, drop_missing=rolling_window is not None)
+    finally:
+        shared.close()
+
+    for worker in worker_stats(stats):
+        logger.info(
+            f"worker pid={worker.pid}: {worker.symbols} symbols, {worker.rows} rows, "
+            f"{worker.seconds:.2f}s busy, {worker.failures} failed"
+        )
+    logger.info(
+        f"Batch risk completed: {len(universe) - len(failed)}/{len(universe)} symbols, "
+        f"{len(result)} rows in {time.perf_counter() - started:.2f}s with {processes} workers"
+    )
+    return result
+
+
+def worker_stats(stats: Dict[int, list]) -> List[WorkerStats]:
+    return [WorkerStats(pid, *values) for pid, values in sorted(stats.items())]
+
+
+def _collect(universe: Universe, risk: np.ndarray, failed: set, drop_missing: bool = False) -> pd.DataFrame:
+    """
+    shared risk 배열 → (symbol, date, risk_value). 각 종목 첫 행과 실패 종목은 제외
+    :param drop_missing: rolling 모드처럼 계산하지 않은 날짜(NaN)가 있으면 제외
+    """
+    lengths = np.diff(universe.offsets)
+    keep = np.ones(universe.total_rows, dtype=bool)
+    keep[universe.offsets[:-1]] = False
+    for index in failed:
+        keep[universe.offsets[index]: universe.offsets[index + 1]] = False
+    if drop_missing:
+        keep &= ~np.isnan(risk[: universe.total_rows])
+
+    symbols = np.repeat(np.asarray(universe.symbols, dtype=object), lengths)
+    return pd.DataFrame(
+        {
+            "symbol": symbols[keep],
+            "date": universe.dates[keep],
+            "risk_value": risk[keep].copy(),
+        },
+        columns=RISK_RESULT_COLUMNS,
+    )
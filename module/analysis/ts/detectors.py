@@ -0,0 +1,331 @@
+"""
+calculate_risk_scores 에서 사용하는 change point 탐지 backend 모음
+
+- binseg_rbf    : 기존 방식. ruptures Binseg + RBF 커널 (Gram 행렬 때문에 메모리/시간 O(n^2))
+- binseg_l2     : Binseg + 누적합 기반 l2 비용 (평균 변화, 구간 비용 O(d))
+- binseg_normal : Binseg + 누적합 기반 normal 비용 (평균/공분산 변화)
+- pelt_l2       : PELT + l2 비용 (n_bkps 대신 penalty로 개수 결정)
+- pelt_normal   : PELT + normal 비용
+- binseg_auto   : Binseg 분할 경로 하나로 penalty 를 골라 개수를 자동 결정 (module.analysis.ts.penalty)
+- rff           : Random Fourier Features 로 RBF 커널을 선형 근사한 뒤 Binseg + l2
+- bottomup      : BottomUp + normal 비용 (잘게 나눈 뒤 병합)
+- sliding_window: ruptures Window (sliding window 비용 차이) + normal 비용
+- dynp          : Dynp 동적 계획법 + normal 비용 (정확하지만 O(n^2))
+- online        : BOCPD (module.analysis.ts.online_detection) 의 run length 하락 지점
+- window        : 고정 길이 window 별로 binseg_rbf 를 수행하고 결과를 합침 (이전 이름 chunked)
+
+각 detector 는 register_detector 로 DETECTOR_REGISTRY 에 등록되며, RISK 테이블의
+MODEL_NAME 은 등록된 model_name 을 사용한다 (detector_model_name).
+
+binseg_rbf, online 외의 detector 는 특징값을 컬럼별로 표준화한 뒤 탐지한다.
+"""
+import numpy as np
+import ruptures as rpt
+from ruptures.base import BaseCost
+from typing import Callable, Dict, List, NamedTuple, Optional
+from module.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_DETECTOR = "binseg_rbf"
+
+
+class CostL2Cumsum(BaseCost):
+    """
+    ruptures CostL2 와 같은 값을 누적합으로 O(d)에 계산하는 비용 함수.
+    (CostL2 는 구간 길이에 비례하는 시간이 걸려 긴 시계열에서 Binseg 가 O(n^2)이 된다)
+    """
+
+    model = "l2_cumsum"
+    min_size = 2
+
+    def fit(self, signal):
+        signal = signal.reshape(-1, 1) if signal.ndim == 1 else signal
+        self.signal = signal
+        zeros = np.zeros((1, signal.shape[1]))
+        self._csum = np.vstack([zeros, np.cumsum(signal, axis=0)])
+        self._csum_sq = np.concatenate([[0.0], np.cumsum((signal ** 2).sum(axis=1))])
+        return self
+
+    def error(self, start, end):
+        n = end - start
+        if n < self.min_size:
+            raise rpt.exceptions.NotEnoughPoints
+        seg_sum = self._csum[end] - self._csum[start]
+        return float(self._csum_sq[end] - self._csum_sq[start] - seg_sum @ seg_sum / n)
+
+
+class CostNormalCumsum(BaseCost):
+    """
+    ruptures CostNormal(평균/공분산 변화)을 누적합으로 O(d^2)에 계산하는 비용 함수.
+    """
+
+    model = "normal_cumsum"
+    min_size = 2
+
+    def __init__(self, eps: float = 1e-6):
+        self.eps = eps
+
+    def fit(self, signal):
+        signal = signal.reshape(-1, 1) if signal.ndim == 1 else signal
+        self.signal = signal
+        n, d = signal.shape
+        self._csum = np.vstack([np.zeros((1, d)), np.cumsum(signal, axis=0)])
+        outer = (signal[:, :, None] * signal[:, None, :]).reshape(n, d * d)
+        self._csum_outer = np.vstack([np.zeros((1, d * d)), np.cumsum(outer, axis=0)])
+        self._eye = np.eye(d) * self.eps
+        return self
+
+    def error(self, start, end):
+        n = end - start
+        if n < self.min_size:
+            raise rpt.exceptions.NotEnoughPoints
+        d = self.signal.shape[1]
+        mean = (self._csum[end] - self._csum[start]) / n
+        second = ((self._csum_outer[end] - self._csum_outer[start]) / n).reshape(d, d)
+        cov = second - np.outer(mean, mean) + self._eye
+        _, logdet = np.linalg.slogdet(cov)
+        return float(n * logdet)
+
+
+def standardize(features: np.ndarray) -> np.ndarray:
+    """컬럼별 평균 0, 표준편차 1로 변환 (표준편차 0인 컬럼은 평균만 제거)"""
+    std = features.std(axis=0)
+    std[std < 1e-12] = 1.0
+    return (features - features.mean(axis=0)) / std
+
+
+def median_heuristic_gamma(features: np.ndarray, sample_size: int = 2000, seed: int = 0) -> float:
+    """
+    ruptures CostRbf 와 같은 median heuristic (1 / median 제곱거리)을
+    전체 pairwise 거리 대신 표본 쌍으로 추정한다.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(features)
+    i = rng.integers(0, n, size=sample_size)
+    j = rng.integers(0, n, size=sample_size)
+    sq_dist = ((features[i] - features[j]) ** 2).sum(axis=1)
+    sq_dist = sq_dist[sq_dist > 0]
+    median = np.median(sq_dist) if len(sq_dist) else 0.0
+    return 1.0 / median if median > 0 else 1.0
+
+
+def random_fourier_features(
+        features: np.ndarray,
+        n_components: int = 64,
+        gamma: Optional[float] = None,
+        seed: int = 0,
+) -> np.ndarray:
+    """
+    RBF 커널 exp(-gamma * ||x - y||^2) 를 근사하는 Random Fourier Features.
+    z(x)·z(y) ≈ k(x, y) 이므로 z 공간의 l2 비용이 RBF 커널 비용의 근사가 된다.
+    """
+    if gamma is None:
+        gamma = median_heuristic_gamma(features, seed=seed)
+    rng = np.random.default_rng(seed)
+    weights = rng.normal(0.0, np.sqrt(2.0 * gamma), size=(features.shape[1], n_components))
+    offsets = rng.uniform(0.0, 2.0 * np.pi, size=n_components)
+    return np.sqrt(2.0 / n_components) * np.cos(features @ weights + offsets)
+
+
+def default_penalty(features: np.ndarray, model: str = "l2") -> float:
+    """
+    표준화된 특징값 기준 BIC 형태의 penalty: (구간당 파라미터 수) * log(n)
+    - l2: 평균 d개, normal: 평균 d개 + 공분산 d(d+1)/2개
+    """
+    n, d = features.shape
+    n_params = d if model == "l2" else d + d * (d + 1) // 2
+    return float(n_params * np.log(max(n, 2)))
+
+
+class DetectorSpec(NamedTuple):
+    name: str
+    model_name: str  # RISK.MODEL_NAME 에 기록되는 이름
+    func: Callable[..., List[int]]
+    max_benchmark_n: Optional[int]  # O(n^2) 이상인 detector 는 벤치마크 길이를 제한
+    uses_n_bkps: bool = True  # False 면 n_bkps 와 무관하게 같은 결과 (penalty / online 방식)
+
+
+DETECTOR_REGISTRY: Dict[str, DetectorSpec] = {}
+DETECTORS: Dict[str, Callable[..., List[int]]] = {}
+# 이전 이름 → 현재 이름
+DETECTOR_ALIASES: Dict[str, str] = {
+    "binseg": "binseg_rbf",
+    "pelt": "pelt_l2",
+    "chunked": "window",
+}
+
+
+def register_detector(name: str, model_name: str, max_benchmark_n: Optional[int] = None,
+                      uses_n_bkps: bool = True):
+    """
+    detector 함수 등록 decorator. 함수 시그니처는 (features, n_bkps, **params) -> breakpoints
+    """
+
+    def decorator(func):
+        DETECTOR_REGISTRY[name] = DetectorSpec(name, model_name, func, max_benchmark_n, uses_n_bkps)
+        DETECTORS[name] = func
+        return func
+
+    return decorator
+
+
+def resolve_detector(name: str) -> DetectorSpec:
+    name = DETECTOR_ALIASES.get(name, name)
+    if name not in DETECTOR_REGISTRY:
+        raise ValueError(f"Unknown detector '{name}'. Available: {sorted(DETECTOR_REGISTRY)}")
+    return DETECTOR_REGISTRY[name]
+
+
+def detector_model_name(name: str) -> str:
+    return resolve_detector(name).model_name
+
+
+@register_detector("binseg_rbf", "Binseg", max_benchmark_n=2000)
+def _binseg_rbf(features: np.ndarray, n_bkps: int, jump: int = 5) -> List[int]:
+    return rpt.Binseg(model="rbf", jump=jump).fit(features).predict(n_bkps=n_bkps)
+
+
+@register_detector("binseg_l2", "Binseg-L2")
+def _binseg_l2(features: np.ndarray, n_bkps: int, jump: int = 5) -> List[int]:
+    algo = rpt.Binseg(custom_cost=CostL2Cumsum(), jump=jump)
+    return algo.fit(standardize(features)).predict(n_bkps=n_bkps)
+
+
+@register_detector("binseg_normal", "Binseg-Normal")
+def _binseg_normal(features: np.ndarray, n_bkps: int, jump: int = 5) -> List[int]:
+    algo = rpt.Binseg(custom_cost=CostNormalCumsum(), jump=jump)
+    return algo.fit(standardize(features)).predict(n_bkps=n_bkps)
+
+
+def _pelt(cost: BaseCost, model: str, features: np.ndarray, pen: Optional[float], jump: int) -> List[int]:
+    signal = standardize(features)
+    pen = default_penalty(signal, model) if pen is None else pen
+    return rpt.Pelt(custom_cost=cost, jump=jump).fit(signal).predict(pen=pen)
+
+
+@register_detector("pelt_l2", "PELT-L2", max_benchmark_n=20000, uses_n_bkps=False)
+def _pelt_l2(features: np.ndarray, n_bkps: int, pen: Optional[float] = None, jump: int = 5) -> List[int]:
+    return _pelt(CostL2Cumsum(), "l2", features, pen, jump)
+
+
+@register_detector("pelt_normal", "PELT-Normal", max_benchmark_n=20000, uses_n_bkps=False)
+def _pelt_normal(features: np.ndarray, n_bkps: int, pen: Optional[float] = None, jump: int = 5) -> List[int]:
+    return _pelt(CostNormalCumsum(), "normal", features, pen, jump)
+
+
+@register_detector("binseg_auto", "Binseg-Auto", uses_n_bkps=False)
+def _binseg_auto(features: np.ndarray, n_bkps: int, method: str = "bic", cost: str = "normal",
+                 max_bkps: Optional[int] = None, n_penalties: int = 20, jump: int = 5) -> List[int]:
+    """
+    BIC 또는 penalty path 의 elbow 로 breakpoint 수를 정한다. n_bkps 는 사용하지 않는다.
+    """
+    from module.analysis.ts.penalty import select_breakpoints
+
+    return select_breakpoints(features, method, cost, max_bkps, n_penalties, jump).bkps
+
+
+@register_detector("bottomup", "BottomUp")
+def _bottomup(features: np.ndarray, n_bkps: int, jump: int = 5) -> List[int]:
+    algo = rpt.BottomUp(custom_cost=CostNormalCumsum(), jump=jump)
+    return algo.fit(standardize(features)).predict(n_bkps=n_bkps)
+
+
+@register_detector("sliding_window", "Window")
+def _sliding_window(features: np.ndarray, n_bkps: int, width: int = 60, jump: int = 5) -> List[int]:
+    """ruptures Window: 인접한 두 window 의 비용 차이가 큰 지점을 breakpoint 로 선택"""
+    width = min(width, max(4, len(features) // 4))
+    algo = rpt.Window(width=width, custom_cost=CostNormalCumsum(), jump=jump)
+    return algo.fit(standardize(features)).predict(n_bkps=n_bkps)
+
+
+@register_detector("dynp", "Dynp", max_benchmark_n=2000)
+def _dynp(features: np.ndarray, n_bkps: int, jump: int = 5) -> List[int]:
+    """동적 계획법으로 n_bkps 개의 최적 분할 (O(n^2 / jump^2) 메모리/시간)"""
+    algo = rpt.Dynp(custom_cost=CostNormalCumsum(), jump=jump)
+    return algo.fit(standardize(features)).predict(n_bkps=n_bkps)
+
+
+@register_detector("online", "BOCPD", uses_n_bkps=False)
+def _online(features: np.ndarray, n_bkps: int, hazard: float = 1 / 250, max_run_length: int = 500,
+            min_drop: int = 20, max_new_run: int = 40) -> List[int]:
+    """
+    BOCPD 의 MAP run length 가 min_drop 이상 줄어 max_new_run 이하가 된 시점을 change point 로 본다.
+    (run length r 로 떨어졌다면 change point 는 r 시점 전, min_drop 이내로 가까운 지점은 하나로 합침)
+    n_bkps 는 사용하지 않는다.
+    """
+    from module.analysis.ts.online_detection import OnlineChangePointDetector
+
+    n = len(features)
+    detector = OnlineChangePointDetector(hazard=hazard, max_run_length=max_run_length,
+                                         n_features=features.shape[1])
+    run_lengths = detector.feature_run_lengths(features)
+    drops = np.flatnonzero(
+        (run_lengths[1:] < run_lengths[:-1] - min_drop) & (run_lengths[1:] <= max_new_run)
+    ) + 1
+    bkps: List[int] = []
+    for start in np.unique(drops - run_lengths[drops]):
+        if start <= 0:
+            continue
+        if bkps and start - bkps[-1] < min_drop:
+            bkps[-1] = int(start)
+        else:
+            bkps.append(int(start))
+    return bkps + [n]
+
+
+@register_detector("rff", "Binseg-RFF")
+def _rff(
+        features: np.ndarray,
+        n_bkps: int,
+        n_components: int = 64,
+        gamma: Optional[float] = None,
+        seed: int = 0,
+        jump: int = 5,
+) -> List[int]:
+    lifted = random_fourier_features(standardize(features), n_components, gamma, seed)
+    return rpt.Binseg(custom_cost=CostL2Cumsum(), jump=jump).fit(lifted).predict(n_bkps=n_bkps)
+
+
+@register_detector("window", "Binseg-Chunked")
+def _window(
+        features: np.ndarray,
+        n_bkps: int,
+        window_size: int = 1000,
+        base_detector: str = "binseg_rbf",
+) -> List[int]:
+    """
+    window_size 길이 구간마다 base_detector 를 수행한다.
+    각 window 에는 전체 n_bkps 를 길이 비율로 나눈 개수(최소 1)를 배정한다.
+    """
+    n = len(features)
+    base = resolve_detector(base_detector).func
+    if n <= window_size:
+        return base(features, n_bkps)
+
+    per_window = max(1, int(round(n_bkps * window_size / n)))
+    bkps = []
+    for start in range(0, n, window_size):
+        end = min(start + window_size, n)
+        window = features[start:end]
+        # 너무 짧은 마지막 구간은 분할하지 않는다
+        if len(window) < 10 * (per_window + 1):
+            continue
+        local = base(window, per_window)
+        bkps.extend(start + b for b in local[:-1])
+    return sorted(set(bkps)) + [n]
+
+
+def detect_change_points(
+        features: np.ndarray,
+        detector: str = DEFAULT_DETECTOR,
+        n_bkps: int = 5,
+        **params,
+) -> List[int]:
+    """
+    :param features: (n_samples, n_features) 특징 행렬
+    :param detector: DETECTOR_REGISTRY 의 이름 (또는 DETECTOR_ALIASES)
+    :param n_bkps: 찾을 breakpoint 수 (PELT / binseg_auto / online 은 사용하지 않음)
+    :return: ruptures 형식 breakpoint 목록 (마지막 값 = n_samples)
+    """
+    return resolve_detector(detector).func(features, n_bkps, **params)
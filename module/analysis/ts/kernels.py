@@ -0,0 +1,145 @@
+"""
+risk 계산용 벡터화 커널
+
+- ema            : EMA 를 IIR 필터(scipy.signal.lfilter)로 계산. 1-D 또는 (종목, 시점) 2-D
+- segment_std    : breakpoint 로 나눈 구간별 표준편차 (np.add.reduceat 으로 구간 평균 → 편차 제곱합)
+- segment_volatility : 구간별 sqrt(sum_d std_d^2) 를 시점마다 펼친 raw risk
+- minmax_scale   : 행(종목)별 MinMax 스케일링. 길이가 다른 종목은 뒤쪽을 NaN 으로 채운 2-D 배열 사용
+- quantile_scale : 하위/상위 분위수로 자른 뒤 MinMax (극단값 하나에 전체 스케일이 끌려가지 않음)
+- rank_scale     : 행별 순위 백분율 (0~1)
+- risk_percent   : 스케일링(기본 MinMax) → EMA → 1e-5 미만 clip → 0~100 (calculate_risk_scores 6~9 단계)
+
+2-D 입력은 행마다 독립적으로 처리되며 NaN 패딩은 결과에서도 NaN 으로 유지된다.
+"""
+import numpy as np
+from scipy.signal import lfilter
+from typing import Callable, Dict, Sequence
+
+
+def ema(values: np.ndarray, alpha: float) -> np.ndarray:
+    """
+    y[0] = x[0], y[i] = alpha * x[i] + (1 - alpha) * y[i-1]
+    :param values: 1-D 또는 2-D (행별로 마지막 축 방향 EMA)
+    """
+    x = np.asarray(values, dtype=np.float64)
+    if x.shape[-1] == 0:
+        return x.copy()
+    b, a = [alpha], [1.0, -(1.0 - alpha)]
+    # 초기 상태를 (1 - alpha) * x[0] 로 두면 y[0] = x[0]
+    zi = (1.0 - alpha) * x[..., :1]
+    y, _ = lfilter(b, a, x, axis=-1, zi=zi)
+    return y
+
+
+def segment_bounds(bkps: Sequence[int], n: int) -> np.ndarray:
+    """ruptures breakpoint 목록 → 구간 경계 [0, b1, ..., n] (빈 구간 제거)"""
+    bounds = np.unique(np.clip(np.concatenate([[0], np.asarray(bkps, dtype=np.int64), [n]]), 0, n))
+    return bounds
+
+
+def segment_std(features: np.ndarray, bkps: Sequence[int]) -> np.ndarray:
+    """
+    구간별, 차원별 모표준편차 (np.std 와 동일, ddof=0)
+    :param features: (n, d)
+    :return: (n_segments, d)
+    """
+    x = np.asarray(features, dtype=np.float64)
+    x = x.reshape(-1, 1) if x.ndim == 1 else x
+    n = len(x)
+    bounds = segment_bounds(bkps, n)
+    starts, ends = bounds[:-1], bounds[1:]
+    lengths = (ends - starts)[:, None]
+    if len(starts) == 0:
+        return np.zeros((0, x.shape[1]))
+
+    # 구간 평균을 먼저 구한 뒤 그 평균과의 편차 제곱합을 구간별로 더한다 (np.std 와 같은 two-pass).
+    # 전역 누적합의 E[x^2] - mean^2 는 거래량 0 인 날의 vol_change(~1e14) 같은 극단값 하나로 자릿수가 모두 날아간다
+    seg_mean = np.add.reduceat(x, starts, axis=0) / lengths
+    deviation = x - np.repeat(seg_mean, lengths[:, 0], axis=0)
+    seg_var = np.add.reduceat(deviation ** 2, starts, axis=0) / lengths
+    return np.sqrt(seg_var)
+
+
+def segment_volatility(features: np.ndarray, bkps: Sequence[int]) -> np.ndarray:
+    """
+    시점별 raw risk: 해당 시점이 속한 구간의 sqrt(sum_d std_d^2)
+    :return: (n,)
+    """
+    n = len(features)
+    bounds = segment_bounds(bkps, n)
+    volatility = np.sqrt((segment_std(features, bkps) ** 2).sum(axis=1))
+    return np.repeat(volatility, np.diff(bounds))
+
+
+def minmax_scale(values: np.ndarray, constant_fill: float = 0.5, eps: float = 1e-9) -> np.ndarray:
+    """
+    마지막 축 기준 MinMax(0~1). 범위가 eps 미만이면 constant_fill 로 채운다.
+    NaN 은 무시하고 NaN 으로 유지한다.
+    """
+    x = np.asarray(values, dtype=np.float64)
+    if x.shape[-1] == 0:
+        return x.copy()
+    with np.errstate(all="ignore"):
+        lo = np.nanmin(x, axis=-1, keepdims=True)
+        hi = np.nanmax(x, axis=-1, keepdims=True)
+        span = hi - lo
+        flat = ~(span >= eps)
+        scaled = (x - lo) / np.where(flat, 1.0, span)
+    return np.where(flat & ~np.isnan(x), constant_fill, scaled)
+
+
+def quantile_scale(values: np.ndarray, lower: float = 0.05, upper: float = 0.95) -> np.ndarray:
+    """마지막 축 기준 [lower, upper] 분위수로 clip 한 뒤 MinMax(0~1). NaN 은 유지"""
+    x = np.asarray(values, dtype=np.float64)
+    if x.shape[-1] == 0:
+        return x.copy()
+    with np.errstate(all="ignore"):
+        lo = np.nanquantile(x, lower, axis=-1, keepdims=True)
+        hi = np.nanquantile(x, upper, axis=-1, keepdims=True)
+    return minmax_scale(np.clip(x, lo, hi))
+
+
+def rank_scale(values: np.ndarray) -> np.ndarray:
+    """마지막 축 기준 평균 순위 백분율 (동점은 평균 순위, 길이 1 이면 0.5). NaN 은 유지"""
+    x = np.asarray(values, dtype=np.float64)
+    if x.shape[-1] == 0:
+        return x.copy()
+    flat = x.reshape(-1, x.shape[-1])
+    out = np.full(flat.shape, np.nan)
+    for i, row in enumerate(flat):
+        valid = ~np.isnan(row)
+        n = int(valid.sum())
+        if n == 0:
+            continue
+        if n == 1:
+            out[i, valid] = 0.5
+            continue
+        # 구간 단위 raw risk 는 동점이 많으므로 평균 순위를 사용한다
+        sorted_values, inverse, counts = np.unique(row[valid], return_inverse=True, return_counts=True)
+        first = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        average_rank = first + (counts - 1) / 2.0
+        out[i, valid] = average_rank[inverse] / (n - 1)
+    return out.reshape(x.shape)
+
+
+SCALERS: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    "minmax": minmax_scale,
+    "quantile": quantile_scale,
+    "rank": rank_scale,
+}
+
+
+def risk_percent(
+        risk_raw: np.ndarray,
+        smoothing_alpha: float = 0.3,
+        clip: float = 1e-5,
+        scaling: str = "minmax",
+) -> np.ndarray:
+    """
+    raw risk → 스케일링(SCALERS) → EMA → clip 미만 0 → 0~100
+    :param risk_raw: 1-D 또는 (종목, 시점) 2-D. 2-D 는 뒤쪽 NaN 패딩 허용
+    """
+    if scaling not in SCALERS:
+        raise ValueError(f"Unknown scaling '{scaling}'. Available: {sorted(SCALERS)}")
+    smoothed = ema(SCALERS[scaling](risk_raw), smoothing_alpha)
+    return np.where(smoothed < clip, 0.0, smoothed) * 100.0
@@ -0,0 +1,313 @@
+"""
+새로 추가된 bar 만으로 risk value 를 갱신하는 온라인 change point 탐지
+
+Bayesian Online Change Point Detection (Adams & MacKay, 2007)
+- 특징값 (returns, vol_changes) 의 각 차원을 독립적인 Normal-Gamma 모델로 가정
+- run length 분포는 max_run_length 로 잘라 bar 하나당 비용이 O(max_run_length)로 고정
+- 상태(run length 분포, 충분통계량, 스케일링/EMA 상태, 마지막 bar)는 종목별 JSON 으로 저장
+- k 개의 새 bar 갱신 비용은 O(k)이며 결과는 calculate_risk_scores 와 같은
+  (symbol, date, risk_value) 형식
+"""
+import os
+import json
+import numpy as np
+import pandas as pd
+from scipy.special import gammaln, logsumexp
+from typing import Any, Dict, Optional
+from module.logger import get_logger
+
+logger = get_logger(__name__)
+
+ONLINE_MODEL_NAME = "BOCPD"
+STATE_VERSION = 1
+
+
+class OnlineChangePointDetector:
+    def __init__(
+            self,
+            hazard: float = 1 / 250,
+            max_run_length: int = 500,
+            smoothing_alpha: float = 0.3,
+            kappa0: float = 1.0,
+            alpha0: float = 1.0,
+            beta0: float = 1.0,
+            n_features: int = 2,
+    ):
+        """
+        :param hazard: bar 마다 change point 가 발생할 사전 확률 (1/평균 구간 길이)
+        :param max_run_length: 유지할 최대 run length (메모리/시간 상한)
+        :param smoothing_alpha: risk EMA 계수
+        :param kappa0, alpha0, beta0: Normal-Gamma 사전분포 (표준화된 특징값 기준)
+        """
+        self.hazard = hazard
+        self.max_run_length = max_run_length
+        self.smoothing_alpha = smoothing_alpha
+        self.kappa0 = kappa0
+        self.alpha0 = alpha0
+        self.beta0 = beta0
+        self.n_features = n_features
+        self.reset()
+
+    def reset(self):
+        d = self.n_features
+        # run length 분포 (log 확률) 및 run length 별 충분통계량 (행: run length, 열: 특징 차원)
+        self.log_r = np.zeros(1)
+        self.mu = np.zeros((1, d))
+        self.kappa = np.full((1, d), self.kappa0)
+        self.alpha = np.full((1, d), self.alpha0)
+        self.beta = np.full((1, d), self.beta0)
+        # 특징값 표준화를 위한 running mean / M2 (Welford)
+        self.n_seen = 0
+        self.feat_mean = np.zeros(d)
+        self.feat_m2 = np.zeros(d)
+        # 직전 bar (변동률 계산용)
+        self.last_close: Optional[float] = None
+        self.last_volume: Optional[float] = None
+        self.last_date: Optional[str] = None
+        # risk 스케일링 / 스무딩 상태
+        self.risk_min: Optional[float] = None
+        self.risk_max: Optional[float] = None
+        self.risk_ema: Optional[float] = None
+
+    # ------------------------------------------------------------------
+    def _feature_std(self) -> np.ndarray:
+        if self.n_seen < 2:
+            return np.ones(self.n_features)
+        std = np.sqrt(self.feat_m2 / (self.n_seen - 1))
+        std[std < 1e-12] = 1.0
+        return std
+
+    def _observe_feature(self, x: np.ndarray):
+        self.n_seen += 1
+        delta = x - self.feat_mean
+        self.feat_mean += delta / self.n_seen
+        self.feat_m2 += delta * (x - self.feat_mean)
+
+    def _predictive_logpdf(self, z: np.ndarray) -> np.ndarray:
+        """run length 별 Student-t 예측분포 log pdf (차원 합)"""
+        df = 2 * self.alpha
+        scale2 = self.beta * (self.kappa + 1) / (self.alpha * self.kappa)
+        t = (z - self.mu) ** 2 / (df * scale2)
+        logpdf = (
+                gammaln((df + 1) / 2) - gammaln(df / 2)
+                - 0.5 * np.log(np.pi * df * scale2)
+                - (df + 1) / 2 * np.log1p(t)
+        )
+        return logpdf.sum(axis=1)
+
+    def _step(self, x: np.ndarray) -> float:
+        """특징값 하나로 상태를 갱신하고 raw risk (기대 구간 변동성)를 반환"""
+        std = self._feature_std()
+        z = (x - self.feat_mean) / std
+
+        pred = self._predictive_logpdf(z)
+        log_growth = self.log_r + pred + np.log1p(-self.hazard)
+        log_cp = logsumexp(self.log_r + pred + np.log(self.hazard))
+        log_r = np.concatenate([[log_cp], log_growth])
+
+        # 충분통계량 갱신 (run length + 1), run length 0 은 사전분포
+        mu = (self.kappa * self.mu + z) / (self.kappa + 1)
+        beta = self.beta + self.kappa * (z - self.mu) ** 2 / (2 * (self.kappa + 1))
+        kappa = self.kappa + 1
+        alpha = self.alpha + 0.5
+        d = self.n_features
+        self.mu = np.vstack([np.zeros((1, d)), mu])
+        self.kappa = np.vstack([np.full((1, d), self.kappa0), kappa])
+        self.alpha = np.vstack([np.full((1, d), self.alpha0), alpha])
+        self.beta = np.vstack([np.full((1, d), self.beta0), beta])
+
+        # run length 상한: 넘친 확률은 버리지 않고 가장 긴 run length 에 합친다
+        # (버리면 긴 구간에서 MAP run length 가 가짜로 떨어진다)
+        if len(log_r) > self.max_run_length:
+            tail = logsumexp(log_r[self.max_run_length - 1:])
+            log_r = log_r[: self.max_run_length]
+            log_r[-1] = tail
+            self.mu = self.mu[: self.max_run_length]
+            self.kappa = self.kappa[: self.max_run_length]
+            self.alpha = self.alpha[: self.max_run_length]
+            self.beta = self.beta[: self.max_run_length]
+        self.log_r = log_r - logsumexp(log_r)
+
+        self._observe_feature(x)
+
+        # run length 별 구간 분산 추정치(beta/alpha)를 원래 단위로 되돌려 기대 변동성 계산
+        seg_var = self.beta / self.alpha * std ** 2
+        seg_volatility = np.sqrt(seg_var.sum(axis=1))
+        return float(np.exp(self.log_r) @ seg_volatility)
+
+    def _scale(self, raw: float) -> float:
+        """누적 min/max 스케일링 → EMA → 작은 값 clip → 0~100"""
+        self.risk_min = raw if self.risk_min is None else min(self.risk_min, raw)
+        self.risk_max = raw if self.risk_max is None else max(self.risk_max, raw)
+        if (self.risk_max - self.risk_min) < 1e-9:
+            scaled = 0.5
+        else:
+            scaled = (raw - self.risk_min) / (self.risk_max - self.risk_min)
+
+        if self.risk_ema is None:
+            self.risk_ema = scaled
+        else:
+            self.risk_ema = self.smoothing_alpha * scaled + (1 - self.smoothing_alpha) * self.risk_ema
+        return 0.0 if self.risk_ema < 1e-5 else self.risk_ema * 100.0
+
+    # ------------------------------------------------------------------
+    def update(self, df: pd.DataFrame, symbol: str) -> pd.DataFrame:
+        """
+        새 bar 들로 상태를 갱신한다. 이미 처리한 날짜(last_date 이하)의 행은 무시한다.
+        :param df: ["date", "close", "volume"] 컬럼 (날짜 오름차순)
+        :return: (symbol, date, risk_value) DataFrame
+        """
+        if "close" not in df.columns or "volume" not in df.columns:
+            raise ValueError("Input DataFrame must contain 'close' and 'volume' columns.")
+
+        dates = pd.to_datetime(df["date"], utc=True)
+        if self.last_date is not None:
+            mask = dates > pd.Timestamp(self.last_date)
+            df, dates = df[mask.values], dates[mask.values]
+
+        closes = df["close"].to_numpy(dtype=np.float64)
+        volumes = df["volume"].to_numpy(dtype=np.float64)
+
+        out_dates, out_risk = [], []
+        for date, close, volume in zip(dates, closes, volumes):
+            if self.last_close is not None:
+                x = np.array([
+                    (close - self.last_close) / (self.last_close + 1e-9),
+                    (volume - self.last_volume) / (self.last_volume + 1e-9),
+                ])
+                out_dates.append(date)
+                out_risk.append(self._scale(self._step(x)))
+            self.last_close, self.last_volume = float(close), float(volume)
+            self.last_date = date.isoformat()
+
+        return pd.DataFrame({"symbol": symbol, "date": out_dates, "risk_value": out_risk},
+                            columns=["symbol", "date", "risk_value"])
+
+    def feature_run_lengths(self, features: np.ndarray) -> np.ndarray:
+        """
+        (n, n_features) 특징값을 순서대로 넣고 시점별 MAP run length 를 반환한다.
+        가격이 아닌 특징값을 직접 받으므로 batch change point detector 로도 쓸 수 있다.
+        """
+        run_lengths = np.empty(len(features), dtype=np.int64)
+        for i, x in enumerate(np.asarray(features, dtype=np.float64)):
+            self._step(x)
+            run_lengths[i] = self.map_run_length
+        return run_lengths
+
+    @property
+    def map_run_length(self) -> int:
+        """현재 가장 가능성이 높은 run length (마지막 change point 이후 bar 수)"""
+        return int(np.argmax(self.log_r))
+
+    # ------------------------------------------------------------------
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": STATE_VERSION,
+            "params": {
+                "hazard": self.hazard,
+                "max_run_length": self.max_run_length,
+                "smoothing_alpha": self.smoothing_alpha,
+                "kappa0": self.kappa0,
+                "alpha0": self.alpha0,
+                "beta0": self.beta0,
+                "n_features": self.n_features,
+            },
+            "log_r": self.log_r.tolist(),
+            "mu": self.mu.tolist(),
+            "kappa": self.kappa.tolist(),
+            "alpha": self.alpha.tolist(),
+            "beta": self.beta.tolist(),
+            "n_seen": self.n_seen,
+            "feat_mean": self.feat_mean.tolist(),
+            "feat_m2": self.feat_m2.tolist(),
+            "last_close": self.last_close,
+            "last_volume": self.last_volume,
+            "last_date": self.last_date,
+            "risk_min": self.risk_min,
+            "risk_max": self.risk_max,
+            "risk_ema": self.risk_ema,
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> "OnlineChangePointDetector":
+        if state.get("version") != STATE_VERSION:
+            raise ValueError(f"Unsupported online detector state version: {state.get('version')}")
+        detector = cls(**state["params"])
+        detector.log_r = np.asarray(state["log_r"], dtype=np.float64)
+        for key in ("mu", "kappa", "alpha", "beta"):
+            setattr(detector, key, np.asarray(state[key], dtype=np.float64).reshape(-1, detector.n_features))
+        detector.n_seen = state["n_seen"]
+        detector.feat_mean = np.asarray(state["feat_mean"], dtype=np.float64)
+        detector.feat_m2 = np.asarray(state["feat_m2"], dtype=np.float64)
+        for key in ("last_close", "last_volume", "last_date", "risk_min", "risk_max", "risk_ema"):
+            setattr(detector, key, state[key])
+        return detector
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, **params) -> "OnlineChangePointDetector":
+        """저장된 상태가 없으면 params 로 새 detector 를 만든다."""
+        if not os.path.exists(path):
+            return cls(**params)
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+class OnlineRiskRefresher:
+    """
+    ProviderDataPipeline(on_new_data=...) 에 넘겨 fetch_data 직후 risk 를 갱신하는 callback.
+
+    - 상태: {risk_dir}/online_state.json
+    - 결과: {risk_dir}/online_risk_values.csv 에 append
+    - 상태 파일이 없고 history_path 가 주어지면 저장된 전체 히스토리로 한 번 초기화한다
+    """
+
+    STATE_FILE = "online_state.json"
+    RESULT_FILE = "online_risk_values.csv"
+
+    def __init__(self, symbol: str, risk_dir: str, history_path: Optional[str] = None, **detector_params):
+        self.symbol = symbol
+        self.risk_dir = risk_dir
+        self.history_path = history_path
+        self.detector_params = detector_params
+
+    @property
+    def state_path(self) -> str:
+        return os.path.join(self.risk_dir, self.STATE_FILE)
+
+    @property
+    def result_path(self) -> str:
+        return os.path.join(self.risk_dir, self.RESULT_FILE)
+
+    def _bootstrap_until(self, detector: OnlineChangePointDetector, end: pd.Timestamp):
+        from module.analysis.ts.risk_job import load_symbol_history
+
+        history = load_symbol_history(self.history_path)
+        if len(history) > 0 and {"close", "volume"}.issubset(history.columns):
+            history = history[pd.to_datetime(history["date"], utc=True) < end]
+            detector.update(history, self.symbol)
+            logger.info(f"[{self.symbol}] Online state bootstrapped from {len(history)} stored rows")
+
+    def __call__(self, new_data: pd.DataFrame) -> pd.DataFrame:
+        df = new_data.reset_index() if "date" not in new_data.columns else new_data
+        df = df.sort_values("date")
+        detector = OnlineChangePointDetector.load(self.state_path, **self.detector_params)
+        if detector.last_date is None and self.history_path is not None:
+            # 새 데이터는 이미 저장되었으므로 그 직전까지의 히스토리로 초기화
+            self._bootstrap_until(detector, pd.to_datetime(df["date"], utc=True).min())
+        risk_df = detector.update(df, self.symbol)
+        detector.save(self.state_path)
+
+        if not risk_df.empty:
+            out = risk_df.drop(columns=["symbol"])
+            out["model_name"] = ONLINE_MODEL_NAME
+            out["date"] = pd.to_datetime(out["date"]).dt.strftime("%Y-%m-%d")
+            out.to_csv(self.result_path, mode="a", index=False, header=not os.path.exists(self.result_path))
+            logger.info(f"[{self.symbol}] Online risk updated with {len(risk_df)} new bars")
+        return risk_df
@@ -0,0 +1,168 @@
+"""
+penalty 기반 breakpoint 개수 자동 선택
+
+n_bkps 를 고정하면 10년 시계열과 한 달 구간이 같은 개수로 나뉜다.
+여기서는 Binseg 를 한 번만 fit 하고 greedy 분할 순서와 각 분할의 gain 을 기록해 둔다 (BreakpointPath).
+
+- ruptures Binseg.predict(pen) 은 "다음 분할의 gain 이 pen 이하가 되면 중단" 이므로
+  기록된 gain 만으로 임의 penalty 의 결과를 다시 fit 하지 않고 그대로 재현할 수 있다.
+- 구간 비용은 누적합 비용(CostL2Cumsum / CostNormalCumsum)과 Binseg.single_bkp 캐시를 공유하므로
+  penalty 20개를 평가해도 비용은 fit 한 번(max_bkps 까지의 분할)과 거의 같다.
+
+선택 방법
+- bic   : default_penalty (구간당 파라미터 수 * log n)
+- elbow : penalty path 위의 (breakpoint 수, 총 비용) 곡선에서 양 끝을 잇는 직선과 가장 먼 점
+"""
+import numpy as np
+import ruptures as rpt
+from typing import List, NamedTuple, Optional, Sequence
+from module.analysis.ts.detectors import CostL2Cumsum, CostNormalCumsum, default_penalty, standardize
+from module.logger import get_logger
+
+logger = get_logger(__name__)
+
+SELECTION_METHODS = ("bic", "elbow")
+PATH_COSTS = {"l2": CostL2Cumsum, "normal": CostNormalCumsum}
+
+
+class PenaltySelection(NamedTuple):
+    bkps: List[int]  # ruptures 형식 (마지막 값 = n_samples)
+    n_bkps: int
+    penalty: float
+    method: str
+    penalties: List[float]  # 평가한 penalty path (bic 는 선택된 값 하나)
+    path_n_bkps: List[int]  # penalty 별 breakpoint 수
+
+
+class BreakpointPath:
+    """
+    fit 된 Binseg 의 greedy 분할 경로.
+    order[k] 는 k+1 번째로 추가된 breakpoint, gains[k] 는 그 분할로 줄어든 비용.
+    """
+
+    def __init__(self, algo: rpt.Binseg, max_bkps: int):
+        self.n_samples = algo.n_samples
+        self.total_cost = algo.cost.error(0, self.n_samples)
+        self.order: List[int] = []
+        self.gains: List[float] = []
+
+        bkps = [self.n_samples]
+        for _ in range(max_bkps):
+            # single_bkp 는 (start, end) 별로 캐시되므로 새로 생긴 두 구간만 계산된다
+            candidates = [algo.single_bkp(start, end) for start, end in zip([0] + bkps[:-1], bkps)]
+            bkp, gain = max(candidates, key=lambda x: x[1])
+            if bkp is None:
+                break
+            self.order.append(int(bkp))
+            self.gains.append(float(gain))
+            bkps = sorted(bkps + [bkp])
+
+    def __len__(self):
+        return len(self.order)
+
+    def bkps(self, n_bkps: int) -> List[int]:
+        return sorted(self.order[:n_bkps]) + [self.n_samples]
+
+    def cost(self, n_bkps: int) -> float:
+        return self.total_cost - float(np.sum(self.gains[:n_bkps]))
+
+    def n_bkps_for_penalty(self, pen: float) -> int:
+        """Binseg.predict(pen=pen) 와 같은 규칙: gain 이 pen 이하인 첫 분할에서 중단"""
+        for k, gain in enumerate(self.gains):
+            if gain <= pen:
+                return k
+        return len(self.gains)
+
+    def penalty_grid(self, n_penalties: int = 20) -> np.ndarray:
+        """
+        기록된 gain 범위를 로그 간격으로 덮는 penalty 목록.
+        가장 작은 gain 보다 작은 penalty 는 max_bkps 를 넘는 분할이 필요하므로 포함하지 않는다.
+        """
+        positive = [g for g in self.gains if g > 0]
+        if not positive:
+            return np.array([1.0])
+        low, high = min(positive), max(positive)
+        return np.geomspace(low, high * 1.5, n_penalties)
+
+
+def default_max_bkps(n_samples: int, min_size: int) -> int:
+    """길이에 비례하는 탐색 상한 (50 bar 당 하나, 최대 50개)"""
+    return int(max(1, min(50, n_samples // 50, n_samples // (2 * min_size) - 1)))
+
+
+def fit_path(
+        features: np.ndarray,
+        cost: str = "normal",
+        max_bkps: Optional[int] = None,
+        jump: int = 5,
+        min_size: int = 2,
+) -> BreakpointPath:
+    """표준화한 특징값에 Binseg 를 한 번 fit 해서 max_bkps 까지의 분할 경로를 만든다."""
+    if cost not in PATH_COSTS:
+        raise ValueError(f"Unknown cost '{cost}'. Available: {sorted(PATH_COSTS)}")
+    algo = rpt.Binseg(custom_cost=PATH_COSTS[cost](), min_size=min_size, jump=jump).fit(standardize(features))
+    if max_bkps is None:
+        max_bkps = default_max_bkps(len(features), algo.min_size)
+    return BreakpointPath(algo, max_bkps)
+
+
+def elbow_index(n_bkps: Sequence[int], costs: Sequence[float]) -> int:
+    """
+    (n_bkps, cost) 점들 중 첫 점과 마지막 점을 잇는 직선에서 가장 멀리 떨어진 점의 index.
+    두 축을 0~1 로 정규화한 뒤 거리를 잰다. 점이 3개 미만이면 -1
+    """
+    if len(n_bkps) < 3:
+        return -1
+    x = np.asarray(n_bkps, dtype=np.float64)
+    y = np.asarray(costs, dtype=np.float64)
+    x = (x - x[0]) / (x[-1] - x[0]) if x[-1] != x[0] else np.zeros_like(x)
+    y = (y - y[-1]) / (y[0] - y[-1]) if y[0] != y[-1] else np.zeros_like(y)
+    # 직선 (0, 1) → (1, 0) 아래쪽으로 떨어진 거리 (비용은 n_bkps 에 따라 감소)
+    distance = (1.0 - x - y) / np.sqrt(2.0)
+    return int(np.argmax(distance))
+
+
+def select_breakpoints(
+        features: np.ndarray,
+        method: str = "bic",
+        cost: str = "normal",
+        max_bkps: Optional[int] = None,
+        n_penalties: int = 20,
+        jump: int = 5,
+        path: Optional[BreakpointPath] = None,
+) -> PenaltySelection:
+    """
+    :param features: (n_samples, n_features) 특징 행렬
+    :param method: "bic" 또는 "elbow"
+    :param cost: "normal" (평균/공분산 변화) 또는 "l2" (평균 변화)
+    :param max_bkps: 탐색할 최대 breakpoint 수 (기본 default_max_bkps)
+    :param n_penalties: elbow 에서 평가할 penalty 개수
+    :param path: 이미 fit 한 BreakpointPath (같은 특징값에 여러 방법을 적용할 때 재사용)
+    :return: PenaltySelection (선택된 breakpoint 와 penalty path)
+    """
+    if method not in SELECTION_METHODS:
+        raise ValueError(f"Unknown selection method '{method}'. Available: {list(SELECTION_METHODS)}")
+    if path is None:
+        path = fit_path(features, cost, max_bkps, jump)
+
+    bic_penalty = default_penalty(features, cost)
+    if method == "bic":
+        k = path.n_bkps_for_penalty(bic_penalty)
+        return PenaltySelection(path.bkps(k), k, bic_penalty, method, [bic_penalty], [k])
+
+    penalties = path.penalty_grid(n_penalties)
+    path_n_bkps = [path.n_bkps_for_penalty(pen) for pen in penalties]
+
+    # penalty 가 커질수록 breakpoint 수가 줄어든다. 서로 다른 개수마다 가장 작은 penalty 를 대표로 사용
+    candidates = {}
+    for pen, k in zip(penalties, path_n_bkps):
+        candidates.setdefault(k, float(pen))
+    ks = sorted(candidates)
+    best = elbow_index(ks, [path.cost(k) for k in ks])
+    if best < 0:
+        # 곡선이 너무 짧으면 elbow 를 정할 수 없으므로 BIC 로 대체
+        logger.debug(f"Penalty path has {len(ks)} distinct points; falling back to BIC")
+        k, penalty = path.n_bkps_for_penalty(bic_penalty), bic_penalty
+    else:
+        k, penalty = ks[best], candidates[ks[best]]
+    return PenaltySelection(path.bkps(k), k, penalty, method, [float(p) for p in penalties], path_n_bkps)
@@ -0,0 +1,313 @@
+"""
+종목 간 비교 가능한 risk 백분위 (streaming quantile sketch)
+
+risk value 는 종목마다 MinMax 스케일링되므로 삼성전자 80% 와 금호타이어 80% 는 같은 의미가 아니다.
+여기서는 날짜별로 시장 전체 / 섹터(config 의 sector) 단위 risk 분포를 KLL sketch 로 유지하고
+각 종목의 risk 를 그 분포 안의 백분위로 바꾼다.
+
+- KLLSketch : Karnin-Lang-Liberty sketch. 메모리 O(k log(n/k)), rank 오차 O(1/k)
+              n <= k 이면 값을 모두 보관하므로 정확하다. 서로 merge 할 수 있다.
+- RiskSketches : (scope, group, date) → KLLSketch. 종목을 나눠 가진 worker 들이 각자 만든 뒤 merge
+- risk_percentiles : 종목 shard 별 sketch 생성(process pool) → merge → 행마다 universe / sector 백분위.
+                     저장해 둔 sketch 를 주면 새로 생긴 행만 더하고, 값이 바뀌거나 사라진 행이 있는 날짜의
+                     sketch 만 그 날짜 행으로 다시 만든다 (KLL sketch 는 값을 뺄 수 없으므로)
+"""
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from module.logger import get_logger
+
+logger = get_logger(__name__)
+
+SKETCH_FILE = "risk_sketches.json"
+PERCENTILE_FILE = "risk_percentiles.csv"
+UNKNOWN_SECTOR = "Unknown"
+MARKET_SCOPE = "market"
+SECTOR_SCOPE = "sector"
+
+
+class KLLSketch:
+    def __init__(self, k: int = 200, c: float = 2 / 3, seed: int = 0):
+        """
+        :param k: 최상위 level 의 용량 (클수록 정확, 메모리 증가)
+        :param c: 한 level 내려갈 때 용량 감소 비율
+        """
+        self.k = k
+        self.c = c
+        self.n = 0
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def retained(self) -> int:
+        return sum(len(level) for level in self.levels)
+
+    def _capacity(self, h: int) -> int:
+        depth = len(self.levels) - h - 1
+        return max(2, int(np.ceil(self.k * self.c ** depth)))
+
+    def update(self, values) -> "KLLSketch":
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if len(values):
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self.n += len(values)
+            self._compress()
+        return self
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, level in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], level])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def _compress(self):
+        """용량을 넘은 가장 낮은 level 을 정렬 후 하나 건너 하나씩 위 level 로 올린다 (weight 2배)."""
+        while True:
+            over = [h for h in range(len(self.levels)) if len(self.levels[h]) > self._capacity(h)]
+            if not over:
+                return
+            h = over[0]
+            if h + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            items = np.sort(self.levels[h])
+            # 홀수 개면 하나는 현재 level 에 남긴다
+            keep = items[-1:] if len(items) % 2 else items[:0]
+            items = items[: len(items) - len(keep)]
+            offset = int(self._rng.integers(2))
+            self.levels[h + 1] = np.concatenate([self.levels[h + 1], items[offset::2]])
+            self.levels[h] = keep
+
+    def rank(self, values) -> np.ndarray:
+        """
+        값마다 분포 내 mid-rank 비율 (값보다 작은 비율 + 같은 비율의 절반), 0~1
+        """
+        values = np.asarray(values, dtype=np.float64)
+        below = np.zeros(values.shape)
+        total = 0.0
+        for h, level in enumerate(self.levels):
+            if not len(level):
+                continue
+            weight = float(2 ** h)
+            ordered = np.sort(level)
+            left = np.searchsorted(ordered, values, side="left")
+            right = np.searchsorted(ordered, values, side="right")
+            below += weight * (left + 0.5 * (right - left))
+            total += weight * len(level)
+        if total == 0:
+            return np.full(values.shape, np.nan)
+        return below / total
+
+    def quantile(self, q: float) -> float:
+        if self.retained == 0:
+            return float("nan")
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        cumulative = np.cumsum(weights[order])
+        index = int(np.searchsorted(cumulative, q * cumulative[-1], side="left"))
+        return float(items[order][min(index, len(items) - 1)])
+
+    def to_dict(self) -> dict:
+        return {"k": self.k, "c": self.c, "n": self.n, "levels": [level.tolist() for level in self.levels]}
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "KLLSketch":
+        sketch = cls(state["k"], state["c"])
+        sketch.n = state["n"]
+        sketch.levels = [np.asarray(level, dtype=np.float64) for level in state["levels"]]
+        return sketch
+
+
+class RiskSketches:
+    """
+    (scope, group, date) 별 KLLSketch 모음.
+    scope 는 "market"(group = 시장 이름) 또는 "sector"(group = 섹터 이름), date 는 YYYY-MM-DD.
+    model_name / sectors_hash 는 저장한 sketch 를 다음 실행에서 이어 쓸 수 있는지 확인하는 데 쓴다.
+    """
+
+    def __init__(self, market: str, k: int = 200, model_name: Optional[str] = None,
+                 sectors_hash: Optional[str] = None):
+        self.market = market
+        self.k = k
+        self.model_name = model_name
+        self.sectors_hash = sectors_hash
+        self.sketches: Dict[Tuple[str, str, str], KLLSketch] = {}
+
+    def _sketch(self, key: Tuple[str, str, str]) -> KLLSketch:
+        sketch = self.sketches.get(key)
+        if sketch is None:
+            sketch = self.sketches[key] = KLLSketch(self.k)
+        return sketch
+
+    def update(self, df: pd.DataFrame) -> "RiskSketches":
+        """
+        :param df: date(YYYY-MM-DD), sector, risk_value 컬럼을 가진 행들
+        """
+        for date, values in df.groupby("date", sort=False)["risk_value"]:
+            self._sketch((MARKET_SCOPE, self.market, date)).update(values.to_numpy())
+        for (sector, date), values in df.groupby(["sector", "date"], sort=False)["risk_value"]:
+            self._sketch((SECTOR_SCOPE, sector, date)).update(values.to_numpy())
+        return self
+
+    def discard_dates(self, dates) -> int:
+        """해당 날짜의 sketch 를 모두 지운다 (다시 만들 때). 지운 개수를 반환"""
+        dates = set(dates)
+        keys = [key for key in self.sketches if key[2] in dates]
+        for key in keys:
+            del self.sketches[key]
+        return len(keys)
+
+    def merge(self, other: "RiskSketches") -> "RiskSketches":
+        for key, sketch in other.sketches.items():
+            if key in self.sketches:
+                self.sketches[key].merge(sketch)
+            else:
+                self.sketches[key] = sketch
+        return self
+
+    def percentiles(self, df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """df 행마다 (universe 백분위, sector 백분위) 0~100"""
+        universe_pct = np.full(len(df), np.nan)
+        sector_pct = np.full(len(df), np.nan)
+        for date, index in df.groupby("date", sort=False).indices.items():
+            sketch = self.sketches.get((MARKET_SCOPE, self.market, date))
+            if sketch is not None:
+                universe_pct[index] = sketch.rank(df["risk_value"].to_numpy()[index]) * 100.0
+        for (sector, date), index in df.groupby(["sector", "date"], sort=False).indices.items():
+            sketch = self.sketches.get((SECTOR_SCOPE, sector, date))
+            if sketch is not None:
+                sector_pct[index] = sketch.rank(df["risk_value"].to_numpy()[index]) * 100.0
+        return universe_pct, sector_pct
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "market": self.market,
+                "k": self.k,
+                "model_name": self.model_name,
+                "sectors_hash": self.sectors_hash,
+                "sketches": [[*key, sketch.to_dict()] for key, sketch in self.sketches.items()],
+            }, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "RiskSketches":
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        sketches = cls(state["market"], state["k"], state.get("model_name"), state.get("sectors_hash"))
+        for scope, group, date, sketch in state["sketches"]:
+            sketches.sketches[(scope, group, date)] = KLLSketch.from_dict(sketch)
+        return sketches
+
+
+def _build_shard(args) -> RiskSketches:
+    market, k, shard = args
+    return RiskSketches(market, k).update(shard)
+
+
+def sectors_hash(sectors: Dict[str, str]) -> str:
+    return hashlib.sha1(json.dumps(sorted(sectors.items())).encode("utf-8")).hexdigest()
+
+
+def _with_sectors(df: pd.DataFrame, sectors: Dict[str, str]) -> pd.DataFrame:
+    df = df[["symbol", "date", "risk_value"]].copy()
+    df["sector"] = df["symbol"].map(sectors).fillna(UNKNOWN_SECTOR)
+    return df
+
+
+def _dirty_dates(df: pd.DataFrame, changed: pd.DataFrame, previous: pd.DataFrame) -> set:
+    """
+    sketch 에 들어 있던 값이 바뀌었거나 없어진 날짜.
+    (changed 중 previous 에도 있던 행 = 값이 바뀐 행, previous 중 df 에 없는 행 = 사라진 행)
+    """
+    keys = ["symbol", "date"]
+    if previous.empty:
+        return set()
+    replaced = changed[keys].merge(previous[keys], on=keys, how="inner")
+    removed = previous[keys].merge(df[keys], on=keys, how="left", indicator=True)
+    removed = removed[removed["_merge"] == "left_only"]
+    return set(replaced["date"]) | set(removed["date"])
+
+
+def risk_percentiles(
+        risk_df: pd.DataFrame,
+        sectors: Dict[str, str],
+        market: str,
+        processes: int = 1,
+        k: int = 200,
+        model_name: Optional[str] = None,
+        sketches: Optional[RiskSketches] = None,
+        changed: Optional[pd.DataFrame] = None,
+        previous: Optional[pd.DataFrame] = None,
+) -> Tuple[pd.DataFrame, RiskSketches]:
+    """
+    :param risk_df: symbol, date(YYYY-MM-DD), risk_value 컬럼을 가진 시장 전체 결과
+    :param sectors: symbol → sector (config stocks 의 sector, 없으면 UNKNOWN_SECTOR)
+    :param sketches: 이전 실행에서 저장한 sketch (load_sketches). changed / previous 와 함께 주면
+                     전체 결과로 다시 만들지 않고 바뀐 부분만 갱신한다 (market / k / model_name / sector 가 다르면 무시)
+    :param changed: 이전 실행 이후 새로 생기거나 값이 바뀐 행 (changed_rows 결과)
+    :param previous: 다시 계산한 종목의 이전 행 (sketch 에 들어 있던 값)
+    :return: (symbol, date, sector, risk_value, universe_pct, sector_pct) DataFrame, 갱신된 sketch
+    """
+    df = _with_sectors(risk_df, sectors)
+    signature = sectors_hash(sectors)
+
+    reusable = (
+        sketches is not None and changed is not None and previous is not None
+        and (sketches.market, sketches.k, sketches.model_name, sketches.sectors_hash)
+        == (market, k, model_name, signature)
+    )
+    if reusable:
+        dirty = _dirty_dates(df, changed, previous)
+        discarded = sketches.discard_dates(dirty)
+        changed = _with_sectors(changed, sectors)
+        # 값이 바뀐 날짜는 그 날짜 전체 행으로 다시 만들고, 나머지 날짜는 새 행만 더한다
+        rows = pd.concat([df[df["date"].isin(dirty)], changed[~changed["date"].isin(dirty)]], ignore_index=True)
+        logger.info(
+            f"[{market}] Updating sketches with {len(rows)}/{len(df)} rows "
+            f"({len(dirty)} dates rebuilt, {discarded} sketches discarded)"
+        )
+    else:
+        sketches = RiskSketches(market, k, model_name, signature)
+        rows = df
+
+    # 종목 단위로 shard 를 나눠 worker 마다 sketch 를 만들고 merge
+    symbols = rows["symbol"].unique()
+    n_shards = max(1, min(processes, len(symbols)))
+    shard_of = dict(zip(symbols, np.arange(len(symbols)) % n_shards))
+    shard_ids = rows["symbol"].map(shard_of).to_numpy()
+    tasks = [(market, k, rows[shard_ids == i]) for i in range(n_shards)]
+    if n_shards == 1:
+        partials = [_build_shard(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=n_shards) as executor:
+            partials = list(executor.map(_build_shard, tasks))
+
+    for partial in partials:
+        sketches.merge(partial)
+
+    df["universe_pct"], df["sector_pct"] = sketches.percentiles(df)
+    return df[["symbol", "date", "sector", "risk_value", "universe_pct", "sector_pct"]], sketches
+
+
+def config_sectors(stocks: List[dict]) -> Dict[str, str]:
+    return {str(stock["symbol"]): stock.get("sector") or UNKNOWN_SECTOR for stock in stocks}
+
+
+def load_sketches(risk_dir: str) -> Optional[RiskSketches]:
+    """저장된 sketch (새 risk 값을 전체 결과 없이 백분위로 바꿀 때 사용). 없으면 None"""
+    path = os.path.join(risk_dir, SKETCH_FILE)
+    return RiskSketches.load(path) if os.path.isfile(path) else None
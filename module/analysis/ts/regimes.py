@@ -0,0 +1,323 @@
+"""
+종목별 regime(구간) 상태 저장과 증분 재계산
+
+calculate_risk_scores 는 breakpoint 와 구간별 변동성을 일별 값으로 펼친 뒤 버린다.
+여기서는 종목마다 breakpoint, 구간 통계, detector 요약을 RegimeState 로 저장해 두고,
+다음 실행에서는 마지막(열린) 구간 + 새 데이터만 다시 탐지한다.
+
+- 닫힌 구간: 해당 bar 들의 fingerprint 가 그대로면 breakpoint / 통계를 재사용
+- 열린 구간: 열린 구간 시작부터 끝까지의 특징값만 다시 탐지 (O(최근 구간))
+  n_bkps 로 개수를 정하는 detector 는 일부 구간에 같은 개수를 적용할 수 없으므로
+  BIC penalty 선택(module.analysis.ts.penalty)으로, PELT / binseg_auto / online 은 detector 그대로 탐지한다.
+- 과거 bar 가 바뀌었거나 (데이터 수정) 설정이 바뀌면 전체 히스토리로 다시 fit
+- 일별 risk value 는 저장된 구간 변동성만으로 만든다 (detector 재실행 없음)
+
+저장 위치: data/risk/<country>/regimes.json (종목별 상태), regimes.csv (UI 용 구간 요약)
+"""
+import os
+import json
+import time
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from module.analysis.ts.batch_engine import Universe
+from module.analysis.ts.detectors import detect_change_points, resolve_detector
+from module.analysis.ts.kernels import risk_percent, segment_std
+from module.analysis.ts.penalty import select_breakpoints
+from module.analysis.ts.risk_cache import REGIME_SUMMARY_FILE, fingerprint_arrays
+from module.logger import get_logger
+
+logger = get_logger(__name__)
+
+REGIME_STATE_VERSION = 1
+REGIME_STATE_FILE = "regimes.json"
+REGIME_COLUMNS = [
+    "symbol", "model_name", "segment_no", "start_date", "end_date", "days",
+    "mean_return", "volatility", "risk_level", "is_open",
+]
+
+# 열린 구간 + 새 데이터가 이보다 짧으면 다시 탐지하지 않고 열린 구간을 늘리기만 한다
+MIN_TAIL_FEATURES = 30
+
+
+def _features(close: np.ndarray, volume: np.ndarray) -> np.ndarray:
+    returns = (close[1:] - close[:-1]) / (close[:-1] + 1e-9)
+    vol_changes = (volume[1:] - volume[:-1]) / (volume[:-1] + 1e-9)
+    return np.column_stack((returns, vol_changes))
+
+
+def _date_str(value) -> str:
+    return pd.Timestamp(value).strftime("%Y-%m-%d")
+
+
+def segment_stats(features: np.ndarray, bkps: List[int], dates: np.ndarray, offset: int = 0) -> List[Dict[str, Any]]:
+    """
+    구간별 통계. features 의 index i 는 bar i+1 (dates[offset + i + 1]) 에 해당한다.
+    :param bkps: features 기준 ruptures 형식 breakpoint (마지막 값 = len(features))
+    :param offset: features 가 전체 특징값에서 시작하는 위치
+    """
+    stds = segment_std(features, bkps)
+    stats = []
+    start = 0
+    for end, std in zip(bkps, stds):
+        stats.append({
+            "start": offset + start,
+            "end": offset + end,
+            "start_date": _date_str(dates[offset + start + 1]),
+            "end_date": _date_str(dates[offset + end]),
+            "mean_return": float(features[start:end, 0].mean()),
+            "std": [float(s) for s in std],
+            "volatility": float(np.sqrt((std ** 2).sum())),
+        })
+        start = end
+    return stats
+
+
+class RegimeState:
+    def __init__(self, symbol: str, model_name: str, settings: Dict[str, Any], track_fingerprint: bool = True):
+        """
+        :param settings: risk_settings 결과 (detector, n_bkps, smoothing_alpha, detector_params)
+        :param track_fingerprint: False 면 닫힌 구간 fingerprint 를 계산/검증하지 않는다
+            (과거 bar 가 바뀌지 않는 walk-forward 백테스트용)
+        """
+        self.symbol = symbol
+        self.track_fingerprint = track_fingerprint
+        self.model_name = model_name
+        self.settings = settings
+        self.n_bars = 0
+        self.last_date: Optional[str] = None
+        self.segments: List[Dict[str, Any]] = []
+        # 닫힌 구간이 덮는 bar 들의 fingerprint (과거 데이터가 바뀌었는지 확인)
+        self.closed_fingerprint: Optional[str] = None
+        self.full_fits = 0
+        self.tail_fits = 0
+        self.updated_at: Optional[str] = None
+
+    @property
+    def open_start(self) -> int:
+        """열린(마지막) 구간의 시작 특징값 index"""
+        return self.segments[-1]["start"] if self.segments else 0
+
+    @property
+    def bkps(self) -> List[int]:
+        return [segment["end"] for segment in self.segments]
+
+    def _closed_fingerprint(self, dates, close, volume) -> str:
+        # 특징값 [0, open_start) 는 bar [0, open_start] 로 계산된다
+        bars = self.open_start + 1
+        return fingerprint_arrays(dates[:bars], close[:bars], volume[:bars], {"model_name": self.model_name,
+                                                                              **self.settings})
+
+    def _tail_bkps(self, tail: np.ndarray) -> Tuple[List[int], str]:
+        spec = resolve_detector(self.settings["detector"])
+        if spec.uses_n_bkps:
+            return select_breakpoints(tail, method="bic").bkps, "bic"
+        return spec.func(tail, self.settings["n_bkps"], **self.settings["detector_params"]), spec.name
+
+    def fit(self, dates: np.ndarray, close: np.ndarray, volume: np.ndarray,
+            features: Optional[np.ndarray] = None) -> "RegimeState":
+        """
+        전체 히스토리로 configured detector 를 실행한다 (batch 결과와 같은 breakpoint).
+        :param features: 미리 계산한 특징값 (길이 len(close) - 1). 없으면 close / volume 으로 계산
+        """
+        features = _features(close, volume) if features is None else features
+        bkps = detect_change_points(
+            features, self.settings["detector"], n_bkps=self.settings["n_bkps"],
+            **self.settings["detector_params"],
+        )
+        self.segments = segment_stats(features, bkps, dates)
+        self.full_fits += 1
+        self._finish(dates, close, volume)
+        return self
+
+    def update(self, dates: np.ndarray, close: np.ndarray, volume: np.ndarray,
+               features: Optional[np.ndarray] = None) -> str:
+        """
+        새 bar 가 붙은 전체 배열로 상태를 갱신한다.
+        :param features: 미리 계산한 전체 특징값 (있으면 열린 구간 부분만 slice 해서 사용)
+        :return: "extended" (탐지 생략) | "tail" (열린 구간만 재탐지) | "full"
+        """
+        if not self.segments or len(close) <= self.open_start + 1 or (
+                self.track_fingerprint and self.closed_fingerprint != self._closed_fingerprint(dates, close, volume)
+        ):
+            self.fit(dates, close, volume, features)
+            return "full"
+
+        # 열린 구간 시작 bar 부터 끝까지만 특징값을 만든다
+        offset = self.open_start
+        tail = _features(close[offset:], volume[offset:]) if features is None else features[offset:]
+        closed = self.segments[:-1]
+        if len(tail) < MIN_TAIL_FEATURES:
+            self.segments = closed + segment_stats(tail, [len(tail)], dates, offset)
+            self._finish(dates, close, volume)
+            return "extended"
+
+        tail_bkps, method = self._tail_bkps(tail)
+        self.segments = closed + segment_stats(tail, tail_bkps, dates, offset)
+        self.tail_fits += 1
+        self._finish(dates, close, volume)
+        logger.debug(f"[{self.symbol}] Re-examined {len(tail)} tail rows with {method}: "
+                     f"{len(tail_bkps) - 1} new breakpoints")
+        return "tail"
+
+    def _finish(self, dates, close, volume):
+        self.n_bars = len(close)
+        self.last_date = _date_str(dates[-1])
+        if self.track_fingerprint:
+            self.closed_fingerprint = self._closed_fingerprint(dates, close, volume)
+        self.updated_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    def risk_values(self, scaling: str = "minmax") -> np.ndarray:
+        """저장된 구간 변동성을 일별로 펼쳐 risk value (0~100) 로 만든다. 길이 = n_bars - 1"""
+        volatility = np.array([segment["volatility"] for segment in self.segments])
+        lengths = np.array([segment["end"] - segment["start"] for segment in self.segments])
+        return risk_percent(np.repeat(volatility, lengths), self.settings["smoothing_alpha"], scaling=scaling)
+
+    def summary(self) -> pd.DataFrame:
+        """UI 용 구간 요약 (REGIME_COLUMNS). risk_level 은 종목 내 구간 변동성의 0~100 MinMax"""
+        volatility = np.array([segment["volatility"] for segment in self.segments])
+        span = volatility.max() - volatility.min() if len(volatility) else 0.0
+        levels = (volatility - volatility.min()) / span * 100.0 if span > 1e-12 else np.full(len(volatility), 50.0)
+        rows = [
+            (self.symbol, self.model_name, i, s["start_date"], s["end_date"], s["end"] - s["start"],
+             s["mean_return"], s["volatility"], float(level), i == len(self.segments) - 1)
+            for i, (s, level) in enumerate(zip(self.segments, levels))
+        ]
+        return pd.DataFrame(rows, columns=REGIME_COLUMNS)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "symbol": self.symbol,
+            "model_name": self.model_name,
+            "settings": self.settings,
+            "n_bars": self.n_bars,
+            "last_date": self.last_date,
+            "segments": self.segments,
+            "closed_fingerprint": self.closed_fingerprint,
+            "detector_summary": {
+                "full_fits": self.full_fits,
+                "tail_fits": self.tail_fits,
+                "n_segments": len(self.segments),
+                "updated_at": self.updated_at,
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> "RegimeState":
+        regime = cls(state["symbol"], state["model_name"], state["settings"])
+        regime.n_bars = state["n_bars"]
+        regime.last_date = state["last_date"]
+        regime.segments = state["segments"]
+        regime.closed_fingerprint = state["closed_fingerprint"]
+        summary = state["detector_summary"]
+        regime.full_fits = summary["full_fits"]
+        regime.tail_fits = summary["tail_fits"]
+        regime.updated_at = summary["updated_at"]
+        return regime
+
+
+class RegimeStore:
+    """시장 단위 regimes.json. 설정(model_name, settings)이 다른 상태는 재사용하지 않는다."""
+
+    def __init__(self, risk_dir: str):
+        self.risk_dir = risk_dir
+        self.path = os.path.join(risk_dir, REGIME_STATE_FILE)
+        self.states: Dict[str, Dict[str, Any]] = {}
+        if os.path.isfile(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    stored = json.load(f)
+                if stored.get("version") == REGIME_STATE_VERSION:
+                    self.states = stored["symbols"]
+                else:
+                    logger.info(f"Regime state version changed; rebuilding {self.path}")
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Ignoring unreadable regime state {self.path}: {e}")
+
+    def get(self, symbol: str, model_name: str, settings: Dict[str, Any]) -> Optional[RegimeState]:
+        state = self.states.get(symbol)
+        if state is None or state["model_name"] != model_name or state["settings"] != settings:
+            return None
+        return RegimeState.from_dict(state)
+
+    def put(self, regime: RegimeState):
+        self.states[regime.symbol] = regime.to_dict()
+
+    def summary(self) -> pd.DataFrame:
+        frames = [RegimeState.from_dict(state).summary() for state in self.states.values()]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=REGIME_COLUMNS)
+
+    def save(self):
+        os.makedirs(self.risk_dir, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": REGIME_STATE_VERSION, "symbols": self.states}, f)
+        os.replace(tmp_path, self.path)
+        self.summary().to_csv(os.path.join(self.risk_dir, REGIME_SUMMARY_FILE), index=False)
+
+
+def _update_symbol_regime(args) -> Tuple[str, Optional[Dict[str, Any]], Optional[np.ndarray], str]:
+    """
+    process pool 용. (symbol, state_dict | None, dates, close, volume, model_name, settings)
+    → (symbol, 갱신된 state_dict, risk_values, mode). 실패하면 state/risk 는 None, mode 는 오류 문자열
+    """
+    symbol, state, dates, close, volume, model_name, settings = args
+    try:
+        if state is None:
+            regime = RegimeState(symbol, model_name, settings).fit(dates, close, volume)
+            mode = "full"
+        else:
+            regime = RegimeState.from_dict(state)
+            mode = regime.update(dates, close, volume)
+        return symbol, regime.to_dict(), regime.risk_values(), mode
+    except Exception as e:
+        return symbol, None, None, repr(e)
+
+
+def run_regimes(
+        universe: Universe,
+        store: RegimeStore,
+        model_name: str,
+        settings: Dict[str, Any],
+        processes: int = 1,
+) -> pd.DataFrame:
+    """
+    universe 의 종목마다 저장된 regime 을 갱신하고 일별 risk 를 만든다. store 는 갱신만 하고 저장하지 않는다.
+    :return: (symbol, date, risk_value) DataFrame (run_batch 와 같은 형식). 실패한 종목은 제외
+    """
+    started = time.perf_counter()
+    tasks = []
+    for index, symbol in enumerate(universe.symbols):
+        rows = universe.rows(index)
+        state = store.get(symbol, model_name, settings)
+        tasks.append((
+            symbol, None if state is None else state.to_dict(), universe.dates[rows].tz_localize(None).to_numpy(),
+            universe.close[rows], universe.volume[rows], model_name, settings,
+        ))
+
+    if processes <= 1 or len(tasks) <= 1:
+        outputs = [_update_symbol_regime(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            outputs = list(executor.map(_update_symbol_regime, tasks))
+
+    frames = []
+    modes: Dict[str, int] = {}
+    for index, (symbol, state, values, mode) in enumerate(outputs):
+        if state is None:
+            logger.warning(f"[{symbol}] Failed to update regimes: {mode}")
+            continue
+        store.put(RegimeState.from_dict(state))
+        modes[mode] = modes.get(mode, 0) + 1
+        # 첫 bar 는 변동률 계산이 불가하므로 제외 (run_batch 와 동일)
+        frames.append(pd.DataFrame({
+            "symbol": symbol,
+            "date": universe.dates[universe.rows(index)][1:],
+            "risk_value": values,
+        }))
+    logger.info(f"Regime update: {modes} in {time.perf_counter() - started:.2f}s")
+    if not frames:
+        return pd.DataFrame(columns=["symbol", "date", "risk_value"])
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,100 @@
+"""
+risk 결과 캐시 (입력 fingerprint 기반)
+
+- 종목별 fingerprint = sha1(날짜, close, volume 배열 + detector 파라미터)
+- data/risk/<country>/fingerprints.json 에 {symbol: {"fingerprint", "rows", "last_date"}} 저장
+- fingerprint 가 바뀐 종목만 다시 계산하고, 이전 결과와 비교해 값이 바뀐 행만 delta 로 넘긴다.
+  delta 파일(risk_values_delta.csv)은 DB 적재가 끝나면 삭제되며, 그 전에 다시 실행되면 누적된다.
+"""
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Iterable, Optional
+from module.logger import get_logger
+
+logger = get_logger(__name__)
+
+# fingerprint 계산 방식이나 risk 계산 로직이 바뀌면 올려서 전체 재계산
+RISK_CACHE_VERSION = 1
+
+FINGERPRINT_FILE = "fingerprints.json"
+DELTA_FILE = "risk_values_delta.csv"
+# regimes.py 가 쓰는 구간 요약 파일. DB 적재 스크립트가 ruptures 없이 참조할 수 있게 여기 둔다
+REGIME_SUMMARY_FILE = "regimes.csv"
+RISK_KEY_COLUMNS = ["symbol", "date"]
+
+
+def fingerprint_arrays(dates: np.ndarray, close: np.ndarray, volume: np.ndarray, params: Dict[str, Any]) -> str:
+    """
+    :param dates: datetime64 배열 (tz 정보 없이 UTC 기준)
+    :param params: n_bkps, smoothing_alpha, model_name 등 결과에 영향을 주는 값
+    """
+    digest = hashlib.sha1()
+    digest.update(json.dumps({"version": RISK_CACHE_VERSION, **params}, sort_keys=True, default=str).encode())
+    digest.update(np.ascontiguousarray(dates).view(np.int64).tobytes())
+    digest.update(np.ascontiguousarray(close, dtype=np.float64).tobytes())
+    digest.update(np.ascontiguousarray(volume, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+class RiskFingerprintCache:
+    def __init__(self, risk_dir: str):
+        """
+        :param risk_dir: 시장 단위 risk 폴더 (예: data/risk/KOR)
+        """
+        self.risk_dir = risk_dir
+        self.path = os.path.join(risk_dir, FINGERPRINT_FILE)
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if os.path.isfile(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable fingerprint cache {self.path}: {e}")
+
+    def is_fresh(self, symbol: str, fingerprint: str) -> bool:
+        entry = self.entries.get(symbol)
+        return entry is not None and entry.get("fingerprint") == fingerprint
+
+    def update(self, symbol: str, fingerprint: str, rows: int, last_date: Optional[str]):
+        self.entries[symbol] = {"fingerprint": fingerprint, "rows": rows, "last_date": last_date}
+
+    def forget(self, symbols: Iterable[str]):
+        for symbol in symbols:
+            self.entries.pop(symbol, None)
+
+    def save(self):
+        os.makedirs(self.risk_dir, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+def changed_rows(previous: pd.DataFrame, current: pd.DataFrame, column: str = "risk_value",
+                 decimals: int = 4) -> pd.DataFrame:
+    """
+    current 중 previous 에 없거나 column 값이 (소수 decimals 자리 기준) 달라진 행
+    두 DataFrame 모두 symbol, date(YYYY-MM-DD), column 을 가진다.
+    """
+    if previous.empty:
+        return current
+    merged = current.merge(
+        previous[RISK_KEY_COLUMNS + [column]], on=RISK_KEY_COLUMNS, how="left", suffixes=("", "_prev")
+    )
+    prev = merged[f"{column}_prev"].to_numpy(dtype=np.float64)
+    curr = merged[column].to_numpy(dtype=np.float64)
+    mask = np.isnan(prev) | (np.round(prev, decimals) != np.round(curr, decimals))
+    return current[mask]
+
+
+def append_delta(risk_dir: str, delta: pd.DataFrame) -> str:
+    """아직 적재되지 않은 delta 와 합쳐(같은 키는 최신 값) 저장한다."""
+    path = os.path.join(risk_dir, DELTA_FILE)
+    if os.path.isfile(path):
+        pending = pd.read_csv(path, dtype={"symbol": str})
+        delta = pd.concat([pending, delta], ignore_index=True).drop_duplicates(RISK_KEY_COLUMNS, keep="last")
+    delta.to_csv(path, index=False)
+    return path
@@ -0,0 +1,124 @@
+"""
+종목 단위 risk 계산 작업
+
+월별 chunk 파일마다 따로 계산하던 방식 대신, 종목의 전체 히스토리를 한 번 순차적으로 읽어
+전체 시계열(또는 지정한 길이의 window) 단위로 change point 탐지와 스케일링을 수행한다.
+따라서 월이 달라도 risk 값을 서로 비교할 수 있다.
+"""
+import os
+import pandas as pd
+from typing import Any, Dict, Optional, Sequence
+from module.analysis.ts.change_point_detection import calculate_risk_scores
+from module.analysis.ts.detectors import DEFAULT_DETECTOR, resolve_detector
+from module.config import CONFIG_KEY_RISK
+from module.data.providers.data_pipeline import ProviderDataPipeline
+from module.logger import get_logger
+
+logger = get_logger(__name__)
+
+RISK_INPUT_COLUMNS = ("close", "volume")
+RISK_RESULT_COLUMNS = ["symbol", "date", "risk_value"]
+
+# config 의 risk 섹션 기본값
+DEFAULT_RISK_SETTINGS = {
+    "detector": DEFAULT_DETECTOR,
+    "n_bkps": 5,
+    "smoothing_alpha": 0.3,
+    "detector_params": {},
+}
+
+
+def risk_settings(config: Dict[str, Any], **overrides) -> Dict[str, Any]:
+    """
+    config 의 risk 섹션 + 기본값 + (None 이 아닌) overrides 를 합친 risk 계산 설정.
+    detector 이름은 registry 에서 확인하고 alias 는 현재 이름으로 바꾼다.
+    """
+    settings = dict(DEFAULT_RISK_SETTINGS)
+    settings.update(config.get(CONFIG_KEY_RISK) or {})
+    settings.update({k: v for k, v in overrides.items() if v is not None})
+    unknown = set(settings) - set(DEFAULT_RISK_SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown risk settings: {sorted(unknown)}")
+    settings["detector"] = resolve_detector(settings["detector"]).name
+    settings["detector_params"] = dict(settings["detector_params"] or {})
+    return settings
+
+
+def load_symbol_history(
+        folder_path: str,
+        columns: Sequence[str] = RISK_INPUT_COLUMNS,
+        batch_rows: int = 5000,
+) -> pd.DataFrame:
+    """
+    종목 폴더의 chunk 파일들을 iter_chunks 로 읽어 날짜 오름차순, 중복 제거된 DataFrame을 반환한다.
+    반환 DataFrame은 "date" 컬럼 + columns 를 가진다.
+    """
+    dp = ProviderDataPipeline(data_provider=None, base_path=folder_path, cache_days=0)
+    chunks = [
+        chunk.dropna(subset=[c for c in columns if c in chunk.columns])
+        for chunk in dp.iter_chunks(columns=columns, batch_rows=batch_rows)
+    ]
+    if not chunks:
+        return pd.DataFrame(columns=["date", *columns])
+    history = pd.concat(chunks)
+    history.index.name = "date"
+    return history.reset_index()
+
+
+def compute_symbol_risk(
+        folder_path: str,
+        symbol: str,
+        n_bkps: int = 5,
+        smoothing_alpha: float = 0.3,
+        window_rows: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    종목 하나의 전체 히스토리로 risk value를 계산한다.
+
+    :param folder_path: 종목 chunk 파일이 있는 폴더 (예: data/stocks/KOR/005930)
+    :param window_rows: None이면 전체 시계열을 한 번에, 값이 있으면 해당 행 수의 window 단위로 계산
+    :return: (symbol, date, risk_value) DataFrame
+    """
+    history = load_symbol_history(folder_path)
+    missing = [c for c in RISK_INPUT_COLUMNS if c not in history.columns]
+    if missing:
+        logger.info(f"[{symbol}] Missing columns {missing} in {folder_path}. Skipped.")
+        return pd.DataFrame(columns=RISK_RESULT_COLUMNS)
+    if len(history) < 2:
+        logger.info(f"[{symbol}] Not enough rows ({len(history)}) for risk calculation.")
+        return pd.DataFrame(columns=RISK_RESULT_COLUMNS)
+
+    if window_rows is None or window_rows >= len(history):
+        return calculate_risk_scores(history, symbol, n_bkps=n_bkps, smoothing_alpha=smoothing_alpha)
+
+    if window_rows < 2:
+        raise ValueError("window_rows must be at least 2")
+
+    # 각 window는 직전 행을 하나 포함해 첫 행의 변동률도 계산되도록 한다
+    results = []
+    for start in range(1, len(history), window_rows):
+        window = history.iloc[start - 1: start + window_rows]
+        results.append(
+            calculate_risk_scores(window, symbol, n_bkps=n_bkps, smoothing_alpha=smoothing_alpha)
+        )
+    return pd.concat(results, ignore_index=True)
+
+
+def process_symbol(args) -> pd.DataFrame:
+    """
+    Multiprocessing에서 병렬로 실행할 함수. (folder_path, symbol[, window_rows]) → risk DataFrame
+    """
+    folder_path, symbol, *rest = args
+    window_rows = rest[0] if rest else None
+
+    if not os.path.isdir(folder_path):
+        logger.warning(f"[{symbol}] No folder at {folder_path}")
+        return pd.DataFrame(columns=RISK_RESULT_COLUMNS)
+
+    try:
+        risk_df = compute_symbol_risk(folder_path, symbol, window_rows=window_rows)
+        logger.info(f"[{symbol}] Completed risk calculation with {len(risk_df)} rows.")
+        return risk_df
+    except Exception as e:
+        logger.warning(f"[{symbol}] Failed to compute risk: {e}")
+        return pd.DataFrame(columns=RISK_RESULT_COLUMNS)
@@ -0,0 +1,145 @@
+"""
+rolling window risk 모드
+
+전체 히스토리에 MinMax 를 한 번 적용하면 새 극값이 나올 때 과거 값까지 모두 바뀐다.
+rolling 모드는 날짜 t 의 risk 를 t 이전 window_size 개 bar 만으로 계산한다.
+
+- window 는 window_size 개 bar (특징값은 window_size - 1 개), step 개 bar 마다 하나씩 평가
+- 특징값 (returns, vol_changes) 은 FeatureRingBuffer 에 bar 단위로 한 번만 계산해 넣고,
+  window 마다 np.column_stack 으로 다시 만들지 않고 연속 view 를 그대로 detector 에 넘긴다.
+- 긴 시계열은 window 끝 위치를 구간으로 나눠 여러 프로세스에서 병렬로 계산한다.
+"""
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+from module.analysis.ts.change_point_detection import risk_values_from_features
+from module.analysis.ts.detectors import DEFAULT_DETECTOR
+from module.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_WINDOW_SIZE = 250
+
+
+class FeatureRingBuffer:
+    """
+    최근 capacity 개의 (returns, vol_changes) 를 보관하는 ring buffer.
+
+    값을 pos 와 pos + capacity 두 곳에 써 두면 가장 오래된 값부터 capacity 개가
+    항상 buf[pos:pos + capacity] 에 연속으로 놓이므로, window() 는 복사 없이 view 를 반환한다.
+    """
+
+    def __init__(self, capacity: int, n_features: int = 2):
+        self.capacity = capacity
+        self._buf = np.zeros((2 * capacity, n_features))
+        self._pos = 0
+        self._count = 0
+        self._last_close: Optional[float] = None
+        self._last_volume: Optional[float] = None
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def full(self) -> bool:
+        return self._count >= self.capacity
+
+    def push_bar(self, close: float, volume: float):
+        """bar 하나를 넣는다. 두 번째 bar 부터 특징값이 하나씩 쌓인다."""
+        if self._last_close is not None:
+            self.push(
+                (close - self._last_close) / (self._last_close + 1e-9),
+                (volume - self._last_volume) / (self._last_volume + 1e-9),
+            )
+        self._last_close, self._last_volume = close, volume
+
+    def push(self, *values: float):
+        self._buf[self._pos] = values
+        self._buf[self._pos + self.capacity] = values
+        self._pos = (self._pos + 1) % self.capacity
+        self._count += 1
+
+    def window(self) -> np.ndarray:
+        """오래된 순서의 (min(len, capacity), n_features) view"""
+        if not self.full:
+            return self._buf[: self._count]
+        return self._buf[self._pos: self._pos + self.capacity]
+
+
+def window_ends(n_bars: int, window_size: int, step: int) -> np.ndarray:
+    """평가할 window 의 마지막 bar index 목록 (첫 window 는 window_size 개 bar 가 찼을 때)"""
+    return np.arange(window_size - 1, n_bars, step, dtype=np.int64)
+
+
+def _rolling_block(args) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    ends 구간 하나를 ring buffer 로 계산한다.
+    close / volume 은 ends[0] - window_size + 1 부터 ends[-1] 까지의 bar
+    """
+    close, volume, offset, ends, window_size, params = args
+    buffer = FeatureRingBuffer(window_size - 1)
+    values = np.empty(len(ends))
+    next_end = 0
+    for i in range(len(close)):
+        buffer.push_bar(close[i], volume[i])
+        if next_end < len(ends) and offset + i == ends[next_end]:
+            # window 마지막 시점의 risk (window 내부에서만 스케일링/스무딩)
+            values[next_end] = risk_values_from_features(buffer.window(), **params)[-1]
+            next_end += 1
+    return ends, values
+
+
+def rolling_risk_values(
+        close: np.ndarray,
+        volume: np.ndarray,
+        window_size: int = DEFAULT_WINDOW_SIZE,
+        step: int = 1,
+        n_bkps: int = 5,
+        smoothing_alpha: float = 0.3,
+        detector: str = DEFAULT_DETECTOR,
+        detector_params: Optional[dict] = None,
+        processes: int = 1,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    :param close, volume: 길이 n 의 bar 배열 (날짜 오름차순)
+    :param window_size: window 당 bar 수 (특징값은 window_size - 1 개)
+    :param step: window 끝을 옮기는 간격 (bar 수)
+    :param processes: 1 보다 크면 window 끝 위치를 나눠 프로세스 병렬 계산
+    :return: (ends, risk_values) - ends 는 bar index, risk_values 는 해당 날짜 기준 0~100
+    """
+    if window_size < 3:
+        raise ValueError("window_size must be at least 3")
+    if step < 1:
+        raise ValueError("step must be at least 1")
+
+    close = np.asarray(close, dtype=np.float64)
+    volume = np.asarray(volume, dtype=np.float64)
+    ends = window_ends(len(close), window_size, step)
+    if len(ends) == 0:
+        return ends, np.empty(0)
+
+    params = {
+        "n_bkps": n_bkps,
+        "smoothing_alpha": smoothing_alpha,
+        "detector": detector,
+        "detector_params": detector_params,
+    }
+    blocks = _split_blocks(close, volume, ends, window_size, params, max(1, processes))
+
+    if processes <= 1 or len(blocks) == 1:
+        results = [_rolling_block(block) for block in blocks]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            results = list(executor.map(_rolling_block, blocks))
+
+    return np.concatenate([r[0] for r in results]), np.concatenate([r[1] for r in results])
+
+
+def _split_blocks(close, volume, ends, window_size, params, n_blocks) -> List[tuple]:
+    """window 끝 위치를 n_blocks 개의 연속 구간으로 나누고, 각 구간이 필요로 하는 bar 만 잘라 넘긴다."""
+    blocks = []
+    for block_ends in np.array_split(ends, min(n_blocks, len(ends))):
+        first = int(block_ends[0]) - window_size + 1
+        last = int(block_ends[-1]) + 1
+        blocks.append((close[first:last], volume[first:last], first, block_ends, window_size, params))
+    return blocks
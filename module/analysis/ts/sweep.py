@@ -0,0 +1,209 @@
+"""
+risk 하이퍼파라미터 sweep
+
+(detector, n_bkps, scaling, smoothing_alpha) 조합마다 전체 파이프라인을 다시 돌리지 않도록
+계산을 단계별로 나눠 앞 단계 결과를 공유한다.
+
+1. features : 종목마다 (returns, vol_changes) 를 한 번만 계산
+2. fit      : detector 마다 한 번만 fit
+              - Binseg 계열은 greedy 분할 경로(BreakpointPath) 하나에서 모든 n_bkps 결과를 꺼낸다
+              - n_bkps 를 쓰지 않는 detector (PELT / binseg_auto / online) 는 한 번 계산해 공유
+              - 그 외는 n_bkps 마다 실행
+3. segment  : breakpoint 마다 구간 변동성(raw risk) 한 번
+4. post     : scaling x smoothing_alpha 조합은 raw risk 에 대한 후처리만 수행
+
+종목 단위로 process pool 에 나눠 계산하고, 조합별 지표와 단계별 소요 시간을 모은다.
+평가 지표
+- mean_risk / turnover   : 평균 risk, 일별 변화량 절대값 평균 (작을수록 안정적)
+- fwd_vol_corr           : risk 와 이후 horizon 일 실현 변동성의 Spearman 상관 (클수록 선행성)
+"""
+import time
+import numpy as np
+import pandas as pd
+import ruptures as rpt
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+from module.analysis.ts.detectors import CostL2Cumsum, CostNormalCumsum, resolve_detector, standardize
+from module.analysis.ts.kernels import SCALERS, rank_scale, risk_percent, segment_volatility
+from module.analysis.ts.penalty import BreakpointPath
+from module.logger import get_logger
+
+logger = get_logger(__name__)
+
+SWEEP_STAGES = ("load", "features", "fit", "segment", "post")
+SWEEP_KEY_COLUMNS = ["detector", "n_bkps", "scaling", "smoothing_alpha"]
+SWEEP_METRIC_COLUMNS = ["mean_risk", "turnover", "fwd_vol_corr", "n_segments"]
+
+# greedy 분할 경로를 공유할 수 있는 Binseg 계열: detector → (jump → 특징값을 fit 한 Binseg)
+BINSEG_PATHS: Dict[str, Callable[[np.ndarray, int], rpt.Binseg]] = {
+    "binseg_rbf": lambda features, jump: rpt.Binseg(model="rbf", jump=jump).fit(features),
+    "binseg_l2": lambda features, jump: rpt.Binseg(custom_cost=CostL2Cumsum(), jump=jump).fit(
+        standardize(features)),
+    "binseg_normal": lambda features, jump: rpt.Binseg(custom_cost=CostNormalCumsum(), jump=jump).fit(
+        standardize(features)),
+}
+
+
+class SweepGrid(NamedTuple):
+    detectors: Sequence[str]
+    n_bkps: Sequence[int]
+    smoothing_alphas: Sequence[float]
+    scalings: Sequence[str] = ("minmax",)
+    detector_params: Optional[Dict[str, dict]] = None  # detector 이름 → 추가 파라미터
+    horizon: int = 20  # fwd_vol_corr 의 실현 변동성 기간 (일)
+
+    def validate(self) -> "SweepGrid":
+        unknown = [s for s in self.scalings if s not in SCALERS]
+        if unknown:
+            raise ValueError(f"Unknown scalings {unknown}. Available: {sorted(SCALERS)}")
+        detectors = [resolve_detector(d).name for d in self.detectors]
+        return self._replace(detectors=detectors, detector_params=dict(self.detector_params or {}))
+
+    @property
+    def size(self) -> int:
+        return len(self.detectors) * len(self.n_bkps) * len(self.smoothing_alphas) * len(self.scalings)
+
+
+def grid_breakpoints(
+        features: np.ndarray,
+        detector: str,
+        n_bkps_list: Sequence[int],
+        params: Optional[dict] = None,
+) -> Dict[int, List[int]]:
+    """detector 를 최소 횟수로 실행해 n_bkps 별 breakpoint 목록을 만든다."""
+    spec = resolve_detector(detector)
+    params = dict(params or {})
+    if spec.name in BINSEG_PATHS:
+        algo = BINSEG_PATHS[spec.name](features, params.get("jump", 5))
+        path = BreakpointPath(algo, max(n_bkps_list))
+        return {k: path.bkps(k) for k in n_bkps_list}
+    if not spec.uses_n_bkps:
+        bkps = spec.func(features, n_bkps_list[0], **params)
+        return {k: bkps for k in n_bkps_list}
+    return {k: spec.func(features, k, **params) for k in n_bkps_list}
+
+
+def forward_volatility(returns: np.ndarray, horizon: int) -> np.ndarray:
+    """t 시점 이후 horizon 개 수익률의 RMS. 뒤쪽 horizon 개는 NaN"""
+    n = len(returns)
+    out = np.full(n, np.nan)
+    if n <= horizon:
+        return out
+    csum = np.concatenate([[0.0], np.cumsum(returns ** 2)])
+    t = np.arange(n - horizon)
+    out[t] = np.sqrt((csum[t + 1 + horizon] - csum[t + 1]) / horizon)
+    return out
+
+
+def spearman(a: np.ndarray, b: np.ndarray) -> float:
+    """NaN 이 아닌 쌍의 Spearman 상관. 쌍이 3개 미만이거나 한쪽이 상수면 NaN"""
+    valid = ~(np.isnan(a) | np.isnan(b))
+    if valid.sum() <= 2:
+        return np.nan
+    ranks = rank_scale(np.vstack([a[valid], b[valid]]))
+    if ranks[0].std() == 0 or ranks[1].std() == 0:
+        return np.nan
+    return float(np.corrcoef(ranks)[0, 1])
+
+
+def risk_metrics(risk: np.ndarray, fwd_vol: np.ndarray) -> Tuple[float, float, float]:
+    """(mean_risk, turnover, fwd_vol_corr)"""
+    turnover = float(np.mean(np.abs(np.diff(risk)))) if len(risk) > 1 else 0.0
+    return float(np.mean(risk)), turnover, spearman(risk, fwd_vol)
+
+
+def sweep_symbol(args) -> Tuple[List[tuple], Dict[Tuple[str, str], float]]:
+    """
+    종목 하나에 grid 전체를 적용한다.
+    :param args: (symbol, close, volume, grid)
+    :return: (결과 행 목록, {(stage, detector): seconds})
+    """
+    symbol, close, volume, grid = args
+    timings: Dict[Tuple[str, str], float] = {}
+    rows = []
+
+    started = time.perf_counter()
+    returns = (close[1:] - close[:-1]) / (close[:-1] + 1e-9)
+    vol_changes = (volume[1:] - volume[:-1]) / (volume[:-1] + 1e-9)
+    features = np.column_stack((returns, vol_changes))
+    fwd_vol = forward_volatility(returns, grid.horizon)
+    timings[("features", "")] = time.perf_counter() - started
+
+    for detector in grid.detectors:
+        started = time.perf_counter()
+        try:
+            bkps_by_k = grid_breakpoints(features, detector, grid.n_bkps, grid.detector_params.get(detector))
+        except Exception as e:
+            logger.warning(f"[{symbol}] {detector} failed: {e!r}")
+            continue
+        timings[("fit", detector)] = time.perf_counter() - started
+
+        raw_by_bkps = {}
+        for k, bkps in bkps_by_k.items():
+            started = time.perf_counter()
+            key = tuple(bkps)
+            if key not in raw_by_bkps:
+                raw_by_bkps[key] = segment_volatility(features, bkps)
+            raw = raw_by_bkps[key]
+            timings[("segment", detector)] = timings.get(("segment", detector), 0.0) + time.perf_counter() - started
+
+            started = time.perf_counter()
+            for scaling in grid.scalings:
+                for alpha in grid.smoothing_alphas:
+                    risk = risk_percent(raw, alpha, scaling=scaling)
+                    rows.append((symbol, detector, k, scaling, alpha, *risk_metrics(risk, fwd_vol), len(bkps)))
+            timings[("post", detector)] = timings.get(("post", detector), 0.0) + time.perf_counter() - started
+    return rows, timings
+
+
+def run_sweep(
+        symbols: Sequence[str],
+        closes: Sequence[np.ndarray],
+        volumes: Sequence[np.ndarray],
+        grid: SweepGrid,
+        processes: int = 1,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    :return: (results, timings)
+        results : symbol + SWEEP_KEY_COLUMNS + SWEEP_METRIC_COLUMNS (종목 x 조합)
+        timings : stage, detector, seconds (전 종목 합계, 병렬 실행 시 worker 시간 합)
+    """
+    grid = grid.validate()
+    tasks = [(s, np.asarray(c, dtype=np.float64), np.asarray(v, dtype=np.float64), grid)
+             for s, c, v in zip(symbols, closes, volumes) if len(c) > grid.horizon + 2]
+    logger.info(f"Sweeping {grid.size} combinations over {len(tasks)} symbols with {processes} processes")
+
+    if processes <= 1:
+        outputs = [sweep_symbol(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            outputs = list(executor.map(sweep_symbol, tasks, chunksize=max(1, len(tasks) // (4 * processes))))
+
+    results = pd.DataFrame(
+        [row for rows, _ in outputs for row in rows],
+        columns=["symbol"] + SWEEP_KEY_COLUMNS + SWEEP_METRIC_COLUMNS,
+    )
+    totals: Dict[Tuple[str, str], float] = {}
+    for _, timings in outputs:
+        for key, seconds in timings.items():
+            totals[key] = totals.get(key, 0.0) + seconds
+    timings = pd.DataFrame(
+        [(stage, detector, seconds) for (stage, detector), seconds in totals.items()],
+        columns=["stage", "detector", "seconds"],
+    )
+    timings["stage"] = pd.Categorical(timings["stage"], categories=SWEEP_STAGES, ordered=True)
+    return results, timings.sort_values(["stage", "detector"]).reset_index(drop=True)
+
+
+def summarize_sweep(results: pd.DataFrame) -> pd.DataFrame:
+    """조합별 종목 평균 지표. fwd_vol_corr 내림차순"""
+    if results.empty:
+        return pd.DataFrame(columns=SWEEP_KEY_COLUMNS + SWEEP_METRIC_COLUMNS + ["symbols"])
+    summary = results.groupby(SWEEP_KEY_COLUMNS, as_index=False).agg(
+        mean_risk=("mean_risk", "mean"),
+        turnover=("turnover", "mean"),
+        fwd_vol_corr=("fwd_vol_corr", "mean"),
+        n_segments=("n_segments", "mean"),
+        symbols=("symbol", "nunique"),
+    )
+    return summary.sort_values("fwd_vol_corr", ascending=False).reset_index(drop=True)
@@ -0,0 +1,264 @@
+"""
+데이터 파이프라인 config 의 타입 모델과 컴파일 캐시
+
+- read_config() 결과(dict)를 config / stocks_file 의 파일 해시로 캐시 (메모리 + 디스크 pickle)
+- provider 별 생성자 파라미터 스키마(PROVIDER_SCHEMAS)로 종목별 파라미터를 미리 해석 (키만 골라내고 값 타입은 검사하지 않음)
+- provider 객체는 ProviderSpec.build() 시점에 생성 (lazy)
+"""
+import os
+import copy
+import pickle
+import hashlib
+from datetime import datetime
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from module.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 상수 정의
+CONFIG_KEY_STRATEGY = "strategy"
+CONFIG_KEY_ALGORITHM = "algorithm"
+CONFIG_KEY_DATA_PIPELINES = "data_pipelines"
+CONFIG_KEY_NAME = "name"
+
+CONFIG_KEY_STOCKS = "stocks"
+CONFIG_KEY_COMPANIES = "companies"
+CONFIG_KEY_BASE_PATH = "base_path"
+CONFIG_KEY_STOCKS_FILE = "stocks_file"
+CONFIG_KEY_RISK = "risk"
+
+# 디스크 캐시 포맷이 바뀌면 올린다
+CONFIG_CACHE_VERSION = 2
+
+
+@dataclass(frozen=True)
+class ProviderSchema:
+    """
+    provider 생성자가 받는 파라미터 목록.
+    종목 항목 / data_pipelines 에서 이 키들만 골라낼 뿐 값의 타입은 검사하지 않는다 (없는 키는 None).
+    """
+    param_keys: Tuple[str, ...]
+
+
+PROVIDER_SCHEMAS: Dict[str, ProviderSchema] = {
+    # YahooFinance는 interval, period 등 사용
+    "YahooFinance": ProviderSchema(
+        ("interval", "period", "start_date", "end_date", "raise_errors", "keepna", "timeout")
+    ),
+    "NaverNews": ProviderSchema(
+        ("display", "start", "raise_errors", "timeout", "start_date", "end_date")
+    ),
+    # FinanceDataReader는 period가 없고, interval, start_date, end_date만 사용
+    "FinanceDataReader": ProviderSchema(("interval", "start_date", "end_date")),
+}
+# 기본값(주식 파이프라인 가정)
+DEFAULT_PROVIDER_SCHEMA = ProviderSchema(("interval", "start_date", "end_date"))
+
+
+@dataclass(frozen=True)
+class ProviderSpec:
+    """provider 하나를 만들기 위한 (symbol/query, 파라미터) 정보"""
+    symbol: str
+    params: Tuple[Tuple[str, Any], ...]
+
+    def resolve_params(self) -> Dict[str, Any]:
+        """실행 시점에 결정되는 값(end_date: TODAY)을 해석한 파라미터"""
+        params = dict(self.params)
+        if params.get("end_date") == "TODAY":
+            params["end_date"] = datetime.now().strftime("%Y-%m-%d")
+        return params
+
+    def build(self, provider_class):
+        return provider_class(self.symbol, **self.resolve_params())
+
+
+@dataclass(frozen=True)
+class PipelineConfig:
+    name: str
+    module: Optional[str]
+    base_path: Optional[str]
+    items: Tuple[Dict[str, Any], ...]
+    provider_specs: Tuple[ProviderSpec, ...]
+
+    @property
+    def schema(self) -> ProviderSchema:
+        return PROVIDER_SCHEMAS.get(self.name, DEFAULT_PROVIDER_SCHEMA)
+
+    def iter_providers(self, provider_class) -> Iterator[Any]:
+        for spec in self.provider_specs:
+            provider = spec.build(provider_class)
+            logger.debug(f"Created provider for: {spec.symbol} with params={spec.resolve_params()}")
+            yield provider
+
+
+class ConfigDict(dict):
+    """
+    read_config() 가 돌려주는 config dict. 캐시에서 이미 컴파일된 PipelineConfig 를 pipeline 으로 함께 들고 있어
+    iter_data_providers 가 다시 컴파일하지 않는다 (data_pipelines 를 바꿨다면 pipeline 을 None 으로 둘 것).
+    """
+
+    def __init__(self, *args, pipeline: Optional[PipelineConfig] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pipeline = pipeline
+
+
+@dataclass
+class CompiledConfig:
+    config_path: str
+    # {파일 경로: sha1} - config 파일 및 stocks_file
+    file_hashes: Dict[str, str]
+    raw: Dict[str, Any]
+    pipeline: Optional[PipelineConfig] = None
+    version: int = field(default=CONFIG_CACHE_VERSION)
+
+    def to_dict(self) -> ConfigDict:
+        """호출자가 수정해도 캐시가 오염되지 않도록 복사본을 반환"""
+        return ConfigDict(copy.deepcopy(self.raw), pipeline=self.pipeline)
+
+
+def file_sha1(path: str) -> Optional[str]:
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def compile_pipeline(config: Dict[str, Any]) -> Optional[PipelineConfig]:
+    """
+    read_config() 형태의 dict 에서 PipelineConfig 를 만든다.
+    name 이 없으면 None, 종목 목록이 없거나 잘못된 항목이 있으면 ValueError.
+    """
+    data_pipelines = config.get(CONFIG_KEY_DATA_PIPELINES) or {}
+    if CONFIG_KEY_NAME not in data_pipelines:
+        return None
+
+    name = data_pipelines[CONFIG_KEY_NAME]
+    if CONFIG_KEY_STOCKS in data_pipelines:
+        items = data_pipelines[CONFIG_KEY_STOCKS]
+    elif CONFIG_KEY_COMPANIES in data_pipelines:
+        items = data_pipelines[CONFIG_KEY_COMPANIES]
+    else:
+        raise ValueError("Need either 'stocks' or 'companies' in data_pipelines config")
+    if not isinstance(items, list):
+        raise ValueError(f"'{name}' items must be a list, got {type(items).__name__}")
+
+    schema = PROVIDER_SCHEMAS.get(name, DEFAULT_PROVIDER_SCHEMA)
+    specs = []
+    for i, item in enumerate(items):
+        if not isinstance(item, dict):
+            raise ValueError(f"Item #{i} of '{name}' must be a mapping, got {item!r}")
+        if "symbol" in item:
+            symbol_or_query = item["symbol"]
+        elif "query" in item:
+            symbol_or_query = item["query"]
+        else:
+            logger.error(f"Item #{i} has neither 'symbol' nor 'query'")
+            continue
+        params = tuple((k, item.get(k, data_pipelines.get(k, None))) for k in schema.param_keys)
+        specs.append(ProviderSpec(symbol=str(symbol_or_query), params=params))
+
+    return PipelineConfig(
+        name=name,
+        module=data_pipelines.get("module"),
+        base_path=data_pipelines.get(CONFIG_KEY_BASE_PATH),
+        items=tuple(items),
+        provider_specs=tuple(specs),
+    )
+
+
+class ConfigCache:
+    """
+    config 파일 경로 → CompiledConfig 캐시.
+    config 파일과 stocks_file 의 sha1 이 모두 같을 때만 캐시를 사용한다.
+    """
+
+    def __init__(self):
+        self._memory: Dict[str, CompiledConfig] = {}
+
+    @staticmethod
+    def _is_valid(compiled: Optional[CompiledConfig]) -> bool:
+        if compiled is None or compiled.version != CONFIG_CACHE_VERSION:
+            return False
+        return all(file_sha1(path) == sha for path, sha in compiled.file_hashes.items())
+
+    @staticmethod
+    def _disk_path(cache_dir: str, config_path: str) -> str:
+        key = hashlib.sha1(config_path.encode("utf-8")).hexdigest()
+        return os.path.join(cache_dir, f"{key}.pkl")
+
+    def _load_disk(self, cache_dir: Optional[str], config_path: str) -> Optional[CompiledConfig]:
+        if not cache_dir:
+            return None
+        path = self._disk_path(cache_dir, config_path)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring broken config cache {path}: {e}")
+            return None
+
+    def _save_disk(self, cache_dir: Optional[str], compiled: CompiledConfig):
+        if not cache_dir:
+            return
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            path = self._disk_path(cache_dir, compiled.config_path)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(compiled, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to write config cache: {e}")
+
+    def get(
+            self,
+            config_path: str,
+            parse: Callable[[str], Tuple[Dict[str, Any], List[str]]],
+            cache_dir: Optional[str] = None,
+    ) -> CompiledConfig:
+        """
+        :param parse: config_path → (config dict, 의존 파일 경로 목록)
+        :param cache_dir: 디스크 캐시 디렉토리 (None이면 메모리 캐시만 사용)
+        """
+        config_path = os.path.abspath(config_path)
+
+        compiled = self._memory.get(config_path)
+        if self._is_valid(compiled):
+            logger.debug(f"Config cache hit (memory): {config_path}")
+            return compiled
+
+        compiled = self._load_disk(cache_dir, config_path)
+        if self._is_valid(compiled):
+            logger.debug(f"Config cache hit (disk): {config_path}")
+            self._memory[config_path] = compiled
+            return compiled
+
+        # 해시는 파싱 전에 계산해 파싱 도중 파일이 바뀌면 다음 호출에서 다시 읽도록 한다
+        file_hashes = {config_path: file_sha1(config_path)}
+        raw, dependencies = parse(config_path)
+        for dep in dependencies:
+            file_hashes[os.path.abspath(dep)] = file_sha1(dep)
+
+        try:
+            pipeline = compile_pipeline(raw)
+        except ValueError as e:
+            # 잘못된 pipeline 설정은 provider 생성 시점(create_data_providers)에 에러로 보고
+            logger.warning(f"Invalid data pipeline config in {config_path}: {e}")
+            pipeline = None
+
+        compiled = CompiledConfig(
+            config_path=config_path,
+            file_hashes=file_hashes,
+            raw=raw,
+            pipeline=pipeline,
+        )
+        self._memory[config_path] = compiled
+        self._save_disk(cache_dir, compiled)
+        return compiled
+
+    def clear(self):
+        self._memory.clear()
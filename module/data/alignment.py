@@ -0,0 +1,163 @@
+"""
+거래소별 거래일 기준으로 여러 종목의 가격 시계열을 하나의 패널로 정렬하는 엔진
+
+- 각 시계열의 timestamp를 거래소 현지 시간 기준 거래일(tz-naive)로 변환
+- 정렬된 거래일 인덱스들을 병합해 하나의 union 거래일 인덱스 생성 (주말/휴장일 행 없음)
+- 과거 값만 앞으로 채우는(forward-fill only) 방식으로 정렬하며, 미래 가격을 과거로 채우지 않음
+- 결과는 C-contiguous float64 2차원 배열 + 컬럼 라벨 + 거래일 인덱스
+"""
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Mapping, NamedTuple, Optional, Sequence
+from module.logger import get_logger
+
+logger = get_logger(__name__)
+
+# config의 exchange 값 → 거래소 현지 timezone
+EXCHANGE_TIMEZONES = {
+    "KRX": "Asia/Seoul",
+    "KOSPI": "Asia/Seoul",
+    "KOSDAQ": "Asia/Seoul",
+    "NYSE": "America/New_York",
+    "NASDAQ": "America/New_York",
+    "AMEX": "America/New_York",
+    "CBOE": "America/New_York",
+    "INDEXDJX": "America/New_York",
+    "INDEXNASDAQ": "America/New_York",
+    "INDEXSP": "America/New_York",
+    "INDEXRUSSELL": "America/New_York",
+    "NYMEX": "America/New_York",
+    "COMEX": "America/New_York",
+    "CBOT": "America/Chicago",
+}
+
+FILL_METHODS = ("ffill", None)
+
+
+class AlignedPanel(NamedTuple):
+    values: np.ndarray  # shape (n_sessions, n_symbols), float64, C-contiguous
+    columns: List[str]
+    index: pd.DatetimeIndex  # tz-naive 거래일
+
+    def to_frame(self) -> pd.DataFrame:
+        """values 버퍼를 복사하지 않고 DataFrame으로 감싼다."""
+        return pd.DataFrame(self.values, index=self.index, columns=self.columns, copy=False)
+
+
+def to_session_index(index: pd.Index, tz: Optional[str] = None) -> pd.DatetimeIndex:
+    """
+    timestamp 인덱스를 거래소 현지 기준 거래일(tz-naive, 자정)로 변환한다.
+    :param index: 변환할 인덱스 (tz가 없으면 UTC로 간주)
+    :param tz: 거래소 timezone (None이면 UTC 기준 날짜)
+    """
+    index = pd.DatetimeIndex(pd.to_datetime(index, utc=True))
+    if tz is not None:
+        index = index.tz_convert(tz)
+    return index.tz_localize(None).normalize()
+
+
+def to_session_series(series: pd.Series, tz: Optional[str] = None) -> pd.Series:
+    """
+    시계열을 거래일 인덱스로 변환하고, 같은 거래일에 여러 값이 있으면 마지막 값을 남긴다.
+    """
+    sessions = to_session_index(series.index, tz)
+    values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    if not sessions.is_monotonic_increasing:
+        order = np.argsort(sessions.asi8, kind="stable")
+        sessions = sessions[order]
+        values = values[order]
+    # 같은 거래일 중 마지막 행만 유지 (정렬된 상태이므로 다음 값과 비교)
+    keep = np.ones(len(sessions), dtype=bool)
+    keep[:-1] = sessions.asi8[1:] != sessions.asi8[:-1]
+    return pd.Series(values[keep], index=sessions[keep], name=series.name)
+
+
+def build_trading_index(indexes: Sequence[pd.DatetimeIndex]) -> pd.DatetimeIndex:
+    """
+    정렬된 거래일 인덱스들을 병합해 중복 없는 union 거래일 인덱스를 만든다.
+    정렬된 run들을 이어붙인 뒤 stable(merge) 정렬을 하므로 k-way merge와 같은 비용이다.
+    """
+    arrays = [np.asarray(idx.asi8) for idx in indexes if len(idx)]
+    if not arrays:
+        return pd.DatetimeIndex([])
+    merged = np.sort(np.concatenate(arrays), kind="stable")
+    keep = np.ones(len(merged), dtype=bool)
+    keep[1:] = merged[1:] != merged[:-1]
+    return pd.DatetimeIndex(merged[keep])
+
+
+def align_panel(
+        series_list: Sequence[pd.Series],
+        index: Optional[pd.DatetimeIndex] = None,
+        fill: Optional[str] = "ffill",
+) -> AlignedPanel:
+    """
+    거래일 인덱스를 가진 시계열들을 하나의 union 거래일 인덱스에 정렬한다.
+
+    :param series_list: to_session_series 로 변환된 (정렬, 중복 제거된) 시계열 목록
+    :param index: 사용할 거래일 인덱스 (None이면 union 인덱스 생성)
+    :param fill: "ffill"이면 이전 거래일 값으로 채움, None이면 해당 거래일 값만 사용
+    :return: AlignedPanel(values, columns, index)
+    """
+    if fill not in FILL_METHODS:
+        raise ValueError(f"fill must be one of {FILL_METHODS}, got {fill!r}")
+
+    if index is None:
+        index = build_trading_index([s.index for s in series_list])
+    target = index.asi8
+
+    values = np.full((len(target), len(series_list)), np.nan, dtype=np.float64, order="C")
+    columns = []
+    for j, series in enumerate(series_list):
+        columns.append(str(series.name))
+        source = series.index.asi8
+        if len(source) == 0:
+            continue
+        source_values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        if fill == "ffill":
+            # target 시점 이하에서 가장 최근 관측치의 위치 (없으면 -1 → NaN 유지)
+            pos = np.searchsorted(source, target, side="right") - 1
+            valid = pos >= 0
+        else:
+            pos = np.searchsorted(source, target, side="left")
+            pos_clipped = np.minimum(pos, len(source) - 1)
+            valid = (pos < len(source)) & (source[pos_clipped] == target)
+            pos = pos_clipped
+        values[valid, j] = source_values[pos[valid]]
+
+    if fill == "ffill":
+        # 원본 시계열 중간의 NaN도 과거 값으로만 채운다
+        _ffill_columns(values)
+
+    logger.debug(f"Aligned panel: {values.shape[0]} sessions x {values.shape[1]} symbols")
+    return AlignedPanel(values=values, columns=columns, index=index)
+
+
+def _ffill_columns(values: np.ndarray):
+    """2차원 배열의 각 컬럼 NaN을 위쪽(과거) 값으로 in-place 채운다."""
+    mask = np.isnan(values)
+    if not mask.any():
+        return
+    rows = np.where(~mask, np.arange(values.shape[0])[:, None], 0)
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    filled = np.take_along_axis(values, rows, axis=0)
+    values[...] = filled
+
+
+def align_close_prices(
+        frames: Mapping[str, pd.DataFrame],
+        timezones: Optional[Dict[str, str]] = None,
+        column: str = "close",
+        fill: Optional[str] = "ffill",
+) -> AlignedPanel:
+    """
+    {symbol: DataFrame} 에서 column 값을 뽑아 거래일 패널로 정렬한다.
+    :param timezones: {symbol: 거래소 timezone}. 없는 종목은 UTC 기준 날짜를 사용
+    """
+    timezones = timezones or {}
+    series_list = []
+    for symbol, df in frames.items():
+        series = df[column].copy()
+        series.name = symbol
+        series_list.append(to_session_series(series, timezones.get(symbol)))
+    return align_panel(series_list, fill=fill)
@@ -0,0 +1,348 @@
+"""
+여러 inserter / thread 가 함께 쓰는 pymysql connection pool
+
+pymysql 연결은 thread-safe 하지 않으므로 thread 마다 pool 에서 연결을 빌려 쓰고 돌려준다.
+- min_size 개는 미리 연결해 두고, 모자라면 max_size 까지 새로 연결한다 (그 이상은 timeout 까지 대기)
+- 빌려줄 때 ping_interval 이상 쉬었던 연결은 ping 으로 확인하고, 끊겼으면 다시 연결한다
+- max_lifetime 이 지난 연결은 돌려받을 때 / 빌려줄 때 닫고 새로 연결한다
+- 사용 중 OperationalError (서버 재시작, timeout 등) 가 난 연결은 돌려받을 때 버린다
+
+    pool = shared_pool(db_params)
+    with pool.connection() as conn:
+        ...
+    inserter = RiskDataInserter(pool=pool)   # DBConnector 가 연결을 빌리고 close() 에서 돌려준다
+
+metrics() 로 대기 시간, 사용 중 연결 수, 연결 소요 시간 등을 확인할 수 있다.
+"""
+import time
+import atexit
+import threading
+import pymysql
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+from module.data.database.db_config import db_config
+from module.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_MIN_SIZE = 1
+DEFAULT_MAX_SIZE = 8
+DEFAULT_MAX_LIFETIME = 3600.0  # 초
+DEFAULT_PING_INTERVAL = 30.0  # 초
+DEFAULT_ACQUIRE_TIMEOUT = 30.0  # 초
+
+
+class PoolTimeout(Exception):
+    """timeout 안에 빌릴 수 있는 연결이 없을 때"""
+
+
+class PoolClosed(Exception):
+    """close() 된 pool 에서 연결을 빌리려 할 때"""
+
+
+class ConnectionPool:
+    def __init__(
+            self,
+            host=None,
+            user=None,
+            password=None,
+            db=None,
+            port=None,
+            min_size: int = DEFAULT_MIN_SIZE,
+            max_size: int = DEFAULT_MAX_SIZE,
+            max_lifetime: float = DEFAULT_MAX_LIFETIME,
+            ping_interval: float = DEFAULT_PING_INTERVAL,
+            timeout: float = DEFAULT_ACQUIRE_TIMEOUT,
+            local_infile: bool = False,
+    ):
+        """
+        :param host, user, password, db, port: DBConnector 와 같음 (None 이면 db_config 기본값)
+        :param min_size: 미리 열어 두는 연결 수
+        :param max_size: 동시에 열 수 있는 최대 연결 수
+        :param max_lifetime: 연결을 다시 만들기까지의 최대 수명 (초)
+        :param ping_interval: 이 시간 이상 쉬었던 연결은 빌려주기 전에 ping 으로 확인 (초)
+        :param timeout: acquire 기본 대기 시간 (초)
+        :param local_infile: LOAD DATA LOCAL INFILE 허용 여부
+        """
+        if not 0 <= min_size <= max_size or max_size < 1:
+            raise ValueError(f"Invalid pool size: min_size={min_size}, max_size={max_size}")
+        self.connect_kwargs = dict(
+            host=host if host is not None else db_config["host"],
+            user=user if user is not None else db_config["user"],
+            password=password if password is not None else db_config["password"],
+            db=db if db is not None else db_config["database"],
+            port=port if port is not None else db_config["port"],
+            cursorclass=pymysql.cursors.DictCursor,
+            client_flag=pymysql.constants.CLIENT.MULTI_STATEMENTS,
+            local_infile=local_infile,
+        )
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.ping_interval = ping_interval
+        self.timeout = timeout
+
+        self._cond = threading.Condition()
+        self._idle = deque()  # (connection, 생성 시각, 마지막 반납 시각)
+        self._created_at: Dict[int, float] = {}  # id(connection) → 생성 시각 (빌려준 연결 포함)
+        self._size = 0  # 열려 있는 연결 수 (idle + 사용 중 + 연결 중)
+        self._closed = False
+        self._stats = {
+            "acquires": 0,
+            "waits": 0,
+            "wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+            "timeouts": 0,
+            "connects": 0,
+            "connect_errors": 0,
+            "connect_seconds": 0.0,
+            "max_connect_seconds": 0.0,
+            "reconnects": 0,
+            "discarded": 0,
+            "peak_in_use": 0,
+        }
+
+        for _ in range(min_size):
+            try:
+                conn, created = self._create()
+            except pymysql.MySQLError as e:
+                logger.error(f"Error pre-connecting pool to {self.connect_kwargs['host']}: {e}")
+                break
+            with self._cond:
+                self._size += 1
+                self._idle.append((conn, created, created))
+
+    @classmethod
+    def from_params(cls, db_params: dict, **kwargs) -> "ConnectionPool":
+        """db_config.yaml 의 db dict (host, user, password, database, port) 로 생성"""
+        return cls(
+            host=db_params["host"],
+            user=db_params["user"],
+            password=db_params["password"],
+            db=db_params["database"],
+            port=db_params["port"],
+            **kwargs,
+        )
+
+    @property
+    def in_use(self) -> int:
+        with self._cond:
+            return self._size - len(self._idle)
+
+    def _create(self) -> Tuple[pymysql.connections.Connection, float]:
+        started = time.perf_counter()
+        try:
+            conn = pymysql.connect(**self.connect_kwargs)
+        except pymysql.MySQLError:
+            with self._cond:
+                self._stats["connect_errors"] += 1
+            raise
+        elapsed = time.perf_counter() - started
+        created = time.monotonic()
+        with self._cond:
+            self._created_at[id(conn)] = created
+            self._stats["connects"] += 1
+            self._stats["connect_seconds"] += elapsed
+            self._stats["max_connect_seconds"] = max(self._stats["max_connect_seconds"], elapsed)
+        logger.debug(f"Pool connected to {self.connect_kwargs['host']} in {elapsed * 1000:.1f}ms")
+        return conn, created
+
+    def _dispose(self, conn):
+        """연결을 닫는다 (pool 크기는 호출한 쪽에서 줄인다)"""
+        with self._cond:
+            self._created_at.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception as e:
+            logger.debug(f"Ignoring error while closing pooled connection: {e}")
+
+    def _healthy(self, conn, created: float, released: float) -> bool:
+        now = time.monotonic()
+        if now - created > self.max_lifetime:
+            return False
+        if now - released < self.ping_interval:
+            return True
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Exception as e:
+            logger.debug(f"Pooled connection failed health check: {e}")
+            return False
+
+    def acquire(self, timeout: Optional[float] = None):
+        """
+        연결을 빌린다. 반드시 release() 로 돌려줄 것 (또는 connection() context manager 사용)
+        :param timeout: None 이면 pool 의 timeout
+        :raises PoolTimeout: timeout 안에 연결을 얻지 못함
+        :raises pymysql.MySQLError: 새 연결 생성 실패
+        """
+        timeout = self.timeout if timeout is None else timeout
+        started = time.perf_counter()
+        deadline = time.monotonic() + timeout
+        waited = False
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise PoolClosed("Connection pool is closed.")
+                    if self._idle:
+                        conn, created, released = self._idle.pop()  # 최근에 쓴 연결부터 (LIFO)
+                        break
+                    if self._size < self.max_size:
+                        conn = None
+                        self._size += 1  # 연결하는 동안 자리를 먼저 잡아 둔다
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeout(f"No connection available within {timeout:.1f}s "
+                                          f"(max_size={self.max_size})")
+                    waited = True
+                    self._cond.wait(remaining)
+
+            if conn is None:
+                try:
+                    conn, _ = self._create()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+            elif not self._healthy(conn, created, released):
+                self._dispose(conn)
+                with self._cond:
+                    self._size -= 1
+                    self._stats["reconnects"] += 1
+                continue
+            break
+
+        elapsed = time.perf_counter() - started
+        with self._cond:
+            self._stats["acquires"] += 1
+            if waited:
+                self._stats["waits"] += 1
+            self._stats["wait_seconds"] += elapsed
+            self._stats["max_wait_seconds"] = max(self._stats["max_wait_seconds"], elapsed)
+            self._stats["peak_in_use"] = max(self._stats["peak_in_use"], self._size - len(self._idle))
+        return conn
+
+    def release(self, conn, discard: bool = False):
+        """
+        빌린 연결을 돌려준다. 열린 트랜잭션은 rollback 된다.
+        :param discard: True 이면 재사용하지 않고 닫는다 (OperationalError 등으로 상태를 믿을 수 없을 때)
+        """
+        if conn is None:
+            return
+        created = self._created_at.get(id(conn), 0.0)
+        if not discard:
+            try:
+                conn.rollback()
+            except Exception:
+                discard = True
+        expired = time.monotonic() - created > self.max_lifetime
+        with self._cond:
+            if discard or expired or self._closed:
+                self._size -= 1
+                if discard:
+                    self._stats["discarded"] += 1
+                conn_to_close = conn
+            else:
+                self._idle.append((conn, created, time.monotonic()))
+                conn_to_close = None
+            self._cond.notify()
+        if conn_to_close is not None:
+            self._dispose(conn_to_close)
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        """
+        with pool.connection() as conn: ...
+        블록 안에서 OperationalError 가 나면 연결을 버리고 예외를 다시 던진다.
+        """
+        conn = self.acquire(timeout)
+        discard = False
+        try:
+            yield conn
+        except pymysql.err.OperationalError:
+            discard = True
+            raise
+        finally:
+            self.release(conn, discard=discard)
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        :return: size / idle / in_use 와 누적 통계
+                 (acquires, waits, avg_wait_ms, max_wait_ms, timeouts, connects, connect_errors,
+                  avg_connect_ms, max_connect_ms, reconnects, discarded, peak_in_use)
+        """
+        with self._cond:
+            stats = dict(self._stats)
+            size, idle = self._size, len(self._idle)
+        return {
+            "size": size,
+            "idle": idle,
+            "in_use": size - idle,
+            "peak_in_use": stats["peak_in_use"],
+            "acquires": stats["acquires"],
+            "waits": stats["waits"],
+            "avg_wait_ms": stats["wait_seconds"] / max(1, stats["acquires"]) * 1000,
+            "max_wait_ms": stats["max_wait_seconds"] * 1000,
+            "timeouts": stats["timeouts"],
+            "connects": stats["connects"],
+            "connect_errors": stats["connect_errors"],
+            "avg_connect_ms": stats["connect_seconds"] / max(1, stats["connects"]) * 1000,
+            "max_connect_ms": stats["max_connect_seconds"] * 1000,
+            "reconnects": stats["reconnects"],
+            "discarded": stats["discarded"],
+        }
+
+    def log_metrics(self):
+        m = self.metrics()
+        logger.info(
+            f"Pool {self.connect_kwargs['host']}: size={m['size']} in_use={m['in_use']} peak={m['peak_in_use']} "
+            f"acquires={m['acquires']} waits={m['waits']} avg_wait={m['avg_wait_ms']:.1f}ms "
+            f"connects={m['connects']} avg_connect={m['avg_connect_ms']:.1f}ms "
+            f"reconnects={m['reconnects']} discarded={m['discarded']}"
+        )
+
+    def close(self):
+        """idle 연결을 모두 닫는다. 사용 중인 연결은 release() 될 때 닫힌다."""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn, _, _ in idle:
+            self._dispose(conn)
+        if idle:
+            logger.info(f"Connection pool closed ({len(idle)} idle connections).")
+
+
+# --------------------------- 프로세스 전역 pool ---------------------------
+_SHARED_POOLS: Dict[tuple, ConnectionPool] = {}
+_SHARED_LOCK = threading.Lock()
+
+
+def shared_pool(db_params: dict, **kwargs) -> ConnectionPool:
+    """
+    (host, port, user, database) 별로 하나씩 만든 프로세스 전역 pool.
+    같은 DB 를 쓰는 스크립트 / inserter / thread 가 연결을 함께 쓴다. 프로세스 종료 시 닫힌다.
+    :param kwargs: 처음 만들 때만 적용되는 ConnectionPool 옵션 (min_size, max_size, ...)
+    """
+    key = (db_params["host"], db_params["port"], db_params["user"], db_params["database"])
+    with _SHARED_LOCK:
+        pool = _SHARED_POOLS.get(key)
+        if pool is None or pool._closed:
+            pool = _SHARED_POOLS[key] = ConnectionPool.from_params(db_params, **kwargs)
+        return pool
+
+
+@atexit.register
+def close_shared_pools():
+    with _SHARED_LOCK:
+        pools = list(_SHARED_POOLS.values())
+        _SHARED_POOLS.clear()
+    for pool in pools:
+        pool.close()
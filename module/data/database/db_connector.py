@@ -1,4 +1,3 @@
-import logging
 import pymysql
 from abc import ABC, abstractmethod
 from module.data.database.db_config import db_config
@@ -6,14 +5,26 @@ from module.logger import get_logger
 
 logger = get_logger(__name__)
 
+# 연결이 끊긴 경우의 오류 코드 (server has gone away, lost connection, lost connection - packet)
+CONNECTION_LOST_ERRORS = {2006, 2013, 2055}
+
+
+def is_connection_lost(error: Exception) -> bool:
+    """다시 연결하면 되는 오류인지 (lock wait timeout / deadlock 등은 False)"""
+    return isinstance(error, pymysql.MySQLError) and bool(error.args) and error.args[0] in CONNECTION_LOST_ERRORS
+
 
 class DBConnector(ABC):
     """
     pymysql을 이용한 DB 접속 및 기본적인 쿼리 실행을 담당하는 추상 클래스.
     구체적인 select, update, delete 로직은 하위 클래스에서 구현해야 한다.
+    pool 을 주면 직접 연결하지 않고 pool 에서 연결을 빌리며, close() 에서 돌려준다.
+    (pymysql 연결은 thread 간에 공유할 수 없으므로 thread 마다 inserter 를 따로 만든다)
+    connection 을 주면 이미 빌린 연결을 함께 쓴다 (module.data.database.sync_runner 의 종목 단위 트랜잭션).
     """
 
-    def __init__(self, host=None, user=None, password=None, db=None, port=None):
+    def __init__(self, host=None, user=None, password=None, db=None, port=None, pool=None, local_infile=False,
+                 connection=None, in_transaction=False):
         """
         DBConnector 생성자.
 
@@ -22,7 +33,23 @@ class DBConnector(ABC):
         :param password: DB 접속 패스워드(기본값: db_config['password'])
         :param db: 접속할 DB 이름(기본값: db_config['database'])
         :param port: DB 포트(기본값: db_config['port'])
-        """
+        :param pool: module.data.database.connection_pool.ConnectionPool (주면 접속 정보 인자는 무시)
+        :param local_infile: LOAD DATA LOCAL INFILE 허용 여부 (초기 대량 적재용, 기본 False)
+        :param connection: 함께 쓸 연결 (주면 접속 / pool 인자는 무시하고, close() 에서 닫거나 돌려주지 않는다)
+        :param in_transaction: True 이면 write 메서드가 commit 하지 않고 오류를 다시 던진다
+                               (commit / rollback 은 연결을 준 쪽에서 한 번에 한다)
+        """
+        self.pool = pool
+        self.local_infile = local_infile
+        self.in_transaction = in_transaction
+        self.shared_connection = connection is not None
+        self.connection = connection
+        if connection is not None:
+            return
+        if pool is not None:
+            self._borrow()
+            return
+
         # 인자가 None이면 db_config에서 기본값을 가져온다.
         if host is None:
             host = db_config['host']
@@ -35,9 +62,16 @@ class DBConnector(ABC):
         if port is None:
             port = db_config['port']
 
-        self.connection = None
+        self._connect_args = (host, user, password, db, port)
         self._connect(host, user, password, db, port)
 
+    def _borrow(self):
+        try:
+            self.connection = self.pool.acquire()
+        except Exception as e:
+            logger.error(f"Error borrowing connection from pool: {e}")
+            self.connection = None
+
     def _connect(self, host, user, password, db, port):
         """
         실제 DB 연결을 수행하는 내부 메서드.
@@ -51,13 +85,32 @@ class DBConnector(ABC):
                 db=db,
                 port=port,
                 cursorclass=pymysql.cursors.DictCursor,
-                client_flag=pymysql.constants.CLIENT.MULTI_STATEMENTS
+                client_flag=pymysql.constants.CLIENT.MULTI_STATEMENTS,
+                local_infile=self.local_infile
             )
             logger.info("Database connection established.")
         except pymysql.MySQLError as e:
             logger.error(f"Error connecting to database: {e}")
             self.connection = None
 
+    def reconnect(self):
+        """
+        끊긴 연결을 버리고 다시 연결한다 (pool 사용 시 새 연결을 빌린다).
+        OperationalError (서버 재시작, wait_timeout 초과 등) 이후 호출한다.
+        """
+        if self.pool is not None:
+            self.pool.release(self.connection, discard=True)
+            self.connection = None
+            self._borrow()
+            return
+        if self.connection:
+            try:
+                self.connection.close()
+            except Exception:
+                pass
+        self.connection = None
+        self._connect(*self._connect_args)
+
     def __enter__(self):
         """
         with문 진입 시 호출되는 매직 메서드.
@@ -90,13 +143,53 @@ class DBConnector(ABC):
         try:
             with self.connection.cursor() as cursor:
                 cursor.execute(query, params)
-                self.connection.commit()
+                self.commit()
                 return cursor.fetchall()
+        except pymysql.err.OperationalError as e:
+            if not is_connection_lost(e):
+                # lock wait timeout (1205) / deadlock (1213) 등은 연결이 살아 있으므로 다시 연결하지 않는다
+                self.abort(e)
+                logger.error(f"Error executing query: {e}")
+                return []
+            if self.shared_connection:
+                # 함께 쓰는 연결은 빌려준 쪽이 버리거나 다시 시도한다
+                if self.in_transaction:
+                    raise
+                logger.error(f"Error executing query: {e}")
+                return []
+            # 연결이 끊긴 경우 한 번 다시 연결해 재시도
+            logger.warning(f"Connection lost, reconnecting: {e}")
+            self.reconnect()
+            if not self.connection:
+                return []
+            try:
+                with self.connection.cursor() as cursor:
+                    cursor.execute(query, params)
+                    self.connection.commit()
+                    return cursor.fetchall()
+            except pymysql.MySQLError as e:
+                logger.error(f"Error executing query: {e}")
+                self.connection.rollback()
+                return []
         except pymysql.MySQLError as e:
+            self.abort(e)
             logger.error(f"Error executing query: {e}")
-            self.connection.rollback()
             return []
 
+    def commit(self):
+        """write 메서드의 commit (in_transaction 이면 연결을 준 쪽이 commit 하므로 하지 않는다)"""
+        if not self.in_transaction:
+            self.connection.commit()
+
+    def abort(self, error: Exception):
+        """
+        write 메서드의 오류 처리. in_transaction 이면 error 를 다시 던져 트랜잭션 전체를 rollback / 재시도하게 하고,
+        아니면 rollback 만 한다 (호출한 메서드가 로그를 남기고 다음 batch 를 계속한다).
+        """
+        if self.in_transaction:
+            raise error
+        self.connection.rollback()
+
     def get_last_insert_id(self):
         """
         최근에 AUTO_INCREMENT가 적용된 레코드의 ID를 가져온다.
@@ -140,8 +233,15 @@ class DBConnector(ABC):
 
     def close(self):
         """
-        DB 연결을 닫는다.
+        DB 연결을 닫는다 (pool 사용 시 pool 에 돌려준다. 함께 쓰는 연결은 그대로 둔다).
         """
+        if self.shared_connection:
+            self.connection = None
+            return
+        if self.pool is not None:
+            self.pool.release(self.connection)
+            self.connection = None
+            return
         if self.connection:
             try:
                 self.connection.close()
@@ -1,15 +1,26 @@
 import pymysql
+from typing import Dict, Iterable, List, NamedTuple
 from module.data.database.db_connector import DBConnector
 from module.logger import get_logger
 
 logger = get_logger(__name__)
 
+NEWS_BATCH_SIZE = 500
+
+
+class NewsBatchResult(NamedTuple):
+    inserted: int  # 새로 적재한 기사 수
+    skipped: int   # DB 에 이미 있거나 목록 안에서 중복된 기사 수
+    failed: int    # 오류로 적재하지 못한 기사 수 (rollback 된 chunk)
+
 
 class NewsDataInserter(DBConnector):
     """
     News Data Inserter 담당 클래스.
     - 기본 insert_* 메서드는 NEWS_MAIN, NEWS_COMPANY, NEWS_SENTIMENT에 특화
     - select / update / delete는 NEWS_MAIN 테이블 기준 예시
+    - insert_news_batch 는 여러 기사를 chunk 단위 한 트랜잭션으로 적재 (NEWS_API 유니크 키 필요,
+      assets/migrations/002_news_api_unique_key.sql)
     """
 
     def select(self, where: str = None):
@@ -119,3 +130,99 @@ class NewsDataInserter(DBConnector):
             cursor.execute(query, (news_id, sentiment_val, pos_str, neg_str, pub_date))
         self.connection.commit()
         logger.info(f"[NEWS_SENTIMENT] Inserted NEWS_ID={news_id}, sentiment={sentiment_val}")
+
+    # --------------------- 일괄 적재 ---------------------
+    def existing_news_ids(self, news_apis: Iterable[str]) -> Dict[str, int]:
+        """
+        NEWS_MAIN 에 이미 있는 NEWS_API → NEWS_ID (NEWS_BATCH_SIZE 개씩 IN 조회)
+        """
+        news_apis = list(dict.fromkeys(news_apis))
+        found = {}
+        with self.connection.cursor() as cursor:
+            for start in range(0, len(news_apis), NEWS_BATCH_SIZE):
+                chunk = news_apis[start:start + NEWS_BATCH_SIZE]
+                placeholders = ", ".join(["%s"] * len(chunk))
+                cursor.execute(
+                    f"SELECT NEWS_ID, NEWS_API FROM NEWS_MAIN WHERE NEWS_API IN ({placeholders})", chunk
+                )
+                found.update({row["NEWS_API"]: row["NEWS_ID"] for row in cursor.fetchall()})
+        return found
+
+    def insert_news_batch(self, articles: List[dict], company_code: str = None,
+                          chunk_size: int = NEWS_BATCH_SIZE) -> NewsBatchResult:
+        """
+        기사 목록을 NEWS_MAIN → NEWS_COMPANY → NEWS_SENTIMENT 로 적재한다.
+        - DB 에 이미 있는 NEWS_API 와 목록 안의 중복은 건너뛴다
+        - chunk 마다 multi-row INSERT 후 생성된 NEWS_ID 를 NEWS_API 로 한 번에 조회해 나머지 테이블에 사용
+          (여러 프로세스가 동시에 넣어도 NEWS_ID 가 연속이라고 가정하지 않는다)
+        - chunk 하나가 한 트랜잭션이며, 실패한 chunk 만 rollback 된다 (in_transaction 이면 오류를 다시 던진다)
+
+        :param articles: dict(title, content, pub_date, source, news_api, sentiment, pos_str, neg_str,
+                         sentiment_pub_date) 목록
+        :param company_code: 주면 NEWS_COMPANY 에 (NEWS_ID, company_code) 를 넣는다
+        :return: NewsBatchResult(inserted, skipped, failed)
+        """
+        seen = set()
+        unique = []
+        for article in articles:
+            if article["news_api"] not in seen:
+                seen.add(article["news_api"])
+                unique.append(article)
+        try:
+            existing = self.existing_news_ids(article["news_api"] for article in unique)
+        except pymysql.MySQLError as e:
+            if self.in_transaction:
+                raise
+            logger.error(f"[NewsDataInserter] Error loading existing NEWS_API keys: {e}")
+            return NewsBatchResult(0, len(articles) - len(unique), len(unique))
+        new_articles = [article for article in unique if article["news_api"] not in existing]
+        logger.info(f"[NewsDataInserter] {len(articles)} articles: {len(articles) - len(new_articles)} skipped "
+                    f"(already in DB or duplicated), {len(new_articles)} new")
+
+        inserted = failed = 0
+        for start in range(0, len(new_articles), chunk_size):
+            chunk = new_articles[start:start + chunk_size]
+            try:
+                with self.connection.cursor() as cursor:
+                    cursor.executemany(
+                        """
+                        INSERT IGNORE INTO NEWS_MAIN
+                          (TITLE, CONTENT, PUB_DATE, SOURCE, NEWS_API)
+                        VALUES
+                          (%s, %s, %s, %s, %s)
+                        """,
+                        [(a["title"], a["content"], a["pub_date"], a["source"], a["news_api"]) for a in chunk],
+                    )
+                    placeholders = ", ".join(["%s"] * len(chunk))
+                    cursor.execute(
+                        f"SELECT NEWS_ID, NEWS_API FROM NEWS_MAIN WHERE NEWS_API IN ({placeholders})",
+                        [a["news_api"] for a in chunk],
+                    )
+                    news_ids = {row["NEWS_API"]: row["NEWS_ID"] for row in cursor.fetchall()}
+                    chunk = [a for a in chunk if a["news_api"] in news_ids]
+
+                    if company_code:
+                        cursor.executemany(
+                            "INSERT IGNORE INTO NEWS_COMPANY (NEWS_ID, COMPANY_CODE) VALUES (%s, %s)",
+                            [(news_ids[a["news_api"]], company_code) for a in chunk],
+                        )
+                    cursor.executemany(
+                        """
+                        INSERT IGNORE INTO NEWS_SENTIMENT
+                         (NEWS_ID, SENTIMENT, POSITIVE_KEYWORDS, NEGATIVE_KEYWORDS, PUB_DATE)
+                        VALUES
+                         (%s, %s, %s, %s, %s)
+                        """,
+                        [
+                            (news_ids[a["news_api"]], a["sentiment"], a["pos_str"], a["neg_str"],
+                             a["sentiment_pub_date"] or a["pub_date"])
+                            for a in chunk
+                        ],
+                    )
+                self.commit()
+                inserted += len(chunk)
+            except pymysql.MySQLError as e:
+                self.abort(e)
+                failed += len(chunk)
+                logger.error(f"[NewsDataInserter] Error inserting articles {start}~{start + len(chunk)}: {e}")
+        return NewsBatchResult(inserted, len(articles) - len(new_articles), failed)
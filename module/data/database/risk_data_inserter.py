@@ -1,16 +1,70 @@
+import time
+import hashlib
 import pymysql
+import numpy as np
 import pandas as pd
+from typing import Dict, List, Tuple
 from module.data.database.db_connector import DBConnector
 from module.logger import get_logger
 
 logger = get_logger(__name__)
 
+UPSERT_CHUNK_SIZE = 1000
+RISK_COLUMNS = ["company_code", "model_name", "analysis_result", "test_date", "predict_date", "risk_score"]
+
+
+def risk_rows(df: pd.DataFrame) -> List[Tuple]:
+    """
+    DataFrame → RISK INSERT 파라미터 tuple 목록 (컬럼 단위 변환, 원본 df 는 바꾸지 않는다)
+    risk_score 는 NaN 이면 0.0, 소수 4자리로 반올림
+    """
+    scores = np.round(pd.to_numeric(df["risk_score"], errors="coerce").fillna(0.0).to_numpy(dtype=np.float64), 4)
+    return list(zip(
+        df["company_code"].astype(str).tolist(),
+        df["model_name"].astype(str).tolist(),
+        df["analysis_result"].astype(str).tolist(),
+        df["test_date"].astype(str).tolist(),  # "YYYY-MM-DD"
+        df["predict_date"].astype(str).tolist(),  # "YYYY-MM-DD"
+        scores.tolist(),
+    ))
+
+
+def risk_checksum(df: pd.DataFrame) -> str:
+    """적재할 행 내용의 sha1 (SYNC_STATE.LAST_FILE_CHECKSUM - 지난 적재와 같으면 건너뜀)"""
+    digest = hashlib.sha1()
+    for row in risk_rows(df):
+        digest.update(repr(row).encode("utf-8"))
+    return digest.hexdigest()
+
+
+RISK_KEY_COLUMNS = ["model_name", "test_date", "predict_date"]
+
+
+def diff_risk(df: pd.DataFrame, existing: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, int]]:
+    """
+    종목 하나의 risk 행을 DB 의 값(select_risk_scores)과 비교한다.
+    :return: (써야 할 행 - DB 에 없거나 analysis_result / risk_score 가 다른 행, {"new", "changed", "unchanged"})
+    """
+    keys = df[RISK_KEY_COLUMNS].astype(str)
+    merged = keys.merge(existing, on=RISK_KEY_COLUMNS, how="left", indicator=True)
+    new = (merged["_merge"] == "left_only").to_numpy()
+    scores = np.round(pd.to_numeric(df["risk_score"], errors="coerce").fillna(0.0).to_numpy(dtype=np.float64), 4)
+    same = (
+        np.isclose(scores, merged["risk_score"].to_numpy(dtype=np.float64), rtol=0.0, atol=5e-5)
+        & (df["analysis_result"].astype(str).to_numpy() == merged["analysis_result"].to_numpy())
+    )
+    write = new | ~same
+    stats = {"new": int(new.sum()), "changed": int((write & ~new).sum()), "unchanged": int((~write).sum())}
+    return df[write], stats
+
 
 class RiskDataInserter(DBConnector):
     """
     RISK 테이블 (COMPANY_CODE, MODEL_NAME, ANALYSIS_RESULT, TEST_DATE, PREDICT_DATE, RISK_SCORE) 삽입/업데이트 담당.
     FOREIGN KEY (COMPANY_CODE) REFERENCES COMPANY_META (COMPANY_CODE).
+    UNIQUE KEY (COMPANY_CODE, MODEL_NAME, PREDICT_DATE, TEST_DATE) - assets/migrations/001_risk_unique_key.sql
     """
+    table = "RISK"
 
     def select(self, where: str = None):
         pass
@@ -27,8 +81,8 @@ class RiskDataInserter(DBConnector):
         """
         try:
             with self.connection.cursor() as cursor:
-                sql = """
-                SELECT * FROM RISK
+                sql = f"""
+                SELECT * FROM {self.table}
                  WHERE COMPANY_CODE=%s
                    AND MODEL_NAME=%s
                    AND PREDICT_DATE=%s
@@ -40,9 +94,35 @@ class RiskDataInserter(DBConnector):
             logger.error(f"[RiskDataInserter] Error executing select_risk_rows: {e}")
             return None
 
+    def select_risk_scores(self, company_code: str, start: str = None, end: str = None) -> pd.DataFrame:
+        """
+        종목의 (model_name, test_date, predict_date, analysis_result, risk_score) (diff_risk 비교용).
+        날짜는 "YYYY-MM-DD" 문자열. 오류는 그대로 던진다 (sync_runner 가 rollback / 재시도)
+        :param start, end: PREDICT_DATE 범위 (주면 그 구간만)
+        """
+        sql = (f"SELECT MODEL_NAME, TEST_DATE, PREDICT_DATE, ANALYSIS_RESULT, RISK_SCORE FROM {self.table} "
+               "WHERE COMPANY_CODE=%s")
+        params = [company_code]
+        if start is not None:
+            sql += " AND PREDICT_DATE >= %s"
+            params.append(start)
+        if end is not None:
+            sql += " AND PREDICT_DATE <= %s"
+            params.append(end)
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        return pd.DataFrame({
+            "model_name": [row["MODEL_NAME"] for row in rows],
+            "test_date": [str(row["TEST_DATE"]) for row in rows],
+            "predict_date": [str(row["PREDICT_DATE"]) for row in rows],
+            "analysis_result": [row["ANALYSIS_RESULT"] for row in rows],
+            "risk_score": [float(row["RISK_SCORE"]) for row in rows],
+        }, columns=[*RISK_KEY_COLUMNS, "analysis_result", "risk_score"])
+
     def insert_risk_row(self, row_data: dict):
-        sql = """
-        INSERT INTO RISK
+        sql = f"""
+        INSERT INTO {self.table}
         (COMPANY_CODE, MODEL_NAME, ANALYSIS_RESULT, TEST_DATE, PREDICT_DATE, RISK_SCORE)
         VALUES (%s, %s, %s, %s, %s, %s)
         """
@@ -63,8 +143,8 @@ class RiskDataInserter(DBConnector):
             logger.error(f"[RiskDataInserter] Error inserting risk row: {e}")
 
     def update_risk_row(self, row_data: dict):
-        sql = """
-        UPDATE RISK
+        sql = f"""
+        UPDATE {self.table}
            SET ANALYSIS_RESULT=%s,
                RISK_SCORE=%s
          WHERE COMPANY_CODE=%s
@@ -88,7 +168,57 @@ class RiskDataInserter(DBConnector):
             self.connection.rollback()
             logger.error(f"[RiskDataInserter] Error updating risk row: {e}")
 
-    def insert_or_update_risk(self, df: pd.DataFrame):
+    def upsert_risk(self, df: pd.DataFrame, chunk_size: int = UPSERT_CHUNK_SIZE) -> int:
+        """
+        chunk_size 행씩 multi-row INSERT ... ON DUPLICATE KEY UPDATE 로 적재 (chunk 마다 한 트랜잭션).
+        실패한 chunk 만 rollback 되며 나머지 chunk 는 계속 적재한다 (in_transaction 이면 오류를 다시 던진다).
+        :return: 적재에 성공한 행 수
+        """
+        rows = risk_rows(df)
+        sql = f"""
+        INSERT INTO {self.table}
+        (COMPANY_CODE, MODEL_NAME, ANALYSIS_RESULT, TEST_DATE, PREDICT_DATE, RISK_SCORE)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            ANALYSIS_RESULT=VALUES(ANALYSIS_RESULT),
+            RISK_SCORE=VALUES(RISK_SCORE)
+        """
+        started = time.perf_counter()
+        written = 0
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            try:
+                with self.connection.cursor() as cursor:
+                    # pymysql 은 ON DUPLICATE KEY UPDATE 가 붙은 INSERT 도 multi-row VALUES 한 문장으로 보낸다
+                    cursor.executemany(sql, chunk)
+                self.commit()
+                written += len(chunk)
+            except pymysql.MySQLError as e:
+                self.abort(e)
+                logger.error(f"[RiskDataInserter] Error upserting rows {start}~{start + len(chunk)}: {e}")
+        elapsed = time.perf_counter() - started
+        logger.debug(f"[RiskDataInserter] Upserted {written}/{len(rows)} rows in {elapsed:.2f}s "
+                     f"({written / elapsed if elapsed > 0 else 0:.0f} rows/s)")
+        return written
+
+    def insert_or_update_risk(self, df: pd.DataFrame, chunk_size: int = UPSERT_CHUNK_SIZE) -> int:
+        """
+        :return: 적재에 성공한 행 수
+        """
+        if df.empty:
+            logger.info("[RiskDataInserter] Received empty DataFrame.")
+            return 0
+
+        missing = set(RISK_COLUMNS) - set(df.columns)
+        if missing:
+            logger.error(f"[RiskDataInserter] Missing columns in DataFrame: {missing}")
+            return 0
+        return self.upsert_risk(df, chunk_size)
+
+    def insert_or_update_risk_rowwise(self, df: pd.DataFrame):
+        """
+        (이전 방식) 행마다 SELECT 후 INSERT / UPDATE. 유니크 키 migration 전 DB 용, 벤치마크 비교용
+        """
         if df.empty:
             logger.info("[RiskDataInserter] Received empty DataFrame.")
             return
@@ -0,0 +1,73 @@
+import pymysql
+import pandas as pd
+from module.data.database.db_connector import DBConnector
+from module.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class RiskRegimeInserter(DBConnector):
+    """
+    RISK_REGIME 테이블 (COMPANY_CODE, MODEL_NAME, SEGMENT_NO, START_DATE, END_DATE, DAYS,
+    MEAN_RETURN, VOLATILITY, RISK_LEVEL, IS_OPEN) 적재 담당.
+    열린 구간이 다시 나뉘면 구간 수가 바뀌므로 (COMPANY_CODE, MODEL_NAME) 단위로 지우고 다시 넣는다.
+    """
+
+    def select(self, where: str = None):
+        pass
+
+    def update(self, data: dict, where: str):
+        pass
+
+    def delete(self, where: str):
+        pass
+
+    def replace_regimes(self, company_code: str, model_name: str, df: pd.DataFrame) -> bool:
+        """
+        :param df: regimes.csv 의 한 종목/모델 행 (module.analysis.ts.regimes.REGIME_COLUMNS)
+        """
+        rows = [
+            (
+                company_code,
+                model_name,
+                int(row.segment_no),
+                str(row.start_date),
+                str(row.end_date),
+                int(row.days),
+                round(float(row.mean_return), 8),
+                round(float(row.volatility), 8),
+                round(float(row.risk_level), 4),
+                bool(row.is_open),
+            )
+            for row in df.itertuples(index=False)
+        ]
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute(
+                    "DELETE FROM RISK_REGIME WHERE COMPANY_CODE=%s AND MODEL_NAME=%s",
+                    (company_code, model_name),
+                )
+                cursor.executemany(
+                    """
+                    INSERT INTO RISK_REGIME
+                    (COMPANY_CODE, MODEL_NAME, SEGMENT_NO, START_DATE, END_DATE, DAYS,
+                     MEAN_RETURN, VOLATILITY, RISK_LEVEL, IS_OPEN)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    """,
+                    rows,
+                )
+            self.connection.commit()
+            logger.debug(f"[RiskRegimeInserter] Replaced {len(rows)} regimes for {company_code}/{model_name}")
+            return True
+        except pymysql.MySQLError as e:
+            self.connection.rollback()
+            logger.error(f"[RiskRegimeInserter] Error replacing regimes for {company_code}: {e}")
+            return False
+
+    def insert_regimes(self, df: pd.DataFrame):
+        if df.empty:
+            logger.info("[RiskRegimeInserter] Received empty DataFrame.")
+            return
+        for (company_code, model_name), group in df.groupby(["symbol", "model_name"], sort=False):
+            if self.replace_regimes(str(company_code), str(model_name), group):
+                logger.info(f"[{company_code}] {len(group)} regimes => RISK_REGIME table.")
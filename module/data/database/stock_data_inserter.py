@@ -1,10 +1,57 @@
+import os
+import csv
+import time
+import tempfile
 import pymysql
+import numpy as np
 import pandas as pd
+from itertools import repeat
+from typing import List, Tuple
 from module.data.database.db_connector import DBConnector
+from module.data.database.stock_sync import CHECKSUM_COLUMNS, CHECKSUM_WEIGHTS, PRICE_COLUMNS, PRICE_SCALE
 from module.logger import get_logger
 
 logger = get_logger(__name__)
 
+STOCK_BATCH_SIZE = 1000
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+# LOAD DATA LOCAL INFILE 이 서버 / 클라이언트 설정으로 막힌 경우의 오류 코드 (이때만 upsert 로 대신 적재)
+# 1148 ER_NOT_ALLOWED_COMMAND, 2068 CR_LOAD_DATA_LOCAL_INFILE_REJECTED, 3948/3950 local data disabled (MySQL 8),
+# 4166 ER_LOAD_INFILE_CAPABILITY_DISABLED (MariaDB)
+LOCAL_INFILE_DISABLED_ERRORS = {1148, 2068, 3948, 3950, 4166}
+
+
+def stock_rows(company_code: str, df: pd.DataFrame) -> List[Tuple]:
+    """
+    DataFrame(date, open, high, low, close, volume) → STOCK_PRICE 파라미터 tuple 목록 (원본 df 는 바꾸지 않는다)
+    - date 는 파일에 적힌 시각 그대로 "YYYY-MM-DD HH:MM:SS" (timezone 표기는 버린다 - pymysql 의 datetime 변환과 같음)
+    - volume 은 NaN → 0, 음수 → 0 으로 바꾼 정수
+    - 가격이 NaN 인 행은 제외
+    """
+    if df.empty:
+        return []
+    prices = df[PRICE_COLUMNS].to_numpy(dtype=np.float64)
+    valid = ~np.isnan(prices).any(axis=1)
+    if pd.api.types.is_datetime64_any_dtype(df["date"]):
+        # tz 를 떼어낸 벽시계 시각 → "YYYY-MM-DDTHH:MM:SS" (strftime 보다 훨씬 빠름)
+        wall = df["date"].dt.tz_localize(None) if df["date"].dt.tz is not None else df["date"]
+        wall = wall.to_numpy()[valid].astype("datetime64[s]")
+        dates = [d.replace("T", " ") for d in np.datetime_as_string(wall).tolist()]
+    else:
+        # 문자열이거나, 서머타임 등으로 UTC offset 이 섞인 Timestamp(object dtype) 는 값마다 변환
+        dates = [pd.Timestamp(d).strftime(DATE_FORMAT) for d in df["date"].to_numpy()[valid]]
+    volume = np.clip(np.nan_to_num(pd.to_numeric(df["volume"], errors="coerce").to_numpy(dtype=np.float64)), 0, None)
+    prices = prices[valid]
+    return list(zip(
+        repeat(company_code),
+        dates,
+        prices[:, 0].tolist(),
+        prices[:, 1].tolist(),
+        prices[:, 2].tolist(),
+        prices[:, 3].tolist(),
+        volume[valid].astype(np.int64).tolist(),
+    ))
+
 
 class StockDataInserter(DBConnector):
     """
@@ -61,43 +108,159 @@ class StockDataInserter(DBConnector):
             logger.error(f"[StockDataInserter] Error executing delete: {e}")
 
     # -------------------------- 주가 데이터(STOCK_PRICE) --------------------------
-    def insert_stock_price(self, company_code: str, df: pd.DataFrame):
+    def last_price_date(self, company_code: str):
+        """종목의 마지막 DATE (없거나 오류면 None)"""
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute("SELECT MAX(DATE) AS last_date FROM STOCK_PRICE WHERE COMPANY_CODE=%s", (company_code,))
+                row = cursor.fetchone()
+                return row["last_date"] if row else None
+        except pymysql.MySQLError as e:
+            logger.error(f"[StockDataInserter] Error fetching last date for {company_code}: {e}")
+            return None
+
+    def month_checksums(self, company_code: str, since: str = None) -> pd.DataFrame:
+        """
+        월(YYYY-MM)별 (rows, price_sum, volume_sum, weighted_sum) 을 GROUP BY 로 계산 (행 자체는 가져오지 않는다).
+        module.data.database.stock_sync.month_checksums 와 같은 정수 값이다.
+        :param since: 이 월(YYYY-MM) 부터만
+        """
+        scaled = {c: f"ROUND({c.upper()} * {PRICE_SCALE})" for c in PRICE_COLUMNS}
+        weighted = " + ".join(
+            [f"{CHECKSUM_WEIGHTS[c]} * {scaled[c]}" for c in PRICE_COLUMNS]
+            + [f"{CHECKSUM_WEIGHTS['volume']} * VOLUME"]
+        )
+        sql = f"""
+        SELECT DATE_FORMAT(DATE, '%%Y-%%m') AS MONTH_KEY,
+               COUNT(*) AS N_ROWS,
+               SUM({" + ".join(scaled.values())}) AS PRICE_SUM,
+               SUM(VOLUME) AS VOLUME_SUM,
+               SUM((DAYOFMONTH(DATE) * 24 + HOUR(DATE) + 1) * ({weighted})) AS WEIGHTED_SUM
+          FROM STOCK_PRICE
+         WHERE COMPANY_CODE=%s {"AND DATE >= %s" if since else ""}
+         GROUP BY MONTH_KEY
+        """
+        params = [company_code] + ([f"{since}-01"] if since else [])
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                rows = cursor.fetchall()
+        except pymysql.MySQLError as e:
+            logger.error(f"[StockDataInserter] Error computing month checksums for {company_code}: {e}")
+            return None
+        return pd.DataFrame({
+            "month": [row["MONTH_KEY"] for row in rows],
+            "rows": [int(row["N_ROWS"]) for row in rows],
+            "price_sum": [int(row["PRICE_SUM"]) for row in rows],
+            "volume_sum": [int(row["VOLUME_SUM"]) for row in rows],
+            "weighted_sum": [int(row["WEIGHTED_SUM"]) for row in rows],
+        }, columns=["month", *CHECKSUM_COLUMNS])
+
+    def select_price_range(self, company_code: str, start=None, end=None) -> List[dict]:
         """
-        STOCK_PRICE(회사코드, date, open, high, low, close) 삽입
-        df: columns=[date, open, high, low, close]
+        [start, end] 구간의 (DATE, OPEN, HIGH, LOW, CLOSE, VOLUME), DATE 오름차순. 오류면 빈 목록
         """
+        sql = "SELECT DATE, OPEN, HIGH, LOW, CLOSE, VOLUME FROM STOCK_PRICE WHERE COMPANY_CODE=%s"
+        params = [company_code]
+        if start is not None:
+            sql += " AND DATE >= %s"
+            params.append(start)
+        if end is not None:
+            sql += " AND DATE <= %s"
+            params.append(end)
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute(sql + " ORDER BY DATE", params)
+                return list(cursor.fetchall())
+        except pymysql.MySQLError as e:
+            logger.error(f"[StockDataInserter] Error selecting prices for {company_code}: {e}")
+            return []
+
+    def upsert_stock_price(self, company_code: str, df: pd.DataFrame, batch_size: int = STOCK_BATCH_SIZE) -> int:
+        """
+        batch_size 행씩 multi-row INSERT ... ON DUPLICATE KEY UPDATE (batch 마다 한 트랜잭션).
+        이미 있는 (COMPANY_CODE, DATE) 는 값을 갱신하므로 같은 파일을 다시 넣어도 결과가 같고,
+        실패한 batch 만 rollback 된다 (in_transaction 이면 commit 하지 않고 오류를 다시 던진다).
+        :return: 적재에 성공한 행 수
+        """
+        rows = stock_rows(company_code, df)
+        if not rows:
+            logger.info(f"[StockDataInserter] No rows to insert for {company_code}.")
+            return 0
+
         query = """
         INSERT INTO STOCK_PRICE (COMPANY_CODE, DATE, OPEN, HIGH, LOW, CLOSE, VOLUME)
         VALUES (%s, %s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            OPEN=VALUES(OPEN), HIGH=VALUES(HIGH), LOW=VALUES(LOW), CLOSE=VALUES(CLOSE), VOLUME=VALUES(VOLUME)
         """
-        rows = []
-
-        df["volume"] = df["volume"].fillna(0)
-        df["volume"] = df["volume"].clip(lower=0)
-        df["volume"] = df["volume"].astype(int)
-
-        for _, row in df.iterrows():
-            dt_val = row["date"]
-            if hasattr(dt_val, "to_pydatetime"):
-                dt_val = dt_val.to_pydatetime()
-            rows.append((
-                company_code,
-                dt_val,
-                float(row["open"]),
-                float(row["high"]),
-                float(row["low"]),
-                float(row["close"]),
-                float(row["volume"])
-            ))
+        started = time.perf_counter()
+        written = 0
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            try:
+                with self.connection.cursor() as cursor:
+                    cursor.executemany(query, batch)
+                self.commit()
+                written += len(batch)
+            except pymysql.MySQLError as e:
+                self.abort(e)
+                logger.error(f"[StockDataInserter] Error upserting {company_code} rows {start}~{start + len(batch)}: {e}")
+        elapsed = time.perf_counter() - started
+        logger.info(f"[{company_code}] Upserted {written}/{len(rows)} rows into STOCK_PRICE in {elapsed:.2f}s "
+                    f"({written / elapsed if elapsed > 0 else 0:.0f} rows/s)")
+        return written
 
+    def insert_stock_price(self, company_code: str, df: pd.DataFrame, batch_size: int = STOCK_BATCH_SIZE) -> int:
+        """
+        STOCK_PRICE(회사코드, date, open, high, low, close, volume) 삽입 (upsert_stock_price 와 같음)
+        df: columns=[date, open, high, low, close, volume]
+        :return: 적재에 성공한 행 수
+        """
+        return self.upsert_stock_price(company_code, df, batch_size)
+
+    def load_stock_price_infile(self, company_code: str, df: pd.DataFrame) -> int:
+        """
+        초기 적재(backfill)용 LOAD DATA LOCAL INFILE ... REPLACE. 임시 CSV 를 서버로 한 번에 보낸다.
+        local_infile=True 로 연결해야 하며, 서버가 허용하지 않으면 upsert_stock_price 로 대신 적재한다.
+        :return: 적재한 행 수
+        """
+        rows = stock_rows(company_code, df)
         if not rows:
-            logger.info(f"[StockDataInserter] No rows to insert for {company_code}.")
-            return
+            logger.info(f"[StockDataInserter] No rows to load for {company_code}.")
+            return 0
+
+        started = time.perf_counter()
+        fd, path = tempfile.mkstemp(prefix=f"stock_{company_code}_", suffix=".csv")
         try:
+            with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+                csv.writer(f, lineterminator="\n").writerows(rows)
             with self.connection.cursor() as cursor:
-                cursor.executemany(query, rows)
-            self.connection.commit()
-            logger.info(f"[{company_code}] Inserted {len(rows)} rows into STOCK_PRICE.")
+                cursor.execute(
+                    """
+                    LOAD DATA LOCAL INFILE %s REPLACE INTO TABLE STOCK_PRICE
+                    FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"'
+                    LINES TERMINATED BY '\\n'
+                    (COMPANY_CODE, DATE, OPEN, HIGH, LOW, CLOSE, VOLUME)
+                    """,
+                    (path,),
+                )
+            self.commit()
         except pymysql.MySQLError as e:
-            self.connection.rollback()
-            logger.error(f"[StockDataInserter] Error inserting stock price: {e}")
+            if not (e.args and e.args[0] in LOCAL_INFILE_DISABLED_ERRORS):
+                # deadlock / lock wait timeout 등은 다른 write 메서드와 같이 abort 로 (in_transaction 이면 다시 던짐)
+                self.abort(e)
+                logger.error(f"[StockDataInserter] LOAD DATA LOCAL INFILE failed for {company_code}: {e}")
+                return 0
+            # 실패한 문장은 아무것도 바꾸지 않았으므로 함께 쓰는 트랜잭션은 rollback 하지 않는다
+            if not self.in_transaction:
+                self.connection.rollback()
+            logger.warning(f"[StockDataInserter] LOAD DATA LOCAL INFILE is disabled ({e}), "
+                           f"falling back to batched upsert for {company_code}.")
+            return self.upsert_stock_price(company_code, df)
+        finally:
+            os.remove(path)
+        elapsed = time.perf_counter() - started
+        logger.info(f"[{company_code}] Loaded {len(rows)} rows into STOCK_PRICE in {elapsed:.2f}s "
+                    f"({len(rows) / elapsed if elapsed > 0 else 0:.0f} rows/s)")
+        return len(rows)
@@ -0,0 +1,236 @@
+"""
+로컬 주가 chunk 파일 ↔ STOCK_PRICE 동기화 도구
+
+- load_local_prices : 종목 폴더의 CSV 를 (date, open, high, low, close, volume) 한 DataFrame 으로
+- db_prices         : StockDataInserter.select 결과(list[dict]) → 같은 형식의 DataFrame
+- diff_stock_prices : 두 DataFrame 을 date 로 맞춰 값이 바뀐 행(가격 isclose, volume 정확히 비교)과
+                      DB 에 없는 행을 한 번에 골라낸다 (행마다 비교 / UPDATE 하지 않는다)
+- chunk_files_since : watermark 이후 데이터가 들어 있을 수 있는 chunk 파일만 (SYNC_STATE, module.data.database.sync_state)
+- files_fingerprint : 파일 이름 / 크기 / 수정 시각 fingerprint (같으면 읽지 않고 건너뜀)
+- prices_since      : 위 둘을 묶어 watermark 이후 파일만 읽는다
+- month_checksums   : 월별 정수 checksum. DB 쪽은 StockDataInserter.month_checksums 가 GROUP BY 로 같은 값을 계산하므로
+                      checksum 이 다른 월의 행만 가져와 비교하면 된다 (scripts/reconcile_stock_price.py)
+
+date 는 tz 정보를 뗀 벽시계 시각으로 맞춘다 (pymysql 이 DB 에 보내는 값과 같음).
+"""
+import os
+import glob
+import hashlib
+import warnings
+import numpy as np
+import pandas as pd
+from typing import List, Optional, Tuple
+from module.data.providers.core import CHUNK_FILE_PATTERN, chunk_last_dates
+from module.logger import get_logger
+
+logger = get_logger(__name__)
+
+PRICE_COLUMNS = ["open", "high", "low", "close"]
+OHLCV_COLUMNS = PRICE_COLUMNS + ["volume"]
+PRICE_ATOL = 1e-4  # STOCK_PRICE 는 DECIMAL(12, 4)
+
+
+def wall_clock(dates: pd.Series) -> pd.Series:
+    """tz 정보를 뗀 벽시계 시각 (UTC offset 이 섞인 object dtype 도 처리)"""
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        return dates.dt.tz_localize(None) if dates.dt.tz is not None else dates
+    parsed = [pd.Timestamp(d) for d in dates]
+    return pd.Series(
+        [d.tz_localize(None) if d is not pd.NaT and d.tzinfo is not None else d for d in parsed],
+        index=dates.index,
+        dtype="datetime64[ns]",
+    )
+
+
+def parse_wall_clock(values: pd.Series) -> pd.Series:
+    """문자열 날짜 → 벽시계 시각 (파싱 실패는 NaT)"""
+    with warnings.catch_warnings():
+        # 서머타임으로 offset 이 섞인 문자열은 object dtype 으로 파싱된다 (wall_clock 에서 값마다 처리)
+        warnings.simplefilter("ignore", FutureWarning)
+        parsed = pd.to_datetime(values, errors="coerce")
+    return wall_clock(parsed)
+
+
+def load_local_prices(folder_path: str, files: List[str] = None) -> pd.DataFrame:
+    """
+    :param files: 읽을 CSV 목록 (None 이면 폴더의 *.csv 전체)
+    :return: date 오름차순, date 중복은 나중 파일 값을 사용한 (date, open, high, low, close, volume)
+    """
+    files = sorted(glob.glob(os.path.join(folder_path, "*.csv"))) if files is None else files
+    frames = []
+    for csv_file in files:
+        part = pd.read_csv(csv_file)
+        part.columns = part.columns.str.lower()
+        frames.append(part)
+    if not frames:
+        return pd.DataFrame(columns=["date", *OHLCV_COLUMNS])
+    df = pd.concat(frames, ignore_index=True)
+    df["date"] = parse_wall_clock(df["date"])
+    df = df.dropna(subset=["date"])
+    df = df.drop_duplicates(subset="date", keep="last").sort_values("date")
+    return df[["date", *OHLCV_COLUMNS]].reset_index(drop=True)
+
+
+def chunk_files_since(folder_path: str, since=None) -> List[str]:
+    """
+    since(벽시계 시각) 이후 행이 있을 수 있는 CSV 파일 목록 (파일명 순).
+    "{YYYY-MM-01}_chunk{n}.csv" 파일은 한 파일이 다음 달 이후까지 이어질 수 있으므로 실제 마지막 날짜
+    (chunk_last_dates, ProviderDataPipeline.iter_chunks 와 같은 규칙)가 since 의 하루 전보다 이르면 건너뛴다.
+    마지막 날짜를 알 수 없는 파일과 이름 규칙이 다른 CSV 는 항상 포함한다.
+    """
+    files = sorted(glob.glob(os.path.join(folder_path, "*.csv")))
+    if since is None:
+        return files
+    chunks, others = [], []
+    for path in files:
+        match = CHUNK_FILE_PATTERN.match(os.path.basename(path))
+        if match:
+            chunks.append((pd.Timestamp(match.group(1)), int(match.group(2)), path))
+        else:
+            others.append(path)
+    chunks.sort()
+    last_dates = chunk_last_dates([path for _, _, path in chunks])
+    # 마지막 날짜는 UTC, since 는 벽시계 시각이므로 하루 여유를 둔다
+    cutoff = pd.Timestamp(since) - pd.Timedelta(days=1)
+    selected = [
+        path for _, _, path in chunks
+        if last_dates[path] is None or last_dates[path].tz_localize(None) >= cutoff
+    ]
+    return selected + others
+
+
+def files_fingerprint(paths: List[str]) -> str:
+    """파일 이름 / 크기 / 수정 시각 기반 sha1 (SYNC_STATE.LAST_FILE_CHECKSUM)"""
+    digest = hashlib.sha1()
+    for path in sorted(paths):
+        stat = os.stat(path)
+        digest.update(f"{os.path.basename(path)}|{stat.st_size}|{stat.st_mtime_ns}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def prices_since(folder_path: str, since=None, checksum: str = None) -> Tuple[Optional[pd.DataFrame], List[str]]:
+    """
+    watermark(since, checksum) 이후 행이 있을 수 있는 파일만 읽는다 (since 이전 행도 같은 파일에 있으면 포함).
+    :return: (load_local_prices 형식 DataFrame, 읽은 파일 목록).
+             대상 파일 fingerprint 가 checksum 과 같으면 (None, 파일 목록) - 읽지 않음
+    """
+    files = chunk_files_since(folder_path, since)
+    if checksum is not None and files_fingerprint(files) == checksum:
+        return None, files
+    return load_local_prices(folder_path, files), files
+
+
+def watermark_checksum(folder_path: str, files_read: List[str], since) -> str:
+    """
+    새 watermark(since) 기준 다음 실행의 대상 파일 fingerprint. 읽는 동안 새로 생긴 파일은 빼서
+    다음 실행에서 fingerprint 가 달라지도록 한다 (그 파일을 건너뛰지 않음).
+    """
+    read = set(files_read)
+    return files_fingerprint([path for path in chunk_files_since(folder_path, since) if path in read])
+
+
+def valid_price_rows(df: pd.DataFrame) -> int:
+    """적재 대상 행 수 (가격이 NaN 인 행은 stock_rows 에서 빠진다)"""
+    return int(df[PRICE_COLUMNS].notna().all(axis=1).sum())
+
+
+def db_prices(rows: List[dict]) -> pd.DataFrame:
+    """StockDataInserter.select 결과 → (date, open, high, low, close, volume) (DECIMAL → float)"""
+    if not rows:
+        return pd.DataFrame(columns=["date", *OHLCV_COLUMNS])
+    df = pd.DataFrame(rows)
+    df.columns = df.columns.str.lower()
+    out = pd.DataFrame({"date": pd.to_datetime(df["date"])})
+    for column in OHLCV_COLUMNS:
+        out[column] = pd.to_numeric(df[column], errors="coerce").astype(np.float64)
+    return out
+
+
+def diff_stock_prices(local: pd.DataFrame, db: pd.DataFrame, atol: float = PRICE_ATOL) -> Tuple[pd.DataFrame, dict]:
+    """
+    :param local: load_local_prices 형식 (비교 범위로 미리 잘라서 전달)
+    :param db: db_prices 형식
+    :return: (DB 에 써야 할 local 행 - 값이 바뀌었거나 DB 에 없는 행,
+              {"compared", "missing", "price_changed", "volume_changed"})
+    """
+    merged = local.merge(db, on="date", how="left", suffixes=("", "_db"), indicator=True)
+    missing = (merged["_merge"] == "left_only").to_numpy()
+
+    local_prices = merged[PRICE_COLUMNS].to_numpy(dtype=np.float64)
+    remote_prices = merged[[f"{c}_db" for c in PRICE_COLUMNS]].to_numpy(dtype=np.float64)
+    price_changed = ~np.isclose(local_prices, remote_prices, rtol=0.0, atol=atol, equal_nan=True).all(axis=1)
+
+    # DB 는 NaN / 음수 volume 을 0 으로 저장한다 (stock_rows 와 같은 규칙)
+    local_volume = np.clip(np.nan_to_num(merged["volume"].to_numpy(dtype=np.float64)), 0, None).astype(np.int64)
+    db_volume = np.nan_to_num(merged["volume_db"].to_numpy(dtype=np.float64)).astype(np.int64)
+    volume_changed = local_volume != db_volume
+
+    changed = missing | price_changed | volume_changed
+    stats = {
+        "compared": int((~missing).sum()),
+        "missing": int(missing.sum()),
+        "price_changed": int((price_changed & ~missing).sum()),
+        "volume_changed": int((volume_changed & ~missing).sum()),
+    }
+    return merged.loc[changed, ["date", *OHLCV_COLUMNS]].reset_index(drop=True), stats
+
+
+# --------------------------- 월별 checksum ---------------------------
+CHECKSUM_COLUMNS = ["rows", "price_sum", "volume_sum", "weighted_sum"]
+PRICE_SCALE = 10000  # DECIMAL(12, 4) → 정수
+# 값이 다른 컬럼 / 날짜로 옮겨가도 합이 같아지지 않도록 컬럼마다 다른 가중치를 준다
+CHECKSUM_WEIGHTS = {"open": 1, "high": 3, "low": 5, "close": 7, "volume": 11}
+
+
+def _scaled(values: np.ndarray) -> np.ndarray:
+    """DB 의 DECIMAL(12, 4) 반올림(half away from zero)과 같은 정수 값 (float 오차는 1e-6 단위까지 흡수)"""
+    return (np.sign(values) * np.floor(np.abs(values) * PRICE_SCALE + 0.5 + 1e-6)).astype(np.int64)
+
+
+def month_checksums(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    load_local_prices 형식 → 월(YYYY-MM)별 (rows, price_sum, volume_sum, weighted_sum).
+    StockDataInserter.month_checksums 의 GROUP BY 결과와 같은 정수 값이다.
+    weighted_sum = Σ (일*24 + 시 + 1) * Σ_컬럼 가중치 * 값 (값이 다른 날짜 / 컬럼으로 바뀐 경우도 검출)
+    가격이 NaN 인 행은 DB 에 적재되지 않으므로 (stock_rows / valid_price_rows) 빼고 계산한다.
+    """
+    df = df[df[PRICE_COLUMNS].notna().all(axis=1).to_numpy()]
+    if df.empty:
+        return pd.DataFrame(columns=["month", *CHECKSUM_COLUMNS])
+    prices = {c: _scaled(df[c].to_numpy(dtype=np.float64)) for c in PRICE_COLUMNS}
+    volume = np.clip(np.nan_to_num(df["volume"].to_numpy(dtype=np.float64)), 0, None).astype(np.int64)
+    slot = (df["date"].dt.day * 24 + df["date"].dt.hour + 1).to_numpy(dtype=np.int64)
+    weighted = sum(CHECKSUM_WEIGHTS[c] * prices[c] for c in PRICE_COLUMNS) + CHECKSUM_WEIGHTS["volume"] * volume
+    parts = pd.DataFrame({
+        "month": df["date"].dt.strftime("%Y-%m").to_numpy(),
+        "rows": 1,
+        "price_sum": sum(prices.values()),
+        "volume_sum": volume,
+        "weighted_sum": slot * weighted,
+    })
+    return parts.groupby("month", as_index=False).sum()
+
+
+def compare_checksums(local: pd.DataFrame, db: pd.DataFrame) -> pd.DataFrame:
+    """
+    :return: 월별 비교 결과 (month, status, local_rows, db_rows). status 는
+             "ok" / "changed"(양쪽에 있으나 값이 다름) / "local_only" / "db_only"
+    """
+    merged = local.merge(db, on="month", how="outer", suffixes=("_local", "_db"), indicator=True)
+    same = np.ones(len(merged), dtype=bool)
+    for column in CHECKSUM_COLUMNS:
+        same &= (merged[f"{column}_local"] == merged[f"{column}_db"]).to_numpy()
+    status = np.where(merged["_merge"] == "left_only", "local_only",
+                      np.where(merged["_merge"] == "right_only", "db_only", np.where(same, "ok", "changed")))
+    return pd.DataFrame({
+        "month": merged["month"],
+        "status": status,
+        "local_rows": merged["rows_local"].fillna(0).astype(np.int64),
+        "db_rows": merged["rows_db"].fillna(0).astype(np.int64),
+    }).sort_values("month").reset_index(drop=True)
+
+
+def month_range(month: str) -> Tuple[pd.Timestamp, pd.Timestamp]:
+    """YYYY-MM → (월 첫 시각, 월 마지막 초)"""
+    start = pd.Timestamp(f"{month}-01")
+    return start, start + pd.offsets.MonthBegin(1) - pd.Timedelta(seconds=1)
@@ -0,0 +1,135 @@
+"""
+종목 단위 병렬 DB 동기화 runner
+
+loader 스크립트의 종목 loop 를 여러 thread 로 나눠 실행한다. 원격 DB 처럼 왕복 지연이 대부분인 경우
+전체 시간이 종목별 시간의 합에서 대략 1/workers 로 줄어든다.
+- thread 마다 pool 에서 연결 하나를 빌려, 종목 하나(데이터 + SYNC_STATE watermark)를 한 트랜잭션으로 처리한다
+- deadlock (1213) / lock wait timeout (1205) 이면 rollback 후 backoff 하고 같은 종목을 다시 실행한다
+- 종목별 (inserted, updated, skipped, seconds, attempts, status) 요약을 DataFrame 으로 돌려준다
+
+    def task(session: SyncSession, symbol: str) -> Optional[SyncCounts]:
+        stock = session.inserter(StockDataInserter)   # 빌린 연결을 함께 쓰는 inserter (commit 은 runner 가)
+        ...
+        return SyncCounts(inserted=written)           # 바뀐 것이 없어 건너뛰면 None
+
+    report = run_symbol_sync(pool, symbols, task, workers=4, label="stocks/KOR")
+"""
+import time
+import pymysql
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, NamedTuple, Optional
+from module.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_SYNC_WORKERS = 4
+DEADLOCK_RETRIES = 3
+RETRY_BACKOFF = 0.5  # 초, 시도마다 두 배
+RETRYABLE_ERRORS = {1205, 1213}  # lock wait timeout, deadlock
+REPORT_COLUMNS = ["symbol", "status", "inserted", "updated", "skipped", "seconds", "attempts", "error"]
+
+
+class SyncCounts(NamedTuple):
+    inserted: int = 0  # 새로 넣은 행
+    updated: int = 0   # 값이 바뀌어 갱신한 행
+    skipped: int = 0   # 읽었지만 DB 와 같거나 이미 있어 쓰지 않은 행
+
+
+class SyncSession:
+    """
+    종목 하나를 처리하는 동안 task 에 넘기는 연결 묶음. inserter(cls) 는 같은 연결을 쓰는
+    in_transaction inserter 를 만든다 (같은 cls 는 한 번만 만든다).
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self._inserters: Dict[type, object] = {}
+
+    def inserter(self, cls):
+        if cls not in self._inserters:
+            self._inserters[cls] = cls(connection=self.connection, in_transaction=True)
+        return self._inserters[cls]
+
+
+def is_retryable(error: Exception) -> bool:
+    """deadlock / lock wait timeout 처럼 같은 트랜잭션을 다시 실행하면 되는 오류인지"""
+    return isinstance(error, pymysql.MySQLError) and bool(error.args) and error.args[0] in RETRYABLE_ERRORS
+
+
+def _sync_one(pool, symbol: str, task: Callable, retries: int) -> dict:
+    started = time.perf_counter()
+    result = {"symbol": symbol, "status": "failed", **SyncCounts()._asdict(), "attempts": 0, "error": None}
+    try:
+        # 재시도할 수 있는 오류는 블록 안에서 처리하므로 연결은 버려지지 않는다 (다른 OperationalError 는 버림)
+        with pool.connection() as conn:
+            for attempt in range(1, retries + 2):
+                result["attempts"] = attempt
+                try:
+                    counts = task(SyncSession(conn), symbol)
+                    conn.commit()
+                except pymysql.MySQLError as e:
+                    conn.rollback()
+                    if not is_retryable(e) or attempt > retries:
+                        raise
+                    delay = RETRY_BACKOFF * 2 ** (attempt - 1)
+                    logger.warning(f"[{symbol}] {e.args[1] if len(e.args) > 1 else e} "
+                                   f"(attempt {attempt}), retrying in {delay:.1f}s")
+                    time.sleep(delay)
+                    continue
+                if counts is None:
+                    result["status"] = "unchanged"
+                else:
+                    result.update(status="ok", **counts._asdict())
+                break
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        logger.error(f"[{symbol}] Sync failed after {result['attempts']} attempt(s): {result['error']}")
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+
+def run_symbol_sync(pool, symbols: Iterable[str], task: Callable[[SyncSession, str], Optional[SyncCounts]],
+                    workers: int = DEFAULT_SYNC_WORKERS, retries: int = DEADLOCK_RETRIES,
+                    label: str = "sync") -> pd.DataFrame:
+    """
+    :param pool: ConnectionPool (workers 는 pool.max_size 를 넘지 않게 줄인다)
+    :param symbols: 처리할 종목 (중복은 한 번만)
+    :param task: task(session, symbol) -> SyncCounts (바뀐 것이 없으면 None). 종목 하나가 한 트랜잭션이며
+                 실패하면 그 종목만 rollback 되고 나머지 종목은 계속 처리한다
+    :param retries: deadlock / lock wait timeout 재시도 횟수
+    :return: 종목별 요약 (REPORT_COLUMNS, symbols 순서)
+    """
+    symbols = list(dict.fromkeys(str(symbol) for symbol in symbols))
+    if workers > pool.max_size:
+        logger.info(f"[{label}] workers {workers} → {pool.max_size} (pool max_size)")
+    workers = max(1, min(workers, pool.max_size, len(symbols) or 1))
+    started = time.perf_counter()
+    if workers == 1:
+        results = [_sync_one(pool, symbol, task, retries) for symbol in symbols]
+    else:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="db-sync") as executor:
+            results = list(executor.map(lambda symbol: _sync_one(pool, symbol, task, retries), symbols))
+    report = pd.DataFrame(results, columns=REPORT_COLUMNS)
+    log_sync_report(report, label, time.perf_counter() - started, workers)
+    return report
+
+
+def log_sync_report(report: pd.DataFrame, label: str, elapsed: float, workers: int, slowest: int = 5):
+    """합계와 가장 오래 걸린 종목을 로그로 남긴다"""
+    if report.empty:
+        logger.info(f"[{label}] Nothing to sync.")
+        return
+    counts = report["status"].value_counts()
+    logger.info(
+        f"[{label}] {len(report)} symbols in {elapsed:.2f}s with {workers} worker(s) "
+        f"(sum of per-symbol time {report['seconds'].sum():.2f}s): "
+        f"{int(counts.get('ok', 0))} ok, {int(counts.get('unchanged', 0))} unchanged, "
+        f"{int(counts.get('failed', 0))} failed / rows {int(report['inserted'].sum())} inserted, "
+        f"{int(report['updated'].sum())} updated, {int(report['skipped'].sum())} skipped, "
+        f"{int((report['attempts'] - 1).clip(lower=0).sum())} retries"
+    )
+    top = report.nlargest(slowest, "seconds")
+    logger.info(f"[{label}] Slowest: " + ", ".join(f"{row.symbol} {row.seconds:.2f}s" for row in top.itertuples()))
+    for row in report[report["status"] == "failed"].itertuples():
+        logger.warning(f"[{label}] {row.symbol} failed: {row.error}")
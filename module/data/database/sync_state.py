@@ -0,0 +1,105 @@
+import pymysql
+from typing import Dict, NamedTuple, Optional
+from module.data.database.db_connector import DBConnector
+from module.logger import get_logger
+
+logger = get_logger(__name__)
+
+# SYNC_STATE.SOURCE 값 (로컬 데이터 출처)
+STOCK_SYNC_SOURCE = "stocks/{country}"
+# update_stock_price 는 기존 구간 변경도 반영하므로 insert loader 와 watermark 를 따로 둔다
+STOCK_UPDATE_SYNC_SOURCE = "stocks/{country}/update"
+RISK_SYNC_SOURCE = "risk/{country}"
+NEWS_SYNC_SOURCE = "news"
+ER_NO_SUCH_TABLE = 1146
+
+
+class SyncWatermark(NamedTuple):
+    last_synced_ts: Optional[object]  # datetime (tz 없는 벽시계 시각) 또는 None
+    last_file_checksum: Optional[str]
+
+
+class SyncStateInserter(DBConnector):
+    """
+    SYNC_STATE 테이블 (SOURCE, SYMBOL, TABLE_NAME, LAST_SYNCED_TS, LAST_FILE_CHECKSUM) 담당.
+    loader 는 (출처, 종목, 대상 테이블) 마다 마지막으로 적재한 시각과 읽은 파일의 fingerprint 를 남기고,
+    다음 실행에서는 그 이후 데이터만 읽는다 (fingerprint 가 같으면 파일을 읽지 않고 건너뜀).
+    테이블이 없으면 (assets/migrations/003_sync_state.sql 적용 전) load 는 빈 dict 를 돌려주고 save 는 저장하지 않으므로
+    watermark 없이 전체 적재한다 (데이터 적재 트랜잭션은 실패시키지 않는다).
+    """
+
+    # 테이블이 없다는 경고는 실행마다 한 번만 남긴다
+    _missing_table_logged = False
+
+    def select(self, where: str = None):
+        try:
+            with self.connection.cursor() as cursor:
+                sql = "SELECT * FROM SYNC_STATE"
+                if where:
+                    sql += f" WHERE {where}"
+                cursor.execute(sql)
+                return cursor.fetchall()
+        except pymysql.MySQLError as e:
+            logger.error(f"[SyncStateInserter] Error executing select: {e}")
+            return None
+
+    def update(self, data: dict, where: str):
+        pass
+
+    def delete(self, where: str):
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute(f"DELETE FROM SYNC_STATE WHERE {where}")
+            self.connection.commit()
+        except pymysql.MySQLError as e:
+            self.connection.rollback()
+            logger.error(f"[SyncStateInserter] Error executing delete: {e}")
+
+    def load(self, source: str, table: str) -> Dict[str, SyncWatermark]:
+        """
+        (source, table) 의 종목별 watermark 를 한 번에 조회. 오류(테이블 없음 등)면 빈 dict
+        """
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT SYMBOL, LAST_SYNCED_TS, LAST_FILE_CHECKSUM FROM SYNC_STATE "
+                    "WHERE SOURCE=%s AND TABLE_NAME=%s",
+                    (source, table),
+                )
+                rows = cursor.fetchall()
+        except pymysql.MySQLError as e:
+            logger.warning(f"[SyncStateInserter] No watermarks for {source}/{table}, loading everything: {e}")
+            return {}
+        return {row["SYMBOL"]: SyncWatermark(row["LAST_SYNCED_TS"], row["LAST_FILE_CHECKSUM"]) for row in rows}
+
+    def save(self, source: str, symbol: str, table: str, last_synced_ts, checksum: Optional[str]) -> bool:
+        """
+        watermark 저장. sync_runner 에서는 데이터 적재와 같은 트랜잭션(in_transaction)에서 호출되어 함께 commit 된다.
+        SYNC_STATE 테이블이 없으면 (1146) 저장하지 않고 False 를 돌려주며 데이터 적재는 그대로 commit 된다
+        (다음 실행이 같은 구간을 다시 upsert 할 뿐이다). 그 밖의 오류는 abort 로 처리한다
+        (in_transaction 이면 다시 던져 종목 단위로 rollback / 재시도).
+        """
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute(
+                    """
+                    INSERT INTO SYNC_STATE (SOURCE, SYMBOL, TABLE_NAME, LAST_SYNCED_TS, LAST_FILE_CHECKSUM)
+                    VALUES (%s, %s, %s, %s, %s)
+                    ON DUPLICATE KEY UPDATE
+                        LAST_SYNCED_TS=VALUES(LAST_SYNCED_TS),
+                        LAST_FILE_CHECKSUM=VALUES(LAST_FILE_CHECKSUM)
+                    """,
+                    (source, symbol, table, last_synced_ts, checksum),
+                )
+            self.commit()
+            return True
+        except pymysql.MySQLError as e:
+            if e.args and e.args[0] == ER_NO_SUCH_TABLE:
+                # 실패한 INSERT 는 아무것도 바꾸지 않았으므로 트랜잭션은 그대로 둔다
+                if not SyncStateInserter._missing_table_logged:
+                    SyncStateInserter._missing_table_logged = True
+                    logger.warning(f"[SyncStateInserter] SYNC_STATE table not found, watermarks are not saved: {e}")
+                return False
+            self.abort(e)
+            logger.error(f"[SyncStateInserter] Error saving watermark {source}/{symbol}/{table}: {e}")
+            return False
@@ -3,9 +3,11 @@
 """
 from abc import ABCMeta, abstractmethod
 import os
+import re
+import json
 import pandas as pd
 import pytz
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator, List, Sequence, Tuple
 from datetime import datetime, timedelta
 from filelock import FileLock
 from contextlib import nullcontext
@@ -13,6 +15,74 @@ from module.logger import get_logger
 
 logger = get_logger(__name__)
 
+# "{YYYY-MM-01}_chunk{n}.csv" 형태의 chunk 파일명
+CHUNK_FILE_PATTERN = re.compile(r"^(\d{4}-\d{2}-\d{2})_chunk(\d+)\.csv$")
+# chunk 파일별 마지막 날짜를 (크기, 수정 시각) 과 함께 저장해 두는 파일 (chunk 폴더마다 하나)
+CHUNK_MANIFEST_FILE = "_chunk_manifest.json"
+
+
+def _read_last_date(file_path: str) -> Optional[pd.Timestamp]:
+    try:
+        dates = pd.read_csv(file_path, usecols=lambda c: c.lower() == "date")
+    except (pd.errors.EmptyDataError, ValueError, OSError) as e:
+        logger.debug(f"Could not read dates from {file_path}: {e}")
+        return None
+    if dates.empty:
+        return None
+    last = pd.to_datetime(dates.iloc[:, 0], utc=True, errors="coerce").max()
+    return None if pd.isna(last) else last
+
+
+def chunk_last_dates(paths: Sequence[str]) -> Dict[str, Optional[pd.Timestamp]]:
+    """
+    chunk 파일별 가장 늦은 날짜 (UTC, 알 수 없으면 None).
+
+    _save_data 는 chunk 의 첫 행 월로 파일명을 정하고 같은 파일에 이어 쓰므로 한 파일이 여러 달에 걸칠 수 있고,
+    다시 받은 과거 행이 뒤에 붙기도 해서 파일명이나 마지막 줄로는 끝 날짜를 알 수 없다. date 컬럼만 읽어 최댓값을 구하고
+    폴더의 CHUNK_MANIFEST_FILE 에 (크기, 수정 시각) 과 함께 저장해 두어, 바뀐 파일만 다시 읽는다.
+    """
+    result: Dict[str, Optional[pd.Timestamp]] = {}
+    by_folder: Dict[str, List[str]] = {}
+    for path in paths:
+        by_folder.setdefault(os.path.dirname(path), []).append(path)
+
+    for folder, folder_paths in by_folder.items():
+        manifest_path = os.path.join(folder, CHUNK_MANIFEST_FILE)
+        try:
+            with open(manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+
+        changed = False
+        for path in folder_paths:
+            name = os.path.basename(path)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                result[path] = None
+                continue
+            # 읽기 전에 stat 을 잡아 두므로, 읽는 동안 파일이 바뀌면 다음 호출에서 다시 읽는다
+            key = [stat.st_size, stat.st_mtime_ns]
+            entry = manifest.get(name)
+            if entry is not None and entry[:2] == key:
+                result[path] = pd.Timestamp(entry[2]) if entry[2] else None
+                continue
+            last = _read_last_date(path)
+            manifest[name] = key + [last.isoformat() if last is not None else None]
+            result[path] = last
+            changed = True
+
+        if changed:
+            try:
+                tmp_path = f"{manifest_path}.{os.getpid()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(manifest, f)
+                os.replace(tmp_path, manifest_path)
+            except OSError as e:
+                logger.debug(f"Could not write chunk manifest {manifest_path}: {e}")
+    return result
+
 
 class DataProvider(metaclass=ABCMeta):
     def __init__(self, start_date: Optional[str] = None, end_date: Optional[str] = None):
@@ -106,10 +176,14 @@ class DataPipeline(metaclass=ABCMeta):
         month_start = date.replace(day=1)
         return os.path.join(self.base_path, f"{month_start}_chunk{chunk_num}.csv")
 
-    def _read_csv(self, file_path: str) -> pd.DataFrame:
+    def _read_csv(self, file_path: str, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
         logger.debug(f"Reading CSV file: {file_path}")
+        usecols = None
+        if columns is not None:
+            wanted = set(columns) | {"date"}
+            usecols = lambda c: c in wanted
         with FileLock(file_path + ".lock", timeout=60) if self.use_file_lock else nullcontext():
-            data = pd.read_csv(file_path)
+            data = pd.read_csv(file_path, usecols=usecols)
         if "date" in data.columns:
             data["date"] = pd.to_datetime(data["date"], utc=True)
             return data.set_index("date")
@@ -136,6 +210,103 @@ class DataPipeline(metaclass=ABCMeta):
             logger.debug(f"Saved chunk {chunk_num} to {file_path}")
             chunk_num += 1
 
+    def _list_chunk_files(self) -> List[Tuple[pd.Timestamp, int, str]]:
+        """
+        base_path 의 chunk 파일 목록을 (월 시작일, chunk 번호, 경로) 순으로 정렬해 반환.
+        파일명의 월 시작일은 해당 파일에 들어있는 가장 이른 데이터의 월이다.
+        """
+        if not os.path.isdir(self.base_path):
+            return []
+        chunk_files = []
+        for file in os.listdir(self.base_path):
+            match = CHUNK_FILE_PATTERN.match(file)
+            if not match:
+                continue
+            month_start = pd.Timestamp(match.group(1), tz=pytz.UTC)
+            chunk_files.append((month_start, int(match.group(2)), os.path.join(self.base_path, file)))
+        return sorted(chunk_files)
+
+    @staticmethod
+    def _to_utc_timestamp(value) -> Optional[pd.Timestamp]:
+        if value is None:
+            return None
+        ts = pd.Timestamp(value)
+        return ts.tz_localize(pytz.UTC) if ts.tzinfo is None else ts.tz_convert(pytz.UTC)
+
+    def iter_chunks(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        columns: Optional[Sequence[str]] = None,
+        batch_rows: int = 5000,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        저장된 데이터를 날짜 오름차순, 중복 제거된 DataFrame 묶음으로 순차 반환한다.
+
+        chunk 파일은 파일명의 월 시작일 순으로 하나씩 읽고, 다음 파일의 월 시작일보다
+        이전 시점의 행만 확정된 것으로 보고 내보낸다. 따라서 메모리에는 batch_rows 와
+        chunk 파일 하나 분량만 유지되며 전체 히스토리 길이와는 무관하다.
+        start 가 있으면 마지막 날짜(chunk_last_dates)가 start 이전인 파일만 읽지 않고 건너뛴다.
+
+        :param start: 시작 시점 (포함, tz가 없으면 UTC로 간주)
+        :param end: 종료 시점 (포함, tz가 없으면 UTC로 간주)
+        :param columns: 읽을 컬럼 목록 (None이면 전체 컬럼)
+        :param batch_rows: 한 번에 반환할 최대 행 수
+        """
+        if batch_rows <= 0:
+            raise ValueError("batch_rows must be positive")
+
+        start_ts = self._to_utc_timestamp(start)
+        end_ts = self._to_utc_timestamp(end)
+        chunk_files = self._list_chunk_files()
+        if not chunk_files:
+            logger.warning(f"No chunk files found in {self.base_path}")
+            return
+
+        last_dates = {}
+        if start_ts is not None:
+            last_dates = chunk_last_dates(
+                [path for month_start, _, path in chunk_files if end_ts is None or month_start <= end_ts]
+            )
+
+        pending = pd.DataFrame()
+        last_emitted = None
+        for i, (month_start, _, file_path) in enumerate(chunk_files):
+            next_start = chunk_files[i + 1][0] if i + 1 < len(chunk_files) else None
+            if end_ts is not None and month_start > end_ts:
+                break
+            # 파일은 다음 달 이후까지 이어질 수 있으므로 실제 마지막 날짜가 start 이전일 때만 건너뛴다
+            last_date = last_dates.get(file_path)
+            if last_date is not None and last_date < start_ts:
+                continue
+
+            data = self._read_csv(file_path, columns)
+            if data.empty:
+                continue
+            if start_ts is not None:
+                data = data[data.index >= start_ts]
+            if end_ts is not None:
+                data = data[data.index <= end_ts]
+            if last_emitted is not None:
+                data = data[data.index > last_emitted]
+            if data.empty:
+                continue
+
+            pending = data if pending.empty else pd.concat([pending, data])
+            pending = pending[~pending.index.duplicated(keep="last")].sort_index()
+
+            # 이후 파일에는 next_start 이전 시점의 행이 없으므로 그 앞까지는 확정
+            ready_len = len(pending) if next_start is None else pending.index.searchsorted(next_start)
+            while ready_len >= batch_rows or (next_start is None and ready_len > 0):
+                batch = pending.iloc[:batch_rows]
+                pending = pending.iloc[batch_rows:]
+                ready_len -= len(batch)
+                last_emitted = batch.index[-1]
+                yield batch
+
+        if not pending.empty:
+            yield pending
+
     def get_all_data(self) -> pd.DataFrame:
         if not os.path.exists(self.base_path):
             logger.warning(f"No data directory at {self.base_path}")
@@ -156,15 +327,12 @@ class DataPipeline(metaclass=ABCMeta):
 
     def get_data_range(self, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> pd.DataFrame:
         logger.info(f"Getting data range from {start_date} to {end_date}")
-        all_data = self.get_all_data()
-        if all_data.empty:
+        chunks = list(self.iter_chunks(start_date, end_date))
+        if not chunks:
             logger.warning(f"No data found in the range {start_date} to {end_date}")
             return pd.DataFrame()
 
-        if start_date:
-            all_data = all_data[all_data.index >= pd.Timestamp(start_date, tzinfo=pytz.UTC)]
-        if end_date:
-            all_data = all_data[all_data.index <= pd.Timestamp(end_date, tzinfo=pytz.UTC)]
+        all_data = pd.concat(chunks)
         logger.info(f"Returned data range with shape {all_data.shape}")
         return all_data
 
@@ -1,7 +1,7 @@
 import time
 import pandas as pd
 import pytz
-from typing import Optional
+from typing import Any, Callable, Optional
 from datetime import datetime, timedelta
 from module.data.providers.core import DataProvider
 from module.data.providers.core import DataPipeline
@@ -19,6 +19,7 @@ class ProviderDataPipeline(DataPipeline):
         cache_days: int = 7,
         fetch_interval: int = 60,
         chunk_size: int = 10000,
+        on_new_data: Optional[Callable[[pd.DataFrame], Any]] = None,
     ):
         """
         실시간 데이터 파이프라인 초기화
@@ -28,10 +29,12 @@ class ProviderDataPipeline(DataPipeline):
         :param cache_days: 메모리에 캐시할 날짜 수
         :param fetch_interval: 데이터 가져오기 간격 (초)
         :param chunk_size: 데이터를 저장할 청크 크기
+        :param on_new_data: 새 데이터가 저장된 직후 호출할 callback (예: OnlineRiskRefresher)
         """
         super().__init__(data_provider, base_path, use_file_lock, cache_days)
         self.fetch_interval = fetch_interval
         self.chunk_size = chunk_size
+        self.on_new_data = on_new_data
         self._current_date = pd.Timestamp.now(tz=pytz.UTC).date()
         logger.info(
             f"ProviderDataPipeline initialized for {data_provider.symbol if data_provider else 'Unknown'}"
@@ -71,6 +74,15 @@ class ProviderDataPipeline(DataPipeline):
                     self._cached_data.index >= cutoff_date
                 ]
                 logger.info(f"Updated cache with {len(new_data)} new rows")
+
+                if self.on_new_data is not None:
+                    try:
+                        self.on_new_data(new_data)
+                    except Exception as e:
+                        logger.error(
+                            f"on_new_data callback failed for {self.data_provider.symbol}: {e}",
+                            exc_info=True,
+                        )
         else:
             logger.info("No new data received")
 
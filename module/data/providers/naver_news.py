@@ -2,7 +2,6 @@ import os
 import requests
 import pandas as pd
 from typing import Optional
-from newspaper import Article
 
 from module.data.providers.core import DataProvider
 from module.logger import get_logger
@@ -100,6 +99,9 @@ class NaverNews(DataProvider):
         """
         article 본문 추출 (newspaper3k)
         """
+        # newspaper3k는 import 비용이 커서 본문 수집 시점에만 로드
+        from newspaper import Article
+
         try:
             article = Article(url, language="ko")
             article.download()
@@ -1,13 +1,15 @@
 import os
 import json
 import pandas as pd
-from typing import Dict, Any
+from typing import Dict, Any, TYPE_CHECKING
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from module.data.providers.data_pipeline import ProviderDataPipeline
 from module.data.providers.naver_news import NaverNews
-from module.analysis.llm.chat_gpt import GPTModel
 from module.logger import get_logger
 
+if TYPE_CHECKING:
+    from module.analysis.llm.chat_gpt import GPTModel
+
 logger = get_logger(__name__)
 
 KEY_MAP = {
@@ -183,6 +185,9 @@ class NewsDataPipeline(ProviderDataPipeline):
             return
 
         logger.info(f"Starting GPT sentiment analysis with model={model_id}")
+        # openai 패키지는 감성 분석 시점에만 로드
+        from module.analysis.llm.chat_gpt import GPTModel
+
         gpt_model = GPTModel(api_key=api_key, model_id=model_id)
 
         report_data = {}
@@ -238,7 +243,7 @@ class NewsDataPipeline(ProviderDataPipeline):
 
         logger.info(f"Sentiment analysis completed. Saved report to {report_path}")
 
-    def _analyze_article_with_gpt(self, gpt_model: GPTModel, content_text: str, article_id_str: str) -> Dict[str, Any]:
+    def _analyze_article_with_gpt(self, gpt_model: "GPTModel", content_text: str, article_id_str: str) -> Dict[str, Any]:
         instruction = (
             f"다음은 뉴스 기사 본문입니다:\n\n{content_text}\n\n"
             "위 문서를 분석해서 JSON 형식의 감성 분석 결과를 반환해주세요."
@@ -6,24 +6,37 @@ import concurrent.futures
 import threading
 import pytz
 import importlib
+import functools
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any, Callable
-from module.data.providers.data_pipeline import ProviderDataPipeline, DataProvider
+from typing import List, Optional, Dict, Any, Callable, Iterator, TYPE_CHECKING
+from module.data.alignment import EXCHANGE_TIMEZONES, align_close_prices
+from module.config import (
+    CONFIG_KEY_STRATEGY,
+    CONFIG_KEY_ALGORITHM,
+    CONFIG_KEY_DATA_PIPELINES,
+    CONFIG_KEY_NAME,
+    CONFIG_KEY_STOCKS,
+    CONFIG_KEY_BASE_PATH,
+    CONFIG_KEY_STOCKS_FILE,
+    CONFIG_KEY_RISK,
+    CompiledConfig,
+    ConfigCache,
+    compile_pipeline,
+)
 from module.logger import get_logger
 
-logger = get_logger(__name__)
+if TYPE_CHECKING:
+    # 파이프라인/프로바이더 모듈은 실제로 필요할 때만 import (스크립트 시작 시간 단축)
+    from module.data.providers.data_pipeline import ProviderDataPipeline, DataProvider
 
-# 상수 정의
-CONFIG_KEY_STRATEGY = "strategy"
-CONFIG_KEY_ALGORITHM = "algorithm"
-CONFIG_KEY_DATA_PIPELINES = "data_pipelines"
-CONFIG_KEY_NAME = "name"
+logger = get_logger(__name__)
 
-CONFIG_KEY_STOCKS = "stocks"
-CONFIG_KEY_BASE_PATH = "base_path"
-CONFIG_KEY_STOCKS_FILE = "stocks_file"
+# config 파일 해시 기반 컴파일 캐시 (프로세스 전역)
+_CONFIG_CACHE = ConfigCache()
+CONFIG_CACHE_DIRNAME = os.path.join(".cache", "configs")
 
 
+@functools.lru_cache(maxsize=None)
 def find_project_root(current_path: str) -> str:
     logger.info(f"Searching for project root from: {current_path}")
     while True:
@@ -37,8 +50,36 @@ def find_project_root(current_path: str) -> str:
         current_path = parent
 
 
+def load_config(config_path: str, use_cache: bool = True) -> CompiledConfig:
+    """
+    config 파일을 읽어 CompiledConfig 로 반환한다.
+    config 파일과 stocks_file 의 해시가 같으면 YAML을 다시 파싱하지 않고 캐시를 사용한다.
+    use_cache=False 면 매번 새로 파싱하고 해시도 계산하지 않는다 (file_hashes 는 빈 dict).
+    """
+    if not use_cache:
+        raw, _ = _parse_config(config_path)
+        return CompiledConfig(
+            config_path=os.path.abspath(config_path),
+            file_hashes={},
+            raw=raw,
+            pipeline=compile_pipeline(raw),
+        )
+    project_root = find_project_root(os.path.dirname(os.path.abspath(config_path)))
+    return _CONFIG_CACHE.get(
+        config_path, _parse_config, cache_dir=os.path.join(project_root, CONFIG_CACHE_DIRNAME)
+    )
+
+
 def read_config(config_path: str) -> Dict[str, Any]:
     logger.info(f"Reading config file: {config_path}")
+    return load_config(config_path).to_dict()
+
+
+def _parse_config(config_path: str):
+    """
+    YAML config 를 파싱해 (config dict, 의존 파일 경로 목록)을 반환한다.
+    """
+    dependencies = []
     try:
         with open(config_path, "r", encoding="utf-8") as file:
             config = yaml.safe_load(file)
@@ -76,6 +117,10 @@ def read_config(config_path: str) -> Dict[str, Any]:
     if CONFIG_KEY_DATA_PIPELINES in config:
         new_config[CONFIG_KEY_DATA_PIPELINES] = config[CONFIG_KEY_DATA_PIPELINES]
 
+    # risk 계산 설정 (detector, n_bkps, smoothing_alpha ...)
+    if CONFIG_KEY_RISK in config:
+        new_config[CONFIG_KEY_RISK] = config[CONFIG_KEY_RISK] or {}
+
     # Data Pipelines 정보가 없는 경우 처리
     if not new_config[CONFIG_KEY_DATA_PIPELINES]:
         logger.warning("No data pipeline configuration found")
@@ -98,6 +143,7 @@ def read_config(config_path: str) -> Dict[str, Any]:
     if CONFIG_KEY_STOCKS_FILE in new_config[CONFIG_KEY_DATA_PIPELINES]:
         stocks_file = new_config[CONFIG_KEY_DATA_PIPELINES][CONFIG_KEY_STOCKS_FILE]
         stocks_path = os.path.join(os.path.dirname(config_path), stocks_file)
+        dependencies.append(stocks_path)
         try:
             with open(stocks_path, "r", encoding="utf-8") as file:
                 stocks_config = yaml.safe_load(file)
@@ -114,7 +160,7 @@ def read_config(config_path: str) -> Dict[str, Any]:
             )
 
     logger.info("Config processing completed")
-    return new_config
+    return new_config, dependencies
 
 
 def load_module(config: Dict, type_key: str):
@@ -136,78 +182,45 @@ def load_module(config: Dict, type_key: str):
         raise
 
 
-def create_data_providers(config: Dict[str, Any]) -> List[DataProvider]:
-    logger.info("Creating data providers")
+def iter_data_providers(config: Dict[str, Any]) -> Iterator["DataProvider"]:
+    """
+    config 의 종목마다 provider 객체를 필요할 때 하나씩 생성한다.
+    """
     data_pipelines = config[CONFIG_KEY_DATA_PIPELINES]
 
     if CONFIG_KEY_NAME not in data_pipelines:
         logger.error(f"{CONFIG_KEY_NAME} not found in data_pipelines configuration")
         raise ValueError(f"{CONFIG_KEY_NAME} must be specified in the configuration")
 
-    provider_name = data_pipelines[CONFIG_KEY_NAME]
-
-    # 1) 'stocks' / 'companies' 분기
-    if CONFIG_KEY_STOCKS in data_pipelines:
-        items = data_pipelines[CONFIG_KEY_STOCKS]
-    elif "companies" in data_pipelines:
-        items = data_pipelines["companies"]
-    else:
-        logger.error("No 'stocks' or 'companies' key found in data_pipelines config")
-        raise ValueError("Need either 'stocks' or 'companies' in data_pipelines config")
+    # read_config() 결과라면 캐시에 컴파일해 둔 pipeline 을 그대로 쓴다
+    pipeline_config = getattr(config, "pipeline", None)
+    if pipeline_config is None:
+        try:
+            pipeline_config = compile_pipeline(config)
+        except ValueError as e:
+            logger.error(f"Invalid data_pipelines config: {e}")
+            raise
 
     # 모듈 로드
     try:
         provider_class = load_module(config, CONFIG_KEY_DATA_PIPELINES)
     except Exception as e:
-        logger.error(f"Failed to load provider {provider_name}: {e}")
+        logger.error(f"Failed to load provider {pipeline_config.name}: {e}")
         raise
 
     logger.info(f"Using provider class: {provider_class.__name__}")
+    yield from pipeline_config.iter_providers(provider_class)
 
-    # Provider별로 다른 파라미터 목록 결정
-    if provider_name == "YahooFinance":
-        # YahooFinance는 interval, period 등 사용
-        param_keys = ["interval", "period", "start_date", "end_date",
-                      "raise_errors", "keepna", "timeout"]
-    elif provider_name == "NaverNews":
-        param_keys = ["display", "start", "raise_errors", "timeout",
-                      "start_date", "end_date"]
-    elif provider_name == "FinanceDataReader":
-        # FinanceDataReader는 period가 없고, interval, start_date, end_date만 사용
-        # (constructor: __init__(self, symbol, interval="1D", start_date=None, end_date=None))
-        param_keys = ["interval", "start_date", "end_date"]
-    else:
-        # 기본값(주식 파이프라인 가정) or 필요에 따라 추가
-        param_keys = ["interval", "start_date", "end_date"]
-
-    providers = []
-    for item in items:
-        if "symbol" in item:
-            symbol_or_query = item["symbol"]
-        elif "query" in item:
-            symbol_or_query = item["query"]
-        else:
-            logger.error("Item has neither 'symbol' nor 'query'")
-            continue
-
-        provider_params = {}
-        for k in param_keys:
-            val = item.get(k, data_pipelines.get(k, None))
-            if k == "end_date" and val == "TODAY":
-                val = datetime.now().strftime("%Y-%m-%d")
-
-            provider_params[k] = val
-
-        provider = provider_class(symbol_or_query, **provider_params)
-        logger.debug(f"Created provider for: {symbol_or_query} with params={provider_params}")
-        providers.append(provider)
 
+def create_data_providers(config: Dict[str, Any]) -> List["DataProvider"]:
+    logger.info("Creating data providers")
+    providers = list(iter_data_providers(config))
     logger.info(f"Created {len(providers)} data providers")
     return providers
 
 
 def load_data(
-        dp: ProviderDataPipeline, n_days_before: Optional[int] = None
+        dp: "ProviderDataPipeline", n_days_before: Optional[int] = None
 ) -> Optional[pd.DataFrame]:
     logger.info(f"Loading data for symbol: {dp.data_provider.symbol}")
     try:
@@ -231,7 +244,7 @@ def load_data(
 
 
 def process_data(
-        dp: ProviderDataPipeline, n_days_before: Optional[int] = None
+        dp: "ProviderDataPipeline", n_days_before: Optional[int] = None
 ) -> Optional[Dict[str, pd.DataFrame]]:
     symbol = dp.data_provider.symbol
     logger.info(f"Processing data for symbol: {symbol}")
@@ -249,15 +262,30 @@ def process_data(
         return None
 
 
-def create_pipelines(config: Dict[str, Any]) -> List[ProviderDataPipeline]:
+def create_pipelines(
+        config: Dict[str, Any], online_risk_dir: Optional[str] = None
+) -> List["ProviderDataPipeline"]:
+    """
+    :param online_risk_dir: 지정하면 fetch_data 직후 종목별 online risk 를 {online_risk_dir}/{symbol} 에 갱신
+    """
+    from module.data.providers.data_pipeline import ProviderDataPipeline
+
     logger.info("Creating data pipelines")
-    providers = create_data_providers(config)
     base_path = config[CONFIG_KEY_DATA_PIPELINES][CONFIG_KEY_BASE_PATH]
     pipelines = []
-    for provider in providers:
+    for provider in iter_data_providers(config):
         symbol_base_path = os.path.join(base_path, provider.symbol)
+        on_new_data = None
+        if online_risk_dir is not None:
+            from module.analysis.ts.online_detection import OnlineRiskRefresher
+
+            on_new_data = OnlineRiskRefresher(
+                provider.symbol,
+                os.path.join(online_risk_dir, provider.symbol),
+                history_path=symbol_base_path,
+            )
         pipeline = ProviderDataPipeline(
-            data_provider=provider, base_path=symbol_base_path
+            data_provider=provider, base_path=symbol_base_path, on_new_data=on_new_data
         )
         pipelines.append(pipeline)
         logger.debug(f"Created pipeline for symbol: {provider.symbol}")
@@ -290,8 +318,14 @@ def parallel_process(
     return results
 
 
-def run_data_pipeline(config: Dict[str, Any]):
-    pipelines = create_pipelines(config)
+def run_data_pipeline(
+        config: Dict[str, Any], continuous: bool = True, online_risk_dir: Optional[str] = None
+):
+    """
+    :param continuous: False면 최초 1회 수집 후 종료 (cron 실행용)
+    :param online_risk_dir: 지정하면 수집 직후 online risk 갱신 (create_pipelines 참고)
+    """
+    pipelines = create_pipelines(config, online_risk_dir)
 
     logger.info(f"Created {len(pipelines)} data pipelines")
 
@@ -314,6 +348,8 @@ def run_data_pipeline(config: Dict[str, Any]):
                 )
 
     logger.info("Initial fetch for all stocks completed.")
+    if not continuous:
+        return
 
     logger.info("Starting continuous data update")
     stop_event = threading.Event()
@@ -374,10 +410,19 @@ def create_strategy(config: Dict[str, Any]):
     return strategy_class(**strategy_params)
 
 
-def prepare_data(dp_result: List) -> pd.DataFrame:
+def prepare_data(dp_result: List, timezones: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+    """
+    종목별 close 가격을 거래일 기준 패널로 정렬한다.
+    - 거래소 현지 거래일의 union 인덱스 사용 (주말/휴장일 행 없음)
+    - 과거 값만 앞으로 채움 (미래 가격으로 과거를 채우지 않음)
+    :param timezones: {symbol: 거래소 timezone}, create_timezone_mapper() 결과.
+                      None 이면 configs/datasources 의 종목 config 로 만든다 (default_timezone_mapper)
+    """
     logger.info("Preparing data for strategy execution")
+    if timezones is None:
+        timezones = default_timezone_mapper()
 
-    aggregated_data = []
+    close_frames = {}
     for data in dp_result:
         for k, df in data.items():
             if df is None:
@@ -389,31 +434,17 @@ def prepare_data(dp_result: List) -> pd.DataFrame:
             if "close" not in df.columns:
                 logger.warning(f"'close' 컬럼이 없습니다: {k}")
                 continue
-
-            close_price = df["close"]
-            if close_price.empty:
+            if df["close"].empty:
                 logger.warning(f"'close' 가격 데이터가 비어 있습니다: {k}")
                 continue
 
-            close_price.name = k
-            aggregated_data.append(close_price)
-            logger.info(f"{k}: shape {close_price.shape}")
-
-    # 중복된 인덱스를 제거합니다.
-    for i, data in enumerate(aggregated_data):
-        if data.index.duplicated().any():
-            logger.warning(f"중복된 인덱스를 제거합니다: {data.name}")
-            aggregated_data[i] = data[~data.index.duplicated(keep='first')]
+            close_frames[k] = df
+            logger.info(f"{k}: shape {df['close'].shape}")
+            if k not in timezones:
+                logger.warning(f"거래소 timezone 을 알 수 없어 UTC 기준 날짜를 사용합니다: {k}")
 
-    all_data = pd.concat(aggregated_data, axis=1)
-
-    if not isinstance(all_data.index, pd.DatetimeIndex):
-        all_data.index = pd.to_datetime(all_data.index)
-        logger.info("인덱스를 datetime 형식으로 변환했습니다.")
-
-    all_data = all_data.resample("1D").last().bfill().ffill()
-    all_data = all_data.sort_index()
-    return all_data
+    panel = align_close_prices(close_frames, timezones=timezones)
+    return panel.to_frame()
 
 
 def create_symbol_mapper(configs: List[Dict]) -> Dict[str, str]:
@@ -427,6 +458,46 @@ def create_symbol_mapper(configs: List[Dict]) -> Dict[str, str]:
     return symbol_mapper
 
 
+def create_timezone_mapper(configs: List[Dict]) -> Dict[str, str]:
+    """
+    config의 exchange 값으로 {symbol: 거래소 timezone} 매핑을 만든다.
+    """
+    timezone_mapper = {}
+    for config in configs:
+        if "data_pipelines" in config and "stocks" in config["data_pipelines"]:
+            for d in config["data_pipelines"]["stocks"]:
+                tz = EXCHANGE_TIMEZONES.get(str(d.get("exchange", "")).upper())
+                if "symbol" in d and tz:
+                    timezone_mapper[d["symbol"]] = tz
+    return timezone_mapper
+
+
+def default_timezone_mapper() -> Dict[str, str]:
+    """
+    configs/datasources 의 종목 config 전체로 create_timezone_mapper() 를 만든다.
+    (read_config 캐시를 쓰므로 config 가 바뀌지 않았다면 YAML 을 다시 파싱하지 않는다)
+    """
+    try:
+        project_root = find_project_root(os.path.dirname(os.path.abspath(__file__)))
+    except ValueError:
+        return {}
+    datasources_dir = os.path.join(project_root, "configs", "datasources")
+    if not os.path.isdir(datasources_dir):
+        return {}
+
+    configs = []
+    for file in sorted(os.listdir(datasources_dir)):
+        if not file.endswith((".yaml", ".yml")):
+            continue
+        config_path = os.path.join(datasources_dir, file)
+        try:
+            configs.append(read_config(config_path))
+        except Exception as e:
+            # db_config.yaml 처럼 data_pipelines 가 없는 config 는 건너뛴다
+            logger.debug(f"Skipping {config_path} for timezone mapping: {e}")
+    return create_timezone_mapper(configs)
+
+
 def load_db_config_yaml(config_path: str):
     """
     db_config.yaml 파일을 로드하여 dictionary를 반환.
@@ -0,0 +1,129 @@
+import os
+import sys
+import time
+import logging
+import tracemalloc
+import numpy as np
+from ruptures.metrics import hausdorff, precision_recall, randindex
+from module.analysis.ts.detectors import DEFAULT_DETECTOR, DETECTOR_REGISTRY, detect_change_points
+from module.analysis.ts.risk_job import load_symbol_history
+from module.utils import read_config
+from module.logger import get_logger, setup_global_logging
+
+logger = get_logger(__name__)
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+
+# 기본 detector(binseg_rbf) 가 기준(reference)으로 실행될 수 있는 최대 길이
+RBF_MAX_N = DETECTOR_REGISTRY[DEFAULT_DETECTOR].max_benchmark_n
+
+RECORDED_CONFIGS = ("kor_scm_stock_price.yaml", "usa_stock_price.yaml")
+
+
+def make_features(n: int, n_bkps: int = 5, seed: int = 0):
+    """
+    (returns, vol_changes) 형태의 합성 특징값과 실제 change point 목록을 만든다.
+    구간마다 수익률 변동성과 거래량 변동률 변동성이 바뀐다.
+    """
+    rng = np.random.default_rng(seed)
+    true_bkps = sorted(rng.choice(np.arange(n // 20, n - n // 20), n_bkps, replace=False).tolist()) + [n]
+    features = np.empty((n, 2))
+    start = 0
+    for end in true_bkps:
+        features[start:end, 0] = rng.normal(0, rng.uniform(0.005, 0.05), end - start)
+        features[start:end, 1] = rng.normal(0, rng.uniform(0.1, 1.0), end - start)
+        start = end
+    return features, true_bkps
+
+
+def history_features(close: np.ndarray, volume: np.ndarray) -> np.ndarray:
+    """calculate_risk_scores 와 같은 (returns, vol_changes)"""
+    returns = (close[1:] - close[:-1]) / (close[:-1] + 1e-9)
+    vol_changes = (volume[1:] - volume[:-1]) / (volume[:-1] + 1e-9)
+    return np.column_stack((returns, vol_changes))
+
+
+def run_detector(features: np.ndarray, detector: str, n_bkps: int):
+    tracemalloc.start()
+    started = time.perf_counter()
+    bkps = detect_change_points(features, detector, n_bkps=n_bkps)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return bkps, elapsed, peak
+
+
+def agreement(reference, bkps, margin: int):
+    precision, recall = precision_recall(reference, bkps, margin=margin)
+    f1 = 0.0 if precision + recall == 0 else 2 * precision * recall / (precision + recall)
+    # breakpoint가 하나도 없으면 hausdorff 거리를 정의할 수 없다
+    hd = hausdorff(reference, bkps) if len(reference) > 1 and len(bkps) > 1 else float("inf")
+    return f1, hd, randindex(reference, bkps)
+
+
+def benchmark_series(label: str, features: np.ndarray, reference, n_bkps: int):
+    """
+    모든 detector 를 실행해 runtime / peak memory / reference 대비 F1 을 로그로 남긴다.
+    :param reference: 정답(합성) 또는 기본 detector 결과(실제 히스토리) breakpoint
+    """
+    n = len(features)
+    margin = max(5, n // 200)
+    for name, spec in DETECTOR_REGISTRY.items():
+        if spec.max_benchmark_n is not None and n > spec.max_benchmark_n:
+            logger.info(f"{label:<22} n={n:>7} {name:<14} skipped (limit {spec.max_benchmark_n})")
+            continue
+        bkps, elapsed, peak = run_detector(features, name, n_bkps)
+        f1, hd, ri = agreement(reference, bkps, margin)
+        logger.info(
+            f"{label:<22} n={n:>7} {name:<14} time={elapsed:8.3f}s peak={peak / 2**20:8.1f}MiB "
+            f"bkps={len(bkps) - 1:>3} F1={f1:.2f} hausdorff={hd} rand={ri:.3f}"
+        )
+
+
+def run_synthetic(sizes=(1_000, 10_000, 100_000), n_bkps: int = 5):
+    """정답 change point 를 아는 합성 시계열 (F1 은 정답 기준)"""
+    for n in sizes:
+        features, true_bkps = make_features(n, n_bkps)
+        benchmark_series("synthetic", features, true_bkps, n_bkps)
+
+
+def run_recorded(config_files=RECORDED_CONFIGS, max_symbols: int = 5, n_bkps: int = 5):
+    """
+    저장된 KOR/USA 히스토리. 정답이 없으므로 기본 detector 결과를 기준으로 F1 을 계산하며,
+    기준을 계산할 수 있도록 최근 RBF_MAX_N 개 특징값만 사용한다.
+    """
+    for config_file in config_files:
+        config = read_config(os.path.join(project_root, "configs", "datasources", config_file))
+        base_path = config["data_pipelines"]["base_path"]
+        done = 0
+        for stock in config["data_pipelines"]["stocks"]:
+            if done >= max_symbols:
+                break
+            folder_path = os.path.join(base_path, stock["symbol"])
+            if not os.path.isdir(folder_path):
+                continue
+            history = load_symbol_history(folder_path)
+            if len(history) < 100 or not {"close", "volume"}.issubset(history.columns):
+                continue
+            features = history_features(
+                history["close"].to_numpy(dtype=np.float64), history["volume"].to_numpy(dtype=np.float64)
+            )[-RBF_MAX_N:]
+            reference = detect_change_points(features, DEFAULT_DETECTOR, n_bkps=n_bkps)
+            benchmark_series(f"{os.path.basename(base_path)}/{stock['symbol']}", features, reference, n_bkps)
+            done += 1
+        if done == 0:
+            logger.info(f"No recorded histories under {base_path}")
+
+
+if __name__ == "__main__":
+    setup_global_logging(
+        log_dir=os.path.join(project_root, "logs"),
+        log_level=logging.INFO,
+        file_level=logging.DEBUG,
+        stream_level=logging.INFO,
+    )
+    logging.getLogger("module").setLevel(logging.WARNING)
+    run_synthetic()
+    run_recorded()
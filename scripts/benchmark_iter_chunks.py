@@ -0,0 +1,105 @@
+import os
+import sys
+import time
+import logging
+import tempfile
+import tracemalloc
+import numpy as np
+import pandas as pd
+from module.data.providers.data_pipeline import ProviderDataPipeline
+from module.logger import get_logger, setup_global_logging
+
+logger = get_logger(__name__)
+
+# iter_chunks 의 peak 메모리 상한. batch_rows / chunk_size 로 정해지며 히스토리 길이와 무관해야 한다
+MEMORY_CEILING_MIB = 8
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+
+
+def make_history(base_path: str, n_rows: int) -> ProviderDataPipeline:
+    """
+    n_rows 일치의 OHLCV 히스토리를 chunk 파일로 저장한 파이프라인을 만든다.
+    """
+    dp = ProviderDataPipeline(data_provider=None, base_path=base_path, use_file_lock=False)
+    index = pd.date_range("1970-01-01", periods=n_rows, freq="D", tz="UTC", name="date")
+    rng = np.random.default_rng(0)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n_rows)))
+    df = pd.DataFrame(
+        {"open": close, "high": close, "low": close, "close": close,
+         "volume": rng.integers(1_000, 100_000, n_rows)},
+        index=index,
+    )
+    dp._save_data(df)
+    return dp
+
+
+def measure(func):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def check_spanning_chunk(base_path: str):
+    """
+    여러 달에 걸친 chunk 파일 회귀 확인. _save_data 는 chunk 첫 행의 월로 파일명을 정하므로
+    2024-02-01_chunk0.csv 에 2월 1일 ~ 3월 11일이, 2024-03-01_chunk1.csv 에 3월 12일 ~ 20일이 들어간다.
+    3월 파일이 있어도 2월 파일의 3월 행을 건너뛰면 안 된다.
+    """
+    dp = ProviderDataPipeline(data_provider=None, base_path=base_path, use_file_lock=False)
+    dp.chunk_size = 40
+    index = pd.date_range("2024-02-01", "2024-03-20", freq="D", tz="UTC", name="date")
+    dp._save_data(pd.DataFrame({"close": np.arange(len(index), dtype=float)}, index=index))
+    # 같은 파일에 다시 받은 과거 행이 붙어도 (마지막 줄이 최신이 아님) 건너뛰지 않아야 한다
+    dp._save_data(pd.DataFrame({"close": [0.0]}, index=index[:1]))
+    dp._save_data(pd.DataFrame({"close": [1.0]}, index=pd.DatetimeIndex(["2024-04-02"], tz="UTC", name="date")))
+
+    for _ in range(2):  # 두 번째는 manifest 에 저장된 마지막 날짜를 쓴다
+        data = dp.get_data_range("2024-03-05", "2024-03-20")
+        assert len(data) == 16, f"expected 16 rows, got {len(data)}"
+        assert data.index.is_monotonic_increasing and not data.index.has_duplicates
+        assert len(dp.get_data_range("2024-03-21", "2024-04-30")) == 1
+
+
+def run_benchmark(n_rows_list=(5_000, 20_000, 80_000), batch_rows: int = 2_000):
+    for n_rows in n_rows_list:
+        with tempfile.TemporaryDirectory() as tmp:
+            dp = make_history(os.path.join(tmp, "SYMBOL"), n_rows)
+
+            def scan_all():
+                return float(dp.get_all_data()["close"].sum())
+
+            def scan_chunks():
+                return float(sum(c["close"].sum() for c in dp.iter_chunks(columns=["close"], batch_rows=batch_rows)))
+
+            total_all, t_all, peak_all = measure(scan_all)
+            total_chunks, t_chunks, peak_chunks = measure(scan_chunks)
+            assert np.isclose(total_all, total_chunks)
+            logger.info(
+                f"rows={n_rows:>7} | get_all_data: {t_all:.2f}s peak={peak_all / 2**20:.1f}MiB"
+                f" | iter_chunks(batch_rows={batch_rows}): {t_chunks:.2f}s peak={peak_chunks / 2**20:.1f}MiB"
+            )
+            assert peak_chunks < MEMORY_CEILING_MIB * 2**20, (
+                f"iter_chunks peak {peak_chunks / 2**20:.1f}MiB exceeds {MEMORY_CEILING_MIB}MiB (rows={n_rows})"
+            )
+
+
+if __name__ == "__main__":
+    setup_global_logging(
+        log_dir=os.path.join(project_root, "logs"),
+        log_level=logging.INFO,
+        file_level=logging.DEBUG,
+        stream_level=logging.INFO,
+    )
+    # 파이프라인 내부 로그는 벤치마크 결과만 보이도록 낮춘다
+    logging.getLogger("module").setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        check_spanning_chunk(os.path.join(tmp, "SPAN"))
+    run_benchmark()
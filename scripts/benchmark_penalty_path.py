@@ -0,0 +1,64 @@
+import os
+import sys
+import time
+import logging
+import numpy as np
+import ruptures as rpt
+from module.analysis.ts.detectors import CostNormalCumsum, standardize
+from module.analysis.ts.penalty import fit_path, select_breakpoints
+from module.logger import get_logger, setup_global_logging
+from scripts.benchmark_detectors import make_features
+
+logger = get_logger(__name__)
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+
+
+def refit_per_penalty(features: np.ndarray, penalties, jump: int = 5):
+    """penalty 마다 Binseg 를 새로 fit 하는 방식"""
+    signal = standardize(features)
+    return [
+        len(rpt.Binseg(custom_cost=CostNormalCumsum(), jump=jump).fit(signal).predict(pen=pen)) - 1
+        for pen in penalties
+    ]
+
+
+def run_benchmark(n: int = 5000, true_bkps: int = 8, n_penalties: int = 20):
+    features, truth = make_features(n, true_bkps)
+
+    started = time.perf_counter()
+    path = fit_path(features, max_bkps=n // 50)
+    fit_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    bic = select_breakpoints(features, "bic", path=path)
+    elbow = select_breakpoints(features, "elbow", n_penalties=n_penalties, path=path)
+    select_time = time.perf_counter() - started
+
+    penalties = path.penalty_grid(n_penalties)
+    started = time.perf_counter()
+    refit = refit_per_penalty(features, penalties)
+    refit_time = time.perf_counter() - started
+
+    # 경로에서 재현한 penalty 별 결과는 매번 fit 한 결과와 같아야 한다
+    assert refit == [path.n_bkps_for_penalty(pen) for pen in penalties], "penalty path mismatch"
+
+    logger.info(f"n={n} true bkps={len(truth) - 1} path length={len(path)}")
+    logger.info(f"BIC   -> {bic.n_bkps} bkps (pen={bic.penalty:.1f}) {bic.bkps}")
+    logger.info(f"elbow -> {elbow.n_bkps} bkps (pen={elbow.penalty:.1f}) {elbow.bkps}")
+    logger.info(f"truth -> {truth}")
+    logger.info(f"one fit + {n_penalties} penalties : {fit_time + select_time:8.3f}s")
+    logger.info(f"refit per penalty ({n_penalties})     : {refit_time:8.3f}s")
+
+
+if __name__ == "__main__":
+    setup_global_logging(
+        log_dir=os.path.join(project_root, "logs"),
+        log_level=logging.INFO,
+        file_level=logging.DEBUG,
+        stream_level=logging.INFO,
+    )
+    run_benchmark(1000, 3)
+    run_benchmark(5000, 8)
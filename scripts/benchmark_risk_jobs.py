@@ -0,0 +1,103 @@
+import os
+import sys
+import time
+import glob
+import logging
+import pandas as pd
+from multiprocessing import Pool, cpu_count
+from module.analysis.ts.change_point_detection import calculate_risk_scores
+from module.analysis.ts.batch_engine import load_universe, run_batch
+from module.analysis.ts.risk_job import process_symbol
+from module.utils import read_config
+from module.logger import get_logger, setup_global_logging
+
+logger = get_logger(__name__)
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+
+
+def process_csv_file_legacy(args):
+    """
+    기존 방식: 월별 chunk 파일 하나 → risk 계산
+    """
+    csv_file, symbol = args
+    try:
+        df = pd.read_csv(csv_file).drop_duplicates()
+        df["date"] = pd.to_datetime(df["date"], errors="coerce")
+        df.dropna(subset=["date"], inplace=True)
+        if df.empty or "close" not in df.columns or "volume" not in df.columns:
+            return pd.DataFrame()
+        return calculate_risk_scores(df, symbol)
+    except Exception as e:
+        logger.debug(f"[{symbol}] Failed to process {csv_file}: {e!r}")
+        return pd.DataFrame()
+
+
+def run_legacy(base_path: str, stocks_list: list):
+    tasks = [
+        (csvf, stock["symbol"])
+        for stock in stocks_list
+        for csvf in glob.glob(os.path.join(base_path, stock["symbol"], "*.csv"))
+    ]
+    started = time.perf_counter()
+    with Pool(processes=cpu_count()) as pool:
+        results = pool.map(process_csv_file_legacy, tasks)
+    # 기존 스크립트와 같이 종목별로 반복 concat
+    df_by_symbol = {}
+    for res_df in results:
+        if res_df.empty:
+            continue
+        sym = res_df["symbol"].iloc[0]
+        df_by_symbol[sym] = pd.concat([df_by_symbol[sym], res_df], ignore_index=True) \
+            if sym in df_by_symbol else res_df
+    return len(tasks), time.perf_counter() - started, sum(len(df) for df in df_by_symbol.values())
+
+
+def run_per_symbol(base_path: str, stocks_list: list):
+    tasks = [
+        (os.path.join(base_path, stock["symbol"]), stock["symbol"])
+        for stock in stocks_list
+        if os.path.isdir(os.path.join(base_path, stock["symbol"]))
+    ]
+    started = time.perf_counter()
+    with Pool(processes=min(cpu_count(), max(len(tasks), 1))) as pool:
+        results = pool.map(process_symbol, tasks)
+    return len(tasks), time.perf_counter() - started, sum(len(df) for df in results)
+
+
+def run_shared_batch(base_path: str, stocks_list: list):
+    started = time.perf_counter()
+    universe = load_universe(base_path, [stock["symbol"] for stock in stocks_list])
+    result = run_batch(universe)
+    return len(universe), time.perf_counter() - started, len(result)
+
+
+def run_benchmark(config_path: str):
+    config = read_config(config_path)
+    base_path = config["data_pipelines"]["base_path"]
+    stocks_list = config["data_pipelines"]["stocks"]
+
+    legacy_tasks, legacy_time, legacy_rows = run_legacy(base_path, stocks_list)
+    symbol_tasks, symbol_time, symbol_rows = run_per_symbol(base_path, stocks_list)
+    batch_tasks, batch_time, batch_rows = run_shared_batch(base_path, stocks_list)
+
+    logger.info(f"per-chunk  : tasks={legacy_tasks:>6} wall={legacy_time:.2f}s rows={legacy_rows}")
+    logger.info(f"per-symbol : tasks={symbol_tasks:>6} wall={symbol_time:.2f}s rows={symbol_rows}")
+    logger.info(f"shared mem : tasks={batch_tasks:>6} wall={batch_time:.2f}s rows={batch_rows}")
+
+
+if __name__ == "__main__":
+    setup_global_logging(
+        log_dir=os.path.join(project_root, "logs"),
+        log_level=logging.INFO,
+        file_level=logging.DEBUG,
+        stream_level=logging.INFO,
+    )
+    logging.getLogger("module").setLevel(logging.WARNING)
+
+    config_path = os.path.join(
+        project_root, "configs", "datasources", "kor_scm_stock_price.yaml"
+    )
+    run_benchmark(config_path)
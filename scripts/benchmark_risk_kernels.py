@@ -0,0 +1,139 @@
+import os
+import sys
+import time
+import logging
+import numpy as np
+from module.analysis.ts.kernels import ema, minmax_scale, risk_percent, segment_volatility
+from module.logger import get_logger, setup_global_logging
+
+logger = get_logger(__name__)
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+
+
+# ---------------- 기존 calculate_risk_scores 5~9 단계 (Python loop) ----------------
+def legacy_segment_volatility(features: np.ndarray, bkps) -> np.ndarray:
+    risk_raw = np.zeros(len(features))
+    start_idx = 0
+    for end_idx in bkps:
+        segment_data = features[start_idx:end_idx]
+        if len(segment_data) == 0:
+            continue
+        std_return = np.std(segment_data[:, 0])
+        std_volume = np.std(segment_data[:, 1])
+        risk_raw[start_idx:end_idx] = np.sqrt(std_return ** 2 + std_volume ** 2)
+        start_idx = end_idx
+    return risk_raw
+
+
+def legacy_risk_percent(risk_raw: np.ndarray, smoothing_alpha: float) -> np.ndarray:
+    min_val, max_val = risk_raw.min(), risk_raw.max()
+    if (max_val - min_val) < 1e-9:
+        risk_scaled = np.full_like(risk_raw, 0.5)
+    else:
+        risk_scaled = (risk_raw - min_val) / (max_val - min_val)
+    risk_smoothed = np.zeros_like(risk_scaled)
+    risk_smoothed[0] = risk_scaled[0]
+    for i in range(1, len(risk_scaled)):
+        risk_smoothed[i] = smoothing_alpha * risk_scaled[i] + (1 - smoothing_alpha) * risk_smoothed[i - 1]
+    return np.where(risk_smoothed < 1e-5, 0, risk_smoothed) * 100.0
+
+
+def make_universe(n_symbols: int, min_len: int, max_len: int, n_bkps: int = 5, seed: int = 0):
+    """종목별 (features, bkps) 목록. 길이는 종목마다 다르다."""
+    rng = np.random.default_rng(seed)
+    universe = []
+    for _ in range(n_symbols):
+        n = int(rng.integers(min_len, max_len + 1))
+        features = np.column_stack([rng.normal(0, 0.02, n), rng.normal(0, 0.5, n)])
+        bkps = sorted(rng.choice(np.arange(1, n), n_bkps, replace=False).tolist()) + [n]
+        universe.append((features, bkps))
+    return universe
+
+
+def make_outlier_case(n: int = 2000, seed: int = 1):
+    """
+    거래량 0 인 날이 있는 종목: 다음 날 vol_change 가 ~1e14 가 된다 (KOR 데이터에서 흔함).
+    calculate_risk_scores 와 같은 방식으로 특징값을 만든다.
+    """
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n + 1)))
+    volume = rng.integers(10_000, 100_000, n + 1).astype(np.float64)
+    volume[300] = 0.0
+    returns = (close[1:] - close[:-1]) / (close[:-1] + 1e-9)
+    vol_changes = (volume[1:] - volume[:-1]) / (volume[:-1] + 1e-9)
+    return np.column_stack((returns, vol_changes)), [100, 301, 302, 700, 1200, n - 1, n]
+
+
+def check_equivalence(universe, smoothing_alpha: float = 0.3, atol: float = 1e-8):
+    """커널 결과가 기존 loop 구현과 같은지 확인한다 (1-D 및 NaN 패딩 2-D)."""
+    for features, bkps in universe:
+        legacy_raw = legacy_segment_volatility(features, bkps)
+        raw = segment_volatility(features, bkps)
+        np.testing.assert_allclose(raw, legacy_raw, atol=atol)
+        np.testing.assert_allclose(
+            risk_percent(raw, smoothing_alpha), legacy_risk_percent(legacy_raw, smoothing_alpha), atol=1e-6
+        )
+
+    # 극단값 (1e14 규모 vol_change) 이 있어도 구간별 값이 np.std 와 같아야 한다
+    features, bkps = make_outlier_case()
+    legacy_raw = legacy_segment_volatility(features, bkps)
+    raw = segment_volatility(features, bkps)
+    np.testing.assert_allclose(raw, legacy_raw, rtol=1e-9, atol=atol)
+    np.testing.assert_allclose(
+        risk_percent(raw, smoothing_alpha), legacy_risk_percent(legacy_raw, smoothing_alpha), atol=1e-6
+    )
+
+    # 상수 시계열 / 길이 1 / 2-D 배치
+    np.testing.assert_allclose(minmax_scale(np.full(5, 3.0)), np.full(5, 0.5))
+    np.testing.assert_allclose(ema(np.array([2.0]), 0.3), [2.0])
+    raws = [segment_volatility(f, b) for f, b in universe]
+    batch = pad_rows(raws)
+    batched = risk_percent(batch, smoothing_alpha)
+    for i, raw in enumerate(raws):
+        np.testing.assert_allclose(batched[i, : len(raw)], legacy_risk_percent(raw, smoothing_alpha), atol=1e-6)
+        assert np.isnan(batched[i, len(raw):]).all()
+    logger.info(f"Equivalence check passed for {len(universe)} symbols")
+
+
+def pad_rows(rows) -> np.ndarray:
+    """길이가 다른 1-D 배열들을 뒤쪽 NaN 패딩 2-D 배열로 만든다."""
+    out = np.full((len(rows), max(len(r) for r in rows)), np.nan)
+    for i, r in enumerate(rows):
+        out[i, : len(r)] = r
+    return out
+
+
+def run_benchmark(n_symbols: int = 2000, min_len: int = 250, max_len: int = 2500, smoothing_alpha: float = 0.3):
+    universe = make_universe(n_symbols, min_len, max_len)
+    check_equivalence(universe[:200], smoothing_alpha)
+
+    started = time.perf_counter()
+    for features, bkps in universe:
+        legacy_risk_percent(legacy_segment_volatility(features, bkps), smoothing_alpha)
+    legacy_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for features, bkps in universe:
+        risk_percent(segment_volatility(features, bkps), smoothing_alpha)
+    kernel_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    risk_percent(pad_rows([segment_volatility(f, b) for f, b in universe]), smoothing_alpha)
+    batch_time = time.perf_counter() - started
+
+    logger.info(f"legacy loop    : {n_symbols / legacy_time:10.0f} symbols/sec ({legacy_time:.2f}s)")
+    logger.info(f"kernel 1-D     : {n_symbols / kernel_time:10.0f} symbols/sec ({kernel_time:.2f}s)")
+    logger.info(f"kernel batched : {n_symbols / batch_time:10.0f} symbols/sec ({batch_time:.2f}s)")
+
+
+if __name__ == "__main__":
+    setup_global_logging(
+        log_dir=os.path.join(project_root, "logs"),
+        log_level=logging.INFO,
+        file_level=logging.DEBUG,
+        stream_level=logging.INFO,
+    )
+    run_benchmark()
@@ -0,0 +1,114 @@
+import os
+import sys
+import time
+import logging
+import argparse
+import numpy as np
+import pandas as pd
+from module.data.database.risk_data_inserter import RiskDataInserter
+from module.utils import load_db_config_yaml
+from module.logger import get_logger, setup_global_logging
+
+logger = get_logger(__name__)
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+
+# RISK 와 같은 구조의 임시 테이블 (FK 없음). 벤치마크 후 삭제한다
+BENCH_TABLE = "RISK_BENCH"
+BENCH_DDL = f"""
+CREATE TABLE {BENCH_TABLE}
+(
+    RISK_IDX        INT AUTO_INCREMENT PRIMARY KEY,
+    COMPANY_CODE    VARCHAR(12),
+    MODEL_NAME      VARCHAR(50)   NOT NULL,
+    ANALYSIS_RESULT VARCHAR(255)  NOT NULL,
+    TEST_DATE       DATE          NOT NULL,
+    PREDICT_DATE    DATE          NOT NULL,
+    RISK_SCORE      DECIMAL(7, 4) NOT NULL,
+    UNIQUE KEY UQ_RISK_BENCH (COMPANY_CODE, MODEL_NAME, PREDICT_DATE, TEST_DATE)
+)
+"""
+
+
+def make_risk_frame(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """종목 하나의 일별 risk 결과 (insert_risk_values 가 넘기는 형식)"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("1990-01-01", periods=n_rows).strftime("%Y-%m-%d")
+    return pd.DataFrame({
+        "company_code": "BENCH01",
+        "model_name": "Binseg-RBF",
+        "analysis_result": "bench",
+        "test_date": dates,
+        "predict_date": dates,
+        "risk_score": rng.uniform(0, 100, n_rows).round(4),
+    })
+
+
+def timed(label: str, n_rows: int, func) -> float:
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    rate = n_rows / elapsed if elapsed > 0 else float("nan")
+    logger.info(f"{label:<32} {n_rows:>7} rows {elapsed:8.2f}s {rate:10.0f} rows/s")
+    return rate
+
+
+def run_benchmark(db_params: dict, n_rows: int = 10000, legacy_rows: int = 1000, chunk_sizes=(500, 1000, 5000)):
+    """
+    :param legacy_rows: 행 단위 방식은 느리므로 앞쪽 일부 행만 측정
+    """
+    df = make_risk_frame(n_rows)
+    inserter = RiskDataInserter(
+        host=db_params["host"],
+        user=db_params["user"],
+        password=db_params["password"],
+        db=db_params["database"],
+        port=db_params["port"]
+    )
+    if inserter.connection is None:
+        logger.error("Cannot connect to benchmark database.")
+        return
+    inserter.table = BENCH_TABLE
+    try:
+        inserter.execute_query(f"DROP TABLE IF EXISTS {BENCH_TABLE}")
+        inserter.execute_query(BENCH_DDL)
+
+        legacy = df.head(legacy_rows).copy()
+        timed("row-wise insert (SELECT+INSERT)", len(legacy), lambda: inserter.insert_or_update_risk_rowwise(legacy))
+        timed("row-wise update (SELECT+UPDATE)", len(legacy), lambda: inserter.insert_or_update_risk_rowwise(legacy))
+
+        for chunk_size in chunk_sizes:
+            inserter.execute_query(f"TRUNCATE TABLE {BENCH_TABLE}")
+            timed(f"bulk insert chunk={chunk_size}", n_rows, lambda: inserter.upsert_risk(df, chunk_size))
+            changed = df.assign(risk_score=df["risk_score"] / 2)
+            timed(f"bulk update chunk={chunk_size}", n_rows, lambda: inserter.upsert_risk(changed, chunk_size))
+
+        count = inserter.execute_query(f"SELECT COUNT(*) AS n FROM {BENCH_TABLE}")[0]["n"]
+        logger.info(f"{BENCH_TABLE} rows after upserts: {count} (expected {n_rows})")
+    finally:
+        inserter.execute_query(f"DROP TABLE IF EXISTS {BENCH_TABLE}")
+        inserter.close()
+
+
+if __name__ == "__main__":
+    setup_global_logging(
+        log_dir=os.path.join(project_root, "logs"),
+        log_level=logging.INFO,
+        file_level=logging.DEBUG,
+        stream_level=logging.INFO,
+    )
+    parser = argparse.ArgumentParser(description="RISK 행 단위 vs bulk upsert 처리량 (rows/s) 비교")
+    # 로컬 MySQL / MariaDB (예: docker run -e MARIADB_ROOT_PASSWORD=... -p 3306:3306 mariadb) 접속 정보 권장.
+    # 임시 테이블 RISK_BENCH 만 만들고 지우지만 운영 DB 는 피할 것
+    parser.add_argument(
+        "--db-config",
+        default=os.path.join(project_root, "configs", "datasources", "db_config.yaml"),
+        help="db: 섹션이 있는 DB 접속 YAML (기본: configs/datasources/db_config.yaml)",
+    )
+    parser.add_argument("--rows", type=int, default=10000, help="bulk upsert 행 수")
+    parser.add_argument("--legacy-rows", type=int, default=1000, help="행 단위 방식으로 측정할 행 수")
+    args = parser.parse_args()
+
+    run_benchmark(load_db_config_yaml(args.db_config), n_rows=args.rows, legacy_rows=args.legacy_rows)
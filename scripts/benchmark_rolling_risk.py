@@ -0,0 +1,73 @@
+import os
+import sys
+import time
+import logging
+import numpy as np
+from multiprocessing import cpu_count
+from module.analysis.ts.change_point_detection import risk_values_from_arrays
+from module.analysis.ts.rolling import rolling_risk_values, window_ends
+from module.logger import get_logger, setup_global_logging
+
+logger = get_logger(__name__)
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+
+
+def make_bars(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    vol = np.repeat(rng.uniform(0.005, 0.04, n // 200 + 1), 200)[:n]
+    close = 100 * np.exp(np.cumsum(rng.normal(0, vol)))
+    volume = 1e5 * np.exp(np.cumsum(rng.normal(0, vol * 10)))
+    return close, volume
+
+
+def naive_rolling(close, volume, window_size, step, detector):
+    """window 마다 가격 slice 에서 특징값(np.column_stack)을 다시 만드는 방식"""
+    ends = window_ends(len(close), window_size, step)
+    values = [
+        risk_values_from_arrays(close[e - window_size + 1: e + 1], volume[e - window_size + 1: e + 1],
+                                detector=detector)[-1]
+        for e in ends
+    ]
+    return ends, np.asarray(values)
+
+
+def run_benchmark(n_bars: int = 5000, window_size: int = 250, step: int = 5, detector: str = "binseg_l2"):
+    close, volume = make_bars(n_bars)
+    processes = cpu_count()
+
+    started = time.perf_counter()
+    naive_ends, naive_values = naive_rolling(close, volume, window_size, step, detector)
+    naive_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    ends, values = rolling_risk_values(close, volume, window_size, step, detector=detector)
+    ring_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    par_ends, par_values = rolling_risk_values(
+        close, volume, window_size, step, detector=detector, processes=processes
+    )
+    par_time = time.perf_counter() - started
+
+    assert np.array_equal(naive_ends, ends) and np.allclose(naive_values, values)
+    assert np.array_equal(par_ends, ends) and np.allclose(par_values, values)
+
+    n_windows = len(ends)
+    logger.info(f"bars={n_bars} window={window_size} step={step} detector={detector} windows={n_windows}")
+    logger.info(f"naive (column_stack per window) : {n_windows / naive_time:8.1f} windows/sec")
+    logger.info(f"ring buffer                     : {n_windows / ring_time:8.1f} windows/sec")
+    logger.info(f"ring buffer x {processes:<2} processes       : {n_windows / par_time:8.1f} windows/sec")
+
+
+if __name__ == "__main__":
+    setup_global_logging(
+        log_dir=os.path.join(project_root, "logs"),
+        log_level=logging.INFO,
+        file_level=logging.DEBUG,
+        stream_level=logging.INFO,
+    )
+    run_benchmark()
+    run_benchmark(detector="binseg_rbf")
@@ -4,6 +4,7 @@ import logging
 from module.logger import get_logger, setup_global_logging
 from module.utils import read_config, load_db_config_yaml
 from module.data.database.company_meta_inserter import CompanyMetaInserter
+from module.data.database.connection_pool import shared_pool
 
 logger = get_logger(__name__)
 
@@ -18,13 +19,8 @@ def insert_company_meta_from_config(config_path: str, db_params: dict, country_c
     data_pipelines = config["data_pipelines"]
     stocks_list = data_pipelines["stocks"]  # list of {symbol, full_name, exchange, ...}
 
-    inserter = CompanyMetaInserter(
-        host=db_params["host"],
-        user=db_params["user"],
-        password=db_params["password"],
-        db=db_params["database"],
-        port=db_params["port"]
-    )
+    pool = shared_pool(db_params)
+    inserter = CompanyMetaInserter(pool=pool)
 
     try:
         for stock in stocks_list:
@@ -51,6 +47,7 @@ def insert_company_meta_from_config(config_path: str, db_params: dict, country_c
                 inserter.insert(data)
     finally:
         inserter.close()
+        pool.log_metrics()
 
 
 if __name__ == "__main__":
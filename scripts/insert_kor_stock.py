@@ -1,21 +1,30 @@
 import os
 import sys
 import logging
-import glob
 import pandas as pd
 from module.logger import get_logger, setup_global_logging
 from module.utils import read_config, load_db_config_yaml
-from module.data.database.stock_data_inserter import StockDataInserter
+from module.data.database.stock_data_inserter import StockDataInserter, STOCK_BATCH_SIZE
+from module.data.database.connection_pool import ConnectionPool, shared_pool
+from module.data.database.stock_sync import prices_since, watermark_checksum
+from module.data.database.sync_state import STOCK_SYNC_SOURCE, SyncStateInserter
+from module.data.database.sync_runner import DEFAULT_SYNC_WORKERS, SyncCounts, run_symbol_sync
 
 logger = get_logger(__name__)
 
 
-def insert_stock_kor_main(config_path: str, db_params: dict):
+def insert_stock_kor_main(config_path: str, db_params: dict, backfill: bool = False,
+                          batch_size: int = STOCK_BATCH_SIZE, full: bool = False,
+                          workers: int = DEFAULT_SYNC_WORKERS):
     """
     KOR 주식 데이터 삽입 스크립트
     1) config_path -> kor_stock_price.yaml
     2) db_params -> DB 접속정보(dict)
-    3) CSV 파일 로딩 -> insert_stock_price()
+    3) 종목별 CSV 파일 로딩 -> batch_size 행씩 upsert (backfill=True 이면 LOAD DATA LOCAL INFILE)
+       SYNC_STATE watermark 이후 행이 있을 수 있는 chunk 파일만 읽고, 파일이 그대로면 건너뛴다
+       (full=True 또는 backfill=True 이면 전체 파일)
+    4) 종목은 workers 개 연결로 병렬 처리하며, 종목마다 한 트랜잭션 (module.data.database.sync_runner)
+    :return: 종목별 요약 DataFrame (inserted / updated / skipped / seconds ...)
     """
     # 1) YAML config 로드
     config = read_config(config_path)
@@ -25,40 +34,60 @@ def insert_stock_kor_main(config_path: str, db_params: dict):
     base_path = data_pipelines["base_path"]  # 예: "data/stocks/KOR"
     stocks_list = data_pipelines["stocks"]
 
-    # 3) StockDataInserter 생성
-    inserter = StockDataInserter(
-        host=db_params["host"],
-        user=db_params["user"],
-        password=db_params["password"],
-        db=db_params["database"],
-        port=db_params["port"]
-    )
+    # 3) connection pool (LOAD DATA LOCAL INFILE 은 허용한 별도 pool 에서만)
+    pool = ConnectionPool.from_params(db_params, local_infile=True) if backfill else shared_pool(db_params)
+    # 종목별 watermark 는 한 번에 조회 (SYNC_STATE)
+    source = STOCK_SYNC_SOURCE.format(country=os.path.basename(base_path))
+    with SyncStateInserter(pool=pool) as sync_state:
+        watermarks = {} if full or backfill else sync_state.load(source, "STOCK_PRICE")
+
+    def sync_symbol(session, symbol: str):
+        """종목 하나: watermark 이후 행 적재 + watermark 갱신 (한 트랜잭션)"""
+        folder_path = os.path.join(base_path, symbol)
+        watermark = watermarks.get(symbol)
+        since = pd.Timestamp(watermark.last_synced_ts) if watermark and watermark.last_synced_ts else None
+        df, files_read = prices_since(folder_path, since, watermark.last_file_checksum if watermark else None)
+        if df is None:
+            logger.debug(f"{symbol}: no file changes since {since}, skip.")
+            return None
+        if not files_read:
+            logger.info(f"No CSV files found for {symbol}")
+            return None
+
+        # watermark 이후 행만 적재 (이전 구간의 수정은 reconcile 이 맞춘다)
+        df_new = df if since is None else df[df["date"] > since]
+        written = 0
+        if not df_new.empty:
+            inserter = session.inserter(StockDataInserter)
+            if backfill:
+                written = inserter.load_stock_price_infile(symbol, df_new)
+            else:
+                written = inserter.insert_stock_price(symbol, df_new, batch_size)
+
+        last_ts = df["date"].max() if not df.empty else since
+        if since is not None and last_ts is not None:
+            last_ts = max(last_ts, since)
+        session.inserter(SyncStateInserter).save(
+            source, symbol, "STOCK_PRICE",
+            last_ts.to_pydatetime() if last_ts is not None else None,
+            watermark_checksum(folder_path, files_read, last_ts),
+        )
+        return SyncCounts(inserted=written, skipped=len(df) - len(df_new))
+
+    symbols = []
+    for stock in stocks_list:
+        symbol = str(stock["symbol"])
+        if not os.path.isdir(os.path.join(base_path, symbol)):
+            logger.warning(f"No folder for {symbol} at {os.path.join(base_path, symbol)}")
+            continue
+        symbols.append(symbol)
 
     try:
-        for stock in stocks_list:
-            symbol = stock["symbol"]  # 예: "005930"
-            folder_path = os.path.join(base_path, symbol)
-            if not os.path.isdir(folder_path):
-                logger.warning(f"No folder for {symbol} at {folder_path}")
-                continue
-
-            csv_files = glob.glob(os.path.join(folder_path, "*.csv"))
-            if not csv_files:
-                logger.info(f"No CSV files found for {symbol}")
-                continue
-
-            for csvf in csv_files:
-                df = pd.read_csv(csvf).drop_duplicates()
-                # date 컬럼을 datetime 변환
-                df["date"] = pd.to_datetime(df["date"], errors="coerce")
-                # date가 NaT인 행 제거
-                df.dropna(subset=["date"], inplace=True)
-
-                if not df.empty:
-                    # DB에 batch insert
-                    inserter.insert_stock_price(symbol, df)
+        return run_symbol_sync(pool, symbols, sync_symbol, workers=workers, label=source)
     finally:
-        inserter.close()
+        pool.log_metrics()
+        if backfill:
+            pool.close()
 
 
 if __name__ == "__main__":
@@ -3,18 +3,85 @@ import sys
 import logging
 import pandas as pd
 import json
+from typing import List
 from module.logger import get_logger, setup_global_logging
 from module.utils import read_config, load_db_config_yaml
 from module.data.database.news_data_inserter import NewsDataInserter
+from module.data.database.connection_pool import shared_pool
+from module.data.database.stock_sync import files_fingerprint, parse_wall_clock
+from module.data.database.sync_state import NEWS_SYNC_SOURCE, SyncStateInserter
+from module.data.database.sync_runner import DEFAULT_SYNC_WORKERS, SyncCounts, run_symbol_sync
 
 logger = get_logger(__name__)
 
+# 수집 순서가 pubDate 순이 아닐 수 있으므로 watermark 보다 이만큼 이전 기사부터 다시 본다 (중복은 NEWS_API 로 걸러짐)
+NEWS_LOOKBACK = pd.Timedelta(days=7)
+NEWS_FILES = ("news_link.csv", "contents.json", "report.json")
 
-def insert_news_main_core(config_path: str, db_params: dict):
+
+def build_articles(df: pd.DataFrame, contents_data: dict, report_data: dict) -> List[dict]:
+    """
+    news_link.csv 행 + contents.json 본문 + report.json 감성분석 → NewsDataInserter.insert_news_batch 입력
+    """
+    articles = []
+    for idx, row in df.iterrows():
+        pub_date = row.get("pubDate")
+        if pd.notna(pub_date) and hasattr(pub_date, "to_pydatetime"):
+            pub_date = pub_date.to_pydatetime()
+        else:
+            pub_date = None
+
+        originallink = row.get("originallink", "")
+        link = row.get("link", "")
+
+        # 기사 본문
+        content = ""
+        if str(idx) in contents_data:
+            content = contents_data[str(idx)].get("content", "")
+
+        # report.json
+        sentiment_dict = report_data.get(str(idx), {})
+        # e.g. { "sentiment": "0.75", "positiveKeywords": [...], ... }
+        try:
+            sentiment_val = float(sentiment_dict.get("sentiment", 0.0))
+        except ValueError:
+            sentiment_val = 0.0
+        pos_list = sentiment_dict.get("positiveKeywords", [])
+        neg_list = sentiment_dict.get("negativeKeywords", [])
+        pub_date_sent = sentiment_dict.get("pubDate", None)
+        if pub_date_sent:
+            try:
+                pub_date_sent = pd.to_datetime(pub_date_sent, errors="coerce")
+                if pd.notna(pub_date_sent) and hasattr(pub_date_sent, "to_pydatetime"):
+                    pub_date_sent = pub_date_sent.to_pydatetime()
+                else:
+                    pub_date_sent = None
+            except (ValueError, TypeError):
+                pub_date_sent = None
+
+        articles.append({
+            "title": row.get("title", ""),
+            "content": content,
+            "pub_date": pub_date,
+            "source": "Naver",  # or row.get("source", "Naver")
+            "news_api": originallink or link,  # 유니크 key
+            "sentiment": sentiment_val,
+            "pos_str": ", ".join(pos_list) if pos_list else "",
+            "neg_str": ", ".join(neg_list) if neg_list else "",
+            "sentiment_pub_date": pub_date_sent,
+        })
+    return articles
+
+
+def insert_news_main_core(config_path: str, db_params: dict, full: bool = False,
+                          workers: int = DEFAULT_SYNC_WORKERS):
     """
     1) 각 company_code 폴더의 news_link.csv/contents.json/report.json 읽어옴
-    2) DB에 이미 있는 뉴스(NEWS_API) 제외 → 새 데이터만 INSERT
-    3) NEWS_MAIN → NEWS_COMPANY → (option) NEWS_SENTIMENT
+       (SYNC_STATE 의 파일 fingerprint 가 같으면 건너뛰고, watermark - NEWS_LOOKBACK 이후 기사만 본다. full=True 이면 전체)
+    2) DB에 이미 있는 뉴스(NEWS_API) 제외 → 새 데이터만 INSERT (기존 키는 한 번에 조회)
+    3) NEWS_MAIN → NEWS_COMPANY → NEWS_SENTIMENT 를 chunk 단위 한 트랜잭션으로 적재
+    4) watermark (마지막 pubDate, 파일 fingerprint) 갱신
+    회사는 workers 개 연결로 병렬 처리하며, 회사마다 한 트랜잭션 (module.data.database.sync_runner)
     """
 
     config = read_config(config_path)
@@ -22,112 +89,71 @@ def insert_news_main_core(config_path: str, db_params: dict):
     base_path = data_pipelines["base_path"]  # e.g. "data/news"
     companies_list = data_pipelines["companies"]
 
-    inserter = NewsDataInserter(
-        host=db_params["host"],
-        user=db_params["user"],
-        password=db_params["password"],
-        db=db_params["database"],
-        port=db_params["port"]
-    )
-    try:
-        for comp in companies_list:
-            company_name = comp["full_name"]
-            company_code = comp.get("symbol")
-            folder_path = os.path.join(base_path, company_code)  # e.g. "data/news/005930"
-
-            csv_path = os.path.join(folder_path, "news_link.csv")
-            if not os.path.exists(csv_path):
-                logger.warning(f"{csv_path} not found. skip {company_name}")
-                continue
-
-            df = pd.read_csv(csv_path, index_col=0).drop_duplicates()
-            if "pubDate" in df.columns:
-                df["pubDate"] = pd.to_datetime(df["pubDate"], errors="coerce")
-
-            # 1) 로컬 JSON들 로드
-            contents_path = os.path.join(folder_path, "contents.json")
-            contents_data = {}
-            if os.path.exists(contents_path):
-                with open(contents_path, "r", encoding="utf-8") as f:
-                    contents_data = json.load(f)
-
-            report_path = os.path.join(folder_path, "report.json")
-            report_data = {}
-            if os.path.exists(report_path):
-                with open(report_path, "r", encoding="utf-8") as f:
-                    report_data = json.load(f)
-
-            # 2) 각 행(뉴스) 순회
-            for idx, row in df.iterrows():
-                pub_date = row.get("pubDate")
-                if pd.notna(pub_date) and hasattr(pub_date, "to_pydatetime"):
-                    pub_date = pub_date.to_pydatetime()
-                else:
-                    pub_date = None
-
-                title = row.get("title", "")
-                originallink = row.get("originallink", "")
-                link = row.get("link", "")
-                news_api = originallink or link  # 유니크 key
-                source = "Naver"  # or row.get("source", "Naver")
-
-                # 2-1) **DB 중복 여부 체크** → NEWS_MAIN에 이미 해당 NEWS_API가 있는가?
-                q_check = f"NEWS_API='{news_api}'"
-                existing = inserter.select(q_check)  # SELECT * FROM NEWS_MAIN WHERE NEWS_API='..'
-                if existing:
-                    # 이미 DB에 존재 → Skip
-                    logger.debug(f"Skip already exists => news_api={news_api}")
-                    continue
-
-                # 2-2) 기사 본문/감성분석
-                content = ""
-                if str(idx) in contents_data:
-                    content = contents_data[str(idx)].get("content", "")
-
-                # report.json
-                sentiment_dict = report_data.get(str(idx), {})
-                # e.g. { "sentiment": "0.75", "positiveKeywords": [...], ... }
-                try:
-                    sentiment_val = float(sentiment_dict.get("sentiment", 0.0))
-                except ValueError:
-                    sentiment_val = 0.0
-                pos_list = sentiment_dict.get("positiveKeywords", [])
-                neg_list = sentiment_dict.get("negativeKeywords", [])
-                pos_str = ", ".join(pos_list) if pos_list else ""
-                neg_str = ", ".join(neg_list) if neg_list else ""
-                pub_date_sent = sentiment_dict.get("pubDate", None)
-                if pub_date_sent:
-                    try:
-                        pub_date_sent = pd.to_datetime(pub_date_sent, errors="coerce")
-                        if pd.notna(pub_date_sent) and hasattr(pub_date_sent, "to_pydatetime"):
-                            pub_date_sent = pub_date_sent.to_pydatetime()
-                    except:
-                        pub_date_sent = pub_date
-
-                # 3) Insert NEWS_MAIN
-                new_id = inserter.insert_news_main(
-                    title=title,
-                    content=content,
-                    pub_date=pub_date,
-                    source=source,
-                    news_api=news_api
-                )
-
-                # 4) Insert NEWS_COMPANY
-                if company_code:
-                    inserter.insert_news_company(new_id, company_code)
-
-                # 5) Insert NEWS_SENTIMENT
-                inserter.insert_news_sentiment(
-                    news_id=new_id,
-                    sentiment_val=sentiment_val,
-                    pos_str=pos_str,
-                    neg_str=neg_str,
-                    pub_date=(pub_date_sent or pub_date)
-                )
+    pool = shared_pool(db_params)
+    with SyncStateInserter(pool=pool) as sync_state:
+        watermarks = {} if full else sync_state.load(NEWS_SYNC_SOURCE, "NEWS_MAIN")
+
+    def sync_company(session, company_code: str):
+        folder_path = os.path.join(base_path, company_code)  # e.g. "data/news/005930"
+        csv_path = os.path.join(folder_path, "news_link.csv")
+        watermark = watermarks.get(company_code)
+        news_files = [os.path.join(folder_path, name) for name in NEWS_FILES]
+        fingerprint = files_fingerprint([path for path in news_files if os.path.exists(path)])
+        if watermark and watermark.last_file_checksum == fingerprint:
+            logger.debug(f"[{company_code}] No news file changes, skip.")
+            return None
+
+        df = pd.read_csv(csv_path, index_col=0).drop_duplicates()
+        since = pd.Timestamp(watermark.last_synced_ts) if watermark and watermark.last_synced_ts else None
+        last_ts = since
+        n_rows = len(df)
+        if "pubDate" in df.columns:
+            df["pubDate"] = parse_wall_clock(df["pubDate"])
+            newest = df["pubDate"].max()
+            if pd.notna(newest) and (last_ts is None or newest > last_ts):
+                last_ts = newest
+            if since is not None:
+                # index 는 contents.json / report.json 의 key 이므로 그대로 둔다
+                df = df[df["pubDate"].isna() | (df["pubDate"] > since - NEWS_LOOKBACK)]
+
+        # 1) 로컬 JSON들 로드
+        contents_path = os.path.join(folder_path, "contents.json")
+        contents_data = {}
+        if os.path.exists(contents_path):
+            with open(contents_path, "r", encoding="utf-8") as f:
+                contents_data = json.load(f)
+
+        report_path = os.path.join(folder_path, "report.json")
+        report_data = {}
+        if os.path.exists(report_path):
+            with open(report_path, "r", encoding="utf-8") as f:
+                report_data = json.load(f)
+
+        # 2) 기사 목록 → 일괄 적재 (DB 중복 확인 / INSERT 모두 chunk 단위)
+        articles = build_articles(df, contents_data, report_data)
+        result = session.inserter(NewsDataInserter).insert_news_batch(articles, company_code)
+        logger.info(f"[{company_code}] {result.inserted}/{len(articles)} articles => NEWS_MAIN table "
+                    f"({result.skipped} skipped).")
+
+        # 3) watermark 갱신 (같은 트랜잭션)
+        session.inserter(SyncStateInserter).save(NEWS_SYNC_SOURCE, company_code, "NEWS_MAIN",
+                                                 last_ts.to_pydatetime() if last_ts is not None else None,
+                                                 fingerprint)
+        return SyncCounts(inserted=result.inserted, skipped=result.skipped + n_rows - len(df))
+
+    company_codes = []
+    for comp in companies_list:
+        company_code = comp.get("symbol")
+        csv_path = os.path.join(base_path, company_code, "news_link.csv")
+        if not os.path.exists(csv_path):
+            logger.warning(f"{csv_path} not found. skip {comp['full_name']}")
+            continue
+        company_codes.append(company_code)
 
+    try:
+        return run_symbol_sync(pool, company_codes, sync_company, workers=workers, label=NEWS_SYNC_SOURCE)
     finally:
-        inserter.close()
+        pool.log_metrics()
 
 
 if __name__ == "__main__":
@@ -4,16 +4,65 @@ import logging
 import pandas as pd
 from module.logger import get_logger, setup_global_logging
 from module.utils import read_config, load_db_config_yaml
-from module.data.database.risk_data_inserter import RiskDataInserter
+from module.data.database.risk_data_inserter import RISK_COLUMNS, RiskDataInserter, diff_risk, risk_checksum
+from module.data.database.risk_regime_inserter import RiskRegimeInserter
+from module.data.database.connection_pool import shared_pool
+from module.data.database.sync_state import RISK_SYNC_SOURCE, SyncStateInserter
+from module.data.database.sync_runner import DEFAULT_SYNC_WORKERS, SyncCounts, run_symbol_sync
+from module.analysis.ts.risk_cache import DELTA_FILE, FINGERPRINT_FILE, REGIME_SUMMARY_FILE
 
 logger = get_logger(__name__)
 
 
-def insert_risk_values_main(config_path: str, db_params: dict):
+def load_market_risk(risk_root: str, file_name: str = "risk_values.csv") -> pd.DataFrame:
+    """
+    시장 단위 risk 파일 (data/risk/KOR/risk_values.csv 또는 delta 파일) 로드. 없으면 빈 DataFrame
+    종목코드는 문자열로 읽는다 (예: "005930" 이 5930 으로 바뀌지 않도록)
+    """
+    csv_file = os.path.join(risk_root, file_name)
+    if not os.path.isfile(csv_file):
+        return pd.DataFrame()
+    df_risk = pd.read_csv(csv_file, dtype={"symbol": str, "company_code": str})
+    return df_risk.rename(columns={"symbol": "company_code"})
+
+
+def load_symbol_risk(risk_root: str, symbol: str) -> pd.DataFrame:
+    """
+    (이전 형식) 종목별 risk 파일 data/risk/KOR/{symbol}/risk_values.csv 로드
+    """
+    risk_folder = os.path.join(risk_root, symbol)
+    if not os.path.isdir(risk_folder):
+        logger.info(f"[{symbol}] No risk folder: {risk_folder}")
+        return pd.DataFrame()
+
+    csv_file = os.path.join(risk_folder, "risk_values.csv")
+    if not os.path.isfile(csv_file):
+        logger.info(f"[{symbol}] No risk_values.csv found in: {risk_folder}")
+        return pd.DataFrame()
+
+    df_risk = pd.read_csv(csv_file, dtype={"symbol": str, "company_code": str})
+
+    # CSV에 company_code 컬럼이 있는지 확인
+    # 만약 "symbol"이라는 이름으로 되어 있다면 rename
+    if "symbol" in df_risk.columns:
+        df_risk.rename(columns={"symbol": "company_code"}, inplace=True)
+    elif "company_code" not in df_risk.columns:
+        # 최후 수단: DF에 직접 추가
+        df_risk["company_code"] = symbol
+    return df_risk
+
+
+def insert_risk_values_main(config_path: str, db_params: dict, full: bool = False,
+                            workers: int = DEFAULT_SYNC_WORKERS):
     """
     1) config 로드 -> base_path (예: "data/stocks/KOR"), stocks 목록
-    2) risk 저장 경로 -> project_root/data/risk/KOR/{symbol}/risk_values.csv
-    3) CSV 로드 -> Inserter Upsert
+    2) risk 저장 경로 -> project_root/data/risk/KOR/risk_values_delta.csv (지난 적재 이후 바뀐 행)
+       full=True 이거나 fingerprint 캐시가 없으면 project_root/data/risk/KOR/risk_values.csv (시장 단위)
+       둘 다 없으면 project_root/data/risk/KOR/{symbol}/risk_values.csv (종목 단위)
+    3) CSV 로드 -> DB 값과 비교해 새 행 / 바뀐 행만 Upsert (delta 는 모든 종목이 성공하면 삭제)
+       delta 가 아닌 경우 종목별 내용 checksum 이 SYNC_STATE 와 같으면 건너뛴다
+       (risk 는 재계산 때 과거 날짜 값도 바뀌므로 날짜 watermark 로 자르지 않는다)
+    4) 종목은 workers 개 연결로 병렬 처리하며, 종목마다 한 트랜잭션 (module.data.database.sync_runner)
     """
 
     # (A) config 로드
@@ -24,57 +73,111 @@ def insert_risk_values_main(config_path: str, db_params: dict):
 
     country_str = os.path.basename(base_path)  # e.g. "KOR"
 
-    # (B) DB 연결
-    inserter = RiskDataInserter(
-        host=db_params["host"],
-        user=db_params["user"],
-        password=db_params["password"],
-        db=db_params["database"],
-        port=db_params["port"]
-    )
-
+    # (B) project_root
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.dirname(current_dir)
+    risk_root = os.path.join(project_root, "data", "risk", country_str)
+
+    delta_path = os.path.join(risk_root, DELTA_FILE)
+    use_delta = not full and os.path.isfile(os.path.join(risk_root, FINGERPRINT_FILE))
+    if use_delta and not os.path.isfile(delta_path):
+        logger.info(f"[{country_str}] No changed risk rows since last insert.")
+        return
+
+    market_risk = load_market_risk(risk_root, DELTA_FILE if use_delta else "risk_values.csv")
+    risk_by_symbol = None
+    if not market_risk.empty:
+        logger.info(f"[{country_str}] Loaded market risk file: {len(market_risk)} rows")
+        risk_by_symbol = dict(tuple(market_risk.groupby("company_code", sort=False)))
+
+    # (C) DB 연결, watermark 조회
+    pool = shared_pool(db_params)
+    source = RISK_SYNC_SOURCE.format(country=country_str)
+    with SyncStateInserter(pool=pool) as sync_state:
+        watermarks = {} if use_delta else sync_state.load(source, "RISK")
+
+    def sync_symbol(session, symbol: str):
+        if risk_by_symbol is not None:
+            df_risk = risk_by_symbol.get(symbol, pd.DataFrame()).copy()
+        else:
+            df_risk = load_symbol_risk(risk_root, symbol)
+
+        if df_risk.empty:
+            logger.debug(f"[{symbol}] No risk values to insert.")
+            return None
+        missing = set(RISK_COLUMNS) - set(df_risk.columns)
+        if missing:
+            raise ValueError(f"Missing columns in risk values: {missing}")
+
+        # (E) risk_score 소수 4자리로 맞춤
+        df_risk["risk_score"] = df_risk["risk_score"].astype(float).round(4)
+
+        # (F) 지난 적재와 내용이 같으면 건너뜀
+        checksum = risk_checksum(df_risk)
+        watermark = watermarks.get(symbol)
+        if watermark and watermark.last_file_checksum == checksum:
+            logger.debug(f"[{symbol}] Risk values unchanged since last insert, skip.")
+            return None
+
+        # (G) DB 값과 비교해 새 행 / 바뀐 행만 Upsert
+        predict_dates = df_risk["predict_date"].astype(str)
+        inserter = session.inserter(RiskDataInserter)
+        existing = inserter.select_risk_scores(symbol, predict_dates.min(), predict_dates.max())
+        df_write, stats = diff_risk(df_risk, existing)
+        if not df_write.empty:
+            inserter.upsert_risk(df_write)
+        logger.info(f"[{symbol}] {stats['new']} new, {stats['changed']} changed, "
+                    f"{stats['unchanged']} unchanged rows => RISK table.")
+
+        last_ts = pd.to_datetime(predict_dates, errors="coerce").max()
+        session.inserter(SyncStateInserter).save(source, symbol, "RISK",
+                                                 last_ts.to_pydatetime() if pd.notna(last_ts) else None, checksum)
+        return SyncCounts(inserted=stats["new"], updated=stats["changed"], skipped=stats["unchanged"])
+
+    # (D) 종목별 risk Upsert (병렬)
     try:
-        # (C) project_root
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        project_root = os.path.dirname(current_dir)
-
-        # (D) 각 종목별 risk_values.csv 읽어서 Upsert
-        for stock_info in stocks_list:
-            symbol = stock_info["symbol"]  # e.g. "005930"
-            risk_folder = os.path.join(project_root, "data", "risk", country_str, symbol)
-            if not os.path.isdir(risk_folder):
-                logger.info(f"[{symbol}] No risk folder: {risk_folder}")
-                continue
-
-            csv_file = os.path.join(risk_folder, "risk_values.csv")
-            if not os.path.isfile(csv_file):
-                logger.info(f"[{symbol}] No risk_values.csv found in: {risk_folder}")
-                continue
-
-            df_risk = pd.read_csv(csv_file)
-            if df_risk.empty:
-                logger.info(f"[{symbol}] risk_values.csv is empty.")
-                continue
-
-            # (E) CSV에 company_code 컬럼이 있는지 확인
-            #     만약 "symbol"이라는 이름으로 되어 있다면 rename
-            if "symbol" in df_risk.columns:
-                df_risk.rename(columns={"symbol": "company_code"}, inplace=True)
-            else:
-                # CSV에서 이미 company_code로 저장했을 수도 있음
-                if "company_code" not in df_risk.columns:
-                    # 최후 수단: DF에 직접 추가
-                    df_risk["company_code"] = symbol
-
-            # (F) risk_score 소수 4자리로 맞춤
-            df_risk["risk_score"] = df_risk["risk_score"].astype(float).round(4)
-
-            # (G) Upsert
-            inserter.insert_or_update_risk(df_risk)
-            logger.info(f"[{symbol}] Upsert completed: {len(df_risk)} rows => RISK table.")
+        report = run_symbol_sync(pool, [str(stock["symbol"]) for stock in stocks_list], sync_symbol,
+                                 workers=workers, label=source)
+    finally:
+        pool.log_metrics()
+
+    if use_delta:
+        if (report["status"] == "failed").any():
+            logger.warning(f"[{country_str}] Keeping {delta_path} for retry (some symbols failed).")
+        else:
+            os.remove(delta_path)
+            logger.info(f"[{country_str}] Consumed {delta_path}")
+    return report
 
+
+def insert_risk_regimes_main(config_path: str, db_params: dict):
+    """
+    data/risk/<country>/regimes.csv (risk --incremental 실행 결과) → RISK_REGIME 테이블
+    config 의 종목만 적재하며, 종목/모델 단위로 기존 구간을 교체한다.
+    """
+    config = read_config(config_path)
+    data_pipelines = config["data_pipelines"]
+    country_str = os.path.basename(data_pipelines["base_path"])
+    symbols = {str(stock["symbol"]) for stock in data_pipelines["stocks"]}
+
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.dirname(current_dir)
+    regime_file = os.path.join(project_root, "data", "risk", country_str, REGIME_SUMMARY_FILE)
+    if not os.path.isfile(regime_file):
+        logger.info(f"[{country_str}] No regime summary: {regime_file}")
+        return
+
+    regimes = pd.read_csv(regime_file, dtype={"symbol": str})
+    regimes = regimes[regimes["symbol"].isin(symbols)]
+    logger.info(f"[{country_str}] Loaded {len(regimes)} regimes for {regimes['symbol'].nunique()} symbols")
+
+    pool = shared_pool(db_params)
+    inserter = RiskRegimeInserter(pool=pool)
+    try:
+        inserter.insert_regimes(regimes)
     finally:
         inserter.close()
+        pool.log_metrics()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,128 @@
+import os
+import sys
+import time
+import logging
+import pandas as pd
+from module.logger import get_logger, setup_global_logging
+from module.utils import read_config, load_db_config_yaml
+from module.data.database.stock_data_inserter import StockDataInserter
+from module.data.database.stock_sync import (
+    load_local_prices, month_checksums, compare_checksums, month_range, db_prices, diff_stock_prices
+)
+from module.data.database.connection_pool import shared_pool
+
+logger = get_logger(__name__)
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+
+RECONCILE_REPORT_FILE = "reconcile_report.csv"
+
+
+def reconcile_symbol(inserter: StockDataInserter, symbol: str, folder_path: str, apply: bool = True,
+                     since: str = None) -> dict:
+    """
+    종목 하나의 로컬 / DB 월별 checksum 을 비교하고, 다른 월만 행 단위로 비교해 반영한다.
+    :param apply: False 이면 비교만 (무결성 검사)
+    :param since: 이 월(YYYY-MM) 부터만 비교
+    :return: 요약 dict (months, ok, changed, local_only, db_only, fetched_rows, diff_rows, written)
+    """
+    started = time.perf_counter()
+    local = load_local_prices(folder_path)
+    if since:
+        local = local[local["date"] >= pd.Timestamp(f"{since}-01")]
+    db_sums = inserter.month_checksums(symbol, since)
+    if db_sums is None:
+        return {"symbol": symbol, "error": "checksum query failed"}
+    report = compare_checksums(month_checksums(local), db_sums)
+    counts = report["status"].value_counts()
+
+    summary = {
+        "symbol": symbol,
+        "months": len(report),
+        **{status: int(counts.get(status, 0)) for status in ("ok", "changed", "local_only", "db_only")},
+        "fetched_rows": 0,
+        "diff_rows": 0,
+        "written": 0,
+    }
+    # DB 에만 있는 월은 로컬에 기준 데이터가 없으므로 보고만 한다
+    to_sync = report.loc[report["status"].isin(["changed", "local_only"]), "month"].tolist()
+    db_months = set(db_sums["month"])
+    frames = []
+    for month in to_sync:
+        start, end = month_range(month)
+        local_month = local[(local["date"] >= start) & (local["date"] <= end)]
+        db_rows = inserter.select_price_range(symbol, start, end) if month in db_months else []
+        summary["fetched_rows"] += len(db_rows)
+        changed, _ = diff_stock_prices(local_month, db_prices(db_rows))
+        frames.append(changed)
+        if len(db_rows) > len(local_month):
+            logger.warning(f"[{symbol}] {month}: {len(db_rows) - len(local_month)} rows only in DB")
+
+    if frames:
+        df_write = pd.concat(frames, ignore_index=True)
+        summary["diff_rows"] = len(df_write)
+        if apply and not df_write.empty:
+            summary["written"] = inserter.upsert_stock_price(symbol, df_write)
+    summary["seconds"] = time.perf_counter() - started
+    if to_sync:
+        logger.info(f"[{symbol}] {summary['changed']} changed / {summary['local_only']} local-only months "
+                    f"({', '.join(to_sync[:6])}{' ...' if len(to_sync) > 6 else ''}) → "
+                    f"{summary['diff_rows']} rows differ, {summary['written']} written")
+    return summary
+
+
+def reconcile_stock_price_main(config_path: str, db_params: dict, apply: bool = True, since: str = None):
+    """
+    config 의 종목마다 로컬 chunk 파일과 STOCK_PRICE 의 월별 checksum 을 비교한다.
+    checksum 이 다른 월만 DB 에서 읽어 행 단위로 비교하고, apply=True 이면 다른 행을 upsert 한다.
+    결과는 data/db_sync/<country>/reconcile_report.csv 로 저장한다.
+    """
+    config = read_config(config_path)
+    data_pipelines = config["data_pipelines"]
+    base_path = data_pipelines["base_path"]
+    country_str = os.path.basename(base_path)
+
+    pool = shared_pool(db_params)
+    inserter = StockDataInserter(pool=pool)
+    summaries = []
+    try:
+        for stock in data_pipelines["stocks"]:
+            symbol = str(stock["symbol"])
+            folder_path = os.path.join(base_path, symbol)
+            if not os.path.isdir(folder_path):
+                logger.warning(f"No folder for {symbol} at {folder_path}")
+                continue
+            summaries.append(reconcile_symbol(inserter, symbol, folder_path, apply=apply, since=since))
+    finally:
+        inserter.close()
+        pool.log_metrics()
+
+    report = pd.DataFrame(summaries)
+    if report.empty:
+        logger.info(f"[{country_str}] Nothing to reconcile.")
+        return report
+    report_folder = os.path.join(project_root, "data", "db_sync", country_str)
+    os.makedirs(report_folder, exist_ok=True)
+    report.to_csv(os.path.join(report_folder, RECONCILE_REPORT_FILE), index=False)
+
+    mismatched = report[(report[["changed", "local_only", "db_only"]].fillna(0).sum(axis=1) > 0)]
+    logger.info(f"[{country_str}] {len(report)} symbols, {len(mismatched)} with mismatched months, "
+                f"{int(report['fetched_rows'].sum())} DB rows fetched, {int(report['written'].sum())} rows written "
+                f"=> {report_folder}")
+    return report
+
+
+if __name__ == "__main__":
+    setup_global_logging(
+        log_dir=os.path.join(project_root, "logs"),
+        log_level=logging.INFO,
+        file_level=logging.DEBUG,
+        stream_level=logging.INFO,
+    )
+
+    db_config_path = os.path.join(project_root, "configs", "datasources", "db_config.yaml")
+    db_conf = load_db_config_yaml(db_config_path)
+    for config_file in ("kor_scm_stock_price.yaml", "usa_stock_price.yaml"):
+        reconcile_stock_price_main(os.path.join(project_root, "configs", "datasources", config_file), db_conf)
@@ -1,11 +1,15 @@
 import os
 import sys
 import logging
-import glob
 import pandas as pd
-from multiprocessing import Pool, cpu_count
 from datetime import datetime
-from module.analysis.ts.change_point_detection import calculate_risk_scores
+from multiprocessing import cpu_count
+from module.analysis.ts.batch_engine import load_universe, run_batch
+from module.analysis.ts.detectors import detector_model_name
+from module.analysis.ts.quantiles import PERCENTILE_FILE, SKETCH_FILE, config_sectors, load_sketches, risk_percentiles
+from module.analysis.ts.regimes import RegimeStore, run_regimes
+from module.analysis.ts.risk_job import risk_settings
+from module.analysis.ts.risk_cache import RiskFingerprintCache, append_delta, changed_rows, fingerprint_arrays
 from module.utils import read_config
 from module.logger import get_logger, setup_global_logging
 
@@ -16,129 +20,187 @@ project_root = os.path.dirname(current_dir)
 sys.path.append(project_root)
 
 
-def process_csv_file(args):
+RISK_RESULT_FILE = "risk_values.csv"
+
+
+def risk_model_name(detector: str, rolling_window=None, incremental: bool = False) -> str:
     """
-    Multiprocessing에서 병렬로 실행할 함수.
-    CSV 파일 → DF 로드 → risk 계산 → 결과 DataFrame 반환
+    RISK.MODEL_NAME. detector registry 의 model_name 을 사용하고,
+    rolling 모드는 전체 히스토리 결과와 구분되도록 window 크기를 붙인다 (예: Binseg-R250).
+    incremental 모드는 닫힌 구간을 다시 탐지하지 않아 결과가 다르므로 -I 를 붙인다 (예: Binseg-I)
     """
-    csv_file, symbol = args
-
-    if not os.path.exists(csv_file):
-        logger.warning(f"[{symbol}] CSV file not found: {csv_file}")
-        return pd.DataFrame()
+    model_name = detector_model_name(detector)
+    if rolling_window is not None:
+        return f"{model_name}-R{rolling_window}"
+    return f"{model_name}-I" if incremental else model_name
 
-    try:
-        df = pd.read_csv(csv_file).drop_duplicates()
-        df["date"] = pd.to_datetime(df["date"], errors="coerce")
-        df.dropna(subset=["date"], inplace=True)
 
-        if "close" not in df.columns or "volume" not in df.columns:
-            logger.info(f"[{symbol}] Missing 'close' or 'volume' columns in {csv_file}. Skipped.")
-            return pd.DataFrame()
+def format_risk_output(risk_df: pd.DataFrame, model_name: str) -> pd.DataFrame:
+    """
+    (symbol, date, risk_value) → RISK 테이블 적재용 컬럼
+    (symbol, date, risk_value, model_name, analysis_result, test_date, predict_date, risk_score)
+    """
+    out = risk_df.copy()
+    out["model_name"] = model_name
+    out["analysis_result"] = "Completed"
+    out["test_date"] = datetime.now().strftime("%Y-%m-%d")
 
-        if df.empty:
-            logger.info(f"[{symbol}] DataFrame is empty after date cleaning: {csv_file}")
-            return pd.DataFrame()
+    # date, predict_date를 YYYY-MM-DD로 포맷
+    out["date"] = pd.to_datetime(out["date"]).dt.strftime("%Y-%m-%d")
+    out["predict_date"] = out["date"]
 
-        # 위험도 계산
-        risk_df = calculate_risk_scores(df, symbol)
-        if risk_df.empty:
-            logger.info(f"[{symbol}] Returned empty risk_df from {csv_file}")
-        else:
-            logger.info(f"[{symbol}] Completed risk calculation for {csv_file} with {len(risk_df)} rows.")
+    # risk_score = risk_value
+    out["risk_score"] = out["risk_value"]
+    return out
 
-        return risk_df
 
-    except Exception as e:
-        logger.warning(f"[{symbol}] Failed to process {csv_file}: {e}")
+def load_previous_risk(risk_folder: str) -> pd.DataFrame:
+    out_file = os.path.join(risk_folder, RISK_RESULT_FILE)
+    if not os.path.isfile(out_file):
         return pd.DataFrame()
+    return pd.read_csv(out_file, dtype={"symbol": str})
+
+
+def main(
+        config_path: str,
+        window_rows=None,
+        processes=None,
+        force=False,
+        n_bkps=None,
+        smoothing_alpha=None,
+        rolling_window=None,
+        step=1,
+        detector=None,
+        incremental=False,
+):
+    """
+    :param force: True면 fingerprint 캐시를 무시하고 전체 종목을 다시 계산
+    :param rolling_window: 지정하면 날짜마다 직전 rolling_window 개 bar 만으로 계산 (step 간격)
+    :param n_bkps, smoothing_alpha, detector: 지정하면 config 의 risk 섹션 값을 덮어쓴다
+    :param incremental: 종목별 regime(breakpoint/구간 통계)을 저장해 두고 마지막 구간 + 새 데이터만 다시 탐지
+    """
+    if incremental and (rolling_window is not None or window_rows is not None):
+        raise ValueError("incremental mode cannot be combined with rolling_window or window_rows")
 
-
-def main(config_path: str):
     # 1) config 로드
     config = read_config(config_path)
     data_pipelines = config["data_pipelines"]
+    settings = risk_settings(config, detector=detector, n_bkps=n_bkps, smoothing_alpha=smoothing_alpha)
 
     # 2) base_path 예: "data/stocks/KOR"
     base_path = data_pipelines["base_path"]
-    stocks_list = data_pipelines["stocks"]
+    symbols = [stock["symbol"] for stock in data_pipelines["stocks"]]
 
     # 예: base_path = "data/stocks/KOR" → country_str = "KOR"
     country_str = os.path.basename(base_path)
 
-    tasks = []
-    for stock in stocks_list:
-        symbol = stock["symbol"]
-        folder_path = os.path.join(base_path, symbol)
-        if not os.path.isdir(folder_path):
-            logger.warning(f"No folder for {symbol} at {folder_path}")
-            continue
-
-        csv_files = glob.glob(os.path.join(folder_path, "*.csv"))
-        if not csv_files:
-            logger.info(f"No CSV files found for {symbol}")
-            continue
-
-        for csvf in csv_files:
-            try:
-                df_head = pd.read_csv(csvf, nrows=0)
-                if "close" not in df_head.columns or "volume" not in df_head.columns:
-                    logger.info(f"[{symbol}] {csvf} missing 'close'/'volume' columns. Skipped.")
-                    continue
-            except Exception as e:
-                logger.warning(f"[{symbol}] Failed to read columns from {csvf} - {e}")
-                continue
-
-            tasks.append((csvf, symbol))
-
-    logger.info(f"Total tasks to process: {len(tasks)}")
-
-    if tasks:
-        with Pool(processes=cpu_count()) as pool:
-            results = pool.map(process_csv_file, tasks)
+    # ex) "/Users/.../project_root/data/risk/KOR"
+    risk_folder = os.path.join(project_root, "data", "risk", country_str)
+
+    # 3) 전체 종목 close/volume 을 한 번에 로드
+    universe = load_universe(base_path, symbols)
+    logger.info(f"Loaded {len(universe)}/{len(symbols)} symbols ({universe.total_rows} rows)")
+    if len(universe) == 0:
+        logger.info("No symbols to process. Check if CSV files or columns are missing.")
+        return
+
+    # 4) 입력 + 파라미터 fingerprint 가 바뀐 종목만 다시 계산
+    model_name = risk_model_name(settings["detector"], rolling_window, incremental)
+    logger.info(f"Risk model {model_name}: {settings}")
+    params = {
+        "model_name": model_name,
+        **settings,
+        "window_rows": window_rows,
+        "rolling_window": rolling_window,
+        "step": step,
+    }
+    if incremental:
+        params["incremental"] = True
+    cache = RiskFingerprintCache(risk_folder)
+    # 파일에는 여러 model_name 결과가 함께 들어 있다. 재사용 판단은 이 model 행으로만 하고,
+    # 다른 detector 나 모드(예: rolling ↔ 전체 히스토리)의 행은 저장할 때 그대로 유지한다
+    previous_all = load_previous_risk(risk_folder)
+    if not previous_all.empty and "model_name" not in previous_all.columns:
+        previous_all["model_name"] = model_name
+    is_model = previous_all["model_name"] == model_name if not previous_all.empty else None
+    previous = previous_all[is_model] if not (force or previous_all.empty) else pd.DataFrame()
+    previous_symbols = set(previous["symbol"]) if not previous.empty else set()
+
+    fingerprints = {}
+    stale = []
+    for index, symbol in enumerate(universe.symbols):
+        rows = universe.rows(index)
+        fingerprints[symbol] = fingerprint_arrays(
+            universe.dates[rows].tz_localize(None).to_numpy(),
+            universe.close[rows],
+            universe.volume[rows],
+            params,
+        )
+        if force or symbol not in previous_symbols or not cache.is_fresh(symbol, fingerprints[symbol]):
+            stale.append(index)
+
+    logger.info(f"{len(stale)}/{len(universe)} symbols changed since last run")
+    if not stale:
+        logger.info("Risk values are up to date.")
+        return
+
+    stale_symbols = {universe.symbols[i] for i in stale}
+    if incremental:
+        # force 여도 regime 은 닫힌 구간 fingerprint 로 재사용 여부를 판단한다
+        regimes = RegimeStore(risk_folder)
+        risk_df = run_regimes(universe.subset(stale), regimes, model_name, settings, processes or cpu_count())
+        regimes.save()
     else:
-        logger.info("No tasks to process. Check if CSV files or columns are missing.")
-        results = []
-
-    # 종목별로 결과 DataFrame 합치기
-    df_by_symbol = {}
-    for res_df in results:
-        if res_df.empty:
-            continue
-        sym = res_df["symbol"].iloc[0]
-        if sym not in df_by_symbol:
-            df_by_symbol[sym] = res_df.copy()
-        else:
-            df_by_symbol[sym] = pd.concat([df_by_symbol[sym], res_df], ignore_index=True)
-
-    # 저장
-    for sym, df_symbol in df_by_symbol.items():
-        if df_symbol.empty:
-            continue
-
-        # 추가 컬럼
-        df_symbol["model_name"] = "Binseg"
-        df_symbol["analysis_result"] = "Completed"
-        df_symbol["test_date"] = datetime.now().strftime("%Y-%m-%d")
-        df_symbol["predict_date"] = df_symbol["date"]
-
-        # date, predict_date를 YYYY-MM-DD로 포맷
-        df_symbol["date"] = pd.to_datetime(df_symbol["date"]).dt.strftime("%Y-%m-%d")
-        df_symbol["predict_date"] = pd.to_datetime(df_symbol["predict_date"]).dt.strftime("%Y-%m-%d")
-
-        # symbol 컬럼 제거
-        df_symbol.drop(columns=["symbol"], inplace=True)
-
-        # risk_score = risk_value
-        df_symbol["risk_score"] = df_symbol["risk_value"]
-
-        # ex) "/Users/.../project_root/data/risk/KOR/005930"
-        risk_folder = os.path.join(project_root, "data", "risk", country_str, sym)
-        os.makedirs(risk_folder, exist_ok=True)
-
-        out_file = os.path.join(risk_folder, "risk_values.csv")
-        df_symbol.to_csv(out_file, index=False)
-        logger.info(f"[{sym}] => {out_file} ({len(df_symbol)} rows)")
+        risk_df = run_batch(
+            universe.subset(stale),
+            processes=processes,
+            window_rows=window_rows,
+            rolling_window=rolling_window,
+            step=step,
+            **settings,
+        )
+    updated = format_risk_output(risk_df, model_name)
+
+    # 5) 시장 단위 파일 하나로 저장. 이 model 의 다시 계산한 종목 행만 바꾸고 나머지(다른 model 포함)는 유지
+    #    (계산에 실패한 종목은 이전 행을 남겨 두고 다음 실행에서 다시 계산한다)
+    os.makedirs(risk_folder, exist_ok=True)
+    computed = set(risk_df["symbol"])
+    if not previous_all.empty:
+        replaced = is_model & previous_all["symbol"].isin(computed)
+        combined = pd.concat([previous_all[~replaced], updated], ignore_index=True)
+    else:
+        combined = updated
+
+    out_file = os.path.join(risk_folder, RISK_RESULT_FILE)
+    combined.to_csv(out_file, index=False)
+    logger.info(f"[{country_str}] => {out_file} ({len(combined)} rows, {combined['symbol'].nunique()} symbols)")
+    model_rows = combined[combined["model_name"] == model_name]
+
+    # 6) 값이 바뀐 행만 delta 로 (insert_risk_values 가 적재 후 삭제)
+    previous_computed = previous[previous["symbol"].isin(computed)] if not previous.empty else previous
+    delta = changed_rows(previous_computed, updated)
+    if not delta.empty:
+        delta_file = append_delta(risk_folder, delta)
+        logger.info(f"[{country_str}] => {delta_file} ({len(delta)} changed rows)")
+
+    # 7) 날짜별 시장 / 섹터 내 백분위 (종목마다 스케일이 다른 risk value 를 서로 비교할 수 있도록)
+    #    저장해 둔 sketch 에 delta 만 반영한다 (force 이거나 이전 결과가 없으면 전체로 다시 만든다)
+    previous_sketches = None if previous.empty else load_sketches(risk_folder)
+    percentiles, sketches = risk_percentiles(
+        model_rows, config_sectors(data_pipelines["stocks"]), country_str, processes or cpu_count(),
+        model_name=model_name, sketches=previous_sketches, changed=delta, previous=previous_computed,
+    )
+    percentile_file = os.path.join(risk_folder, PERCENTILE_FILE)
+    percentiles.to_csv(percentile_file, index=False)
+    sketches.save(os.path.join(risk_folder, SKETCH_FILE))
+    logger.info(f"[{country_str}] => {percentile_file} ({len(sketches.sketches)} sketches)")
+
+    # 8) fingerprint 갱신 (실패한 종목은 다음 실행에서 다시 계산)
+    cache.forget(stale_symbols - computed)
+    summary = updated.groupby("symbol")["date"].agg(["size", "max"])
+    for symbol in computed:
+        cache.update(symbol, fingerprints[symbol], int(summary.at[symbol, "size"]), summary.at[symbol, "max"])
+    cache.save()
 
 
 if __name__ == "__main__":
@@ -149,7 +211,7 @@ if __name__ == "__main__":
         stream_level=logging.INFO,
     )
 
-    logger.info("Starting insert_stock_kor script")
+    logger.info("Starting calculate_risk_values script")
 
     # config 파일 경로 (예시)
     config_path = os.path.join(
@@ -0,0 +1,91 @@
+import os
+import sys
+import logging
+from multiprocessing import cpu_count
+from module.analysis.ts.backtest import (
+    BACKTEST_RESULT_FILE, BACKTEST_SERIES_FILE, BacktestConfig, run_backtest
+)
+from module.analysis.ts.batch_engine import load_universe
+from module.analysis.ts.detectors import detector_model_name
+from module.analysis.ts.risk_job import risk_settings
+from module.utils import read_config
+from module.logger import get_logger, setup_global_logging
+
+logger = get_logger(__name__)
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+
+
+def main(
+        config_path: str,
+        warmup=250,
+        step=5,
+        horizon=20,
+        detector=None,
+        processes=None,
+        max_symbols=None,
+):
+    """
+    config 의 risk 설정으로 종목별 walk-forward 백테스트를 수행한다.
+    결과는 data/risk/<country>/backtest/ 아래 backtest_results.csv (종목별 지표),
+    backtest_series.csv (시점별 risk / 이후 변동성 / 낙폭) 로 저장한다.
+    """
+    config = read_config(config_path)
+    data_pipelines = config["data_pipelines"]
+    settings = risk_settings(config, detector=detector)
+    model_name = detector_model_name(settings["detector"])
+
+    base_path = data_pipelines["base_path"]
+    symbols = [stock["symbol"] for stock in data_pipelines["stocks"]][:max_symbols]
+    country_str = os.path.basename(base_path)
+    backtest_folder = os.path.join(project_root, "data", "risk", country_str, "backtest")
+
+    universe = load_universe(base_path, symbols)
+    logger.info(f"Loaded {len(universe)}/{len(symbols)} symbols ({universe.total_rows} rows)")
+    if len(universe) == 0:
+        logger.info("No symbols to backtest. Check if CSV files or columns are missing.")
+        return
+
+    rows = [universe.rows(i) for i in range(len(universe))]
+    results, series, stats = run_backtest(
+        universe.symbols,
+        [universe.dates[r].tz_localize(None).to_numpy() for r in rows],
+        [universe.close[r] for r in rows],
+        [universe.volume[r] for r in rows],
+        model_name,
+        settings,
+        BacktestConfig(warmup=warmup, step=step, horizon=horizon),
+        processes=processes or cpu_count(),
+    )
+
+    os.makedirs(backtest_folder, exist_ok=True)
+    results.to_csv(os.path.join(backtest_folder, BACKTEST_RESULT_FILE), index=False)
+    series.to_csv(os.path.join(backtest_folder, BACKTEST_SERIES_FILE), index=False)
+
+    if not results.empty:
+        logger.info(f"Per-symbol scores ({model_name}):\n{results.round(4).to_string(index=False)}")
+        logger.info(
+            f"Mean vol_corr={results['vol_corr'].mean():.3f} drawdown_corr={results['drawdown_corr'].mean():.3f} "
+            f"lift={results['lift'].mean():.2f}"
+        )
+    logger.info(
+        f"[{country_str}] {stats['symbols']} symbols, {stats['steps']} steps in {stats['seconds']:.2f}s "
+        f"({stats['steps_per_sec']:.1f} steps/sec), {stats['full_refits']} full refits, "
+        f"{stats['full_refits_skipped']} skipped (state reuse {stats['state_reuse_rate']:.0%}) => {backtest_folder}"
+    )
+
+
+if __name__ == "__main__":
+    setup_global_logging(
+        log_dir=os.path.join(project_root, "logs"),
+        log_level=logging.INFO,
+        file_level=logging.DEBUG,
+        stream_level=logging.INFO,
+    )
+
+    config_path = os.path.join(
+        project_root, "configs", "datasources", "kor_scm_stock_price.yaml"
+    )
+    main(config_path)
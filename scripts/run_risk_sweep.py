@@ -0,0 +1,102 @@
+import os
+import sys
+import time
+import logging
+from multiprocessing import cpu_count
+from module.analysis.ts.batch_engine import load_universe
+from module.analysis.ts.risk_job import risk_settings
+from module.analysis.ts.sweep import SweepGrid, run_sweep, summarize_sweep
+from module.utils import read_config
+from module.logger import get_logger, setup_global_logging
+
+logger = get_logger(__name__)
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+
+SWEEP_RESULT_FILE = "sweep_results.csv"
+SWEEP_SUMMARY_FILE = "sweep_summary.csv"
+SWEEP_TIMING_FILE = "sweep_timings.csv"
+
+DEFAULT_N_BKPS = (3, 5, 8, 12)
+DEFAULT_SMOOTHING_ALPHAS = (0.1, 0.2, 0.3, 0.5, 0.8)
+DEFAULT_SCALINGS = ("minmax", "quantile", "rank")
+
+
+def main(
+        config_path: str,
+        detectors=None,
+        n_bkps=DEFAULT_N_BKPS,
+        smoothing_alphas=DEFAULT_SMOOTHING_ALPHAS,
+        scalings=DEFAULT_SCALINGS,
+        processes=None,
+        max_symbols=None,
+):
+    """
+    :param detectors: None 이면 config 의 risk.detector 하나
+    :param max_symbols: 앞에서부터 이 수만큼의 종목만 사용
+    결과는 data/risk/<country>/sweep/ 아래 sweep_results.csv (종목 x 조합),
+    sweep_summary.csv (조합별 평균), sweep_timings.csv (단계별 소요 시간) 로 저장한다.
+    """
+    config = read_config(config_path)
+    data_pipelines = config["data_pipelines"]
+    settings = risk_settings(config)
+    detectors = list(detectors or [settings["detector"]])
+
+    base_path = data_pipelines["base_path"]
+    symbols = [stock["symbol"] for stock in data_pipelines["stocks"]][:max_symbols]
+    country_str = os.path.basename(base_path)
+    sweep_folder = os.path.join(project_root, "data", "risk", country_str, "sweep")
+
+    started = time.perf_counter()
+    universe = load_universe(base_path, symbols)
+    load_time = time.perf_counter() - started
+    logger.info(f"Loaded {len(universe)}/{len(symbols)} symbols ({universe.total_rows} rows) in {load_time:.2f}s")
+    if len(universe) == 0:
+        logger.info("No symbols to sweep. Check if CSV files or columns are missing.")
+        return
+
+    grid = SweepGrid(
+        detectors=detectors,
+        n_bkps=list(n_bkps),
+        smoothing_alphas=list(smoothing_alphas),
+        scalings=list(scalings),
+        detector_params={settings["detector"]: settings["detector_params"]},
+    )
+    started = time.perf_counter()
+    results, timings = run_sweep(
+        universe.symbols,
+        [universe.close[universe.rows(i)] for i in range(len(universe))],
+        [universe.volume[universe.rows(i)] for i in range(len(universe))],
+        grid,
+        processes=processes or cpu_count(),
+    )
+    sweep_time = time.perf_counter() - started
+    timings.loc[len(timings)] = ["load", "", load_time]
+    timings = timings.sort_values(["stage", "detector"]).reset_index(drop=True)
+    summary = summarize_sweep(results)
+
+    os.makedirs(sweep_folder, exist_ok=True)
+    results.to_csv(os.path.join(sweep_folder, SWEEP_RESULT_FILE), index=False)
+    summary.to_csv(os.path.join(sweep_folder, SWEEP_SUMMARY_FILE), index=False)
+    timings.to_csv(os.path.join(sweep_folder, SWEEP_TIMING_FILE), index=False)
+
+    for row in timings.itertuples(index=False):
+        logger.info(f"stage={row.stage:<8} detector={row.detector:<14} {row.seconds:8.2f}s")
+    logger.info(f"Top combinations by fwd_vol_corr:\n{summary.head(10).to_string(index=False)}")
+    logger.info(f"[{country_str}] sweep of {grid.size} combinations done in {sweep_time:.2f}s => {sweep_folder}")
+
+
+if __name__ == "__main__":
+    setup_global_logging(
+        log_dir=os.path.join(project_root, "logs"),
+        log_level=logging.INFO,
+        file_level=logging.DEBUG,
+        stream_level=logging.INFO,
+    )
+
+    config_path = os.path.join(
+        project_root, "configs", "datasources", "kor_scm_stock_price.yaml"
+    )
+    main(config_path, detectors=["binseg_rbf", "binseg_normal", "pelt_normal"])